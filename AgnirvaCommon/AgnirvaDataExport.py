@@ -0,0 +1,112 @@
+import gzip
+import io
+import tempfile
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only compressed CSV can be exported without it
+    pa = None
+
+# Chunked exports of the datasets shown by the Agnirva apps, as gzip CSV, Parquet or Arrow IPC.
+
+# Label, file extension and MIME type of each export format
+EXPORT_FORMATS = {
+    'csv': ('Compressed CSV', 'csv.gz', 'application/gzip'),
+    'parquet': ('Parquet', 'parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('Arrow IPC', 'arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Rows converted and written at a time
+EXPORT_CHUNK_ROWS = 50000
+
+# Function to list the export formats this installation can write
+def available_formats():
+    return [fmt for fmt in EXPORT_FORMATS if fmt == 'csv' or pa is not None]
+
+# Function to split a DataFrame into row chunks without copying it. An empty frame still
+# yields one chunk so the export carries the column names.
+def frame_chunks(fd, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, max(len(fd), 1), chunk_rows):
+        yield fd.iloc[start:start + chunk_rows]
+
+# Function to write categoricals as strings, since each chunk has its own categories and
+# every chunk must have the same column types
+def _plain_types(chunk):
+    categorical = chunk.select_dtypes('category').columns
+    if len(categorical) == 0:
+        return chunk
+    return chunk.astype({col: 'string' for col in categorical})
+
+def _write_csv(chunks, out):
+    with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6) as compressed:
+        text = io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(text, header=header, index=False)
+            header = False
+        text.flush()
+        text.detach()
+
+def _write_arrow(chunks, out, fmt):
+    writer = None
+    schema = None
+    # Small chunks (e.g. one month of events each) are gathered into row groups of about
+    # EXPORT_CHUNK_ROWS rows, since every row group carries its own metadata
+    pending = []
+    pending_rows = 0
+    try:
+        for chunk in chunks:
+            chunk = _plain_types(chunk)
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                schema = table.schema
+                if fmt == 'parquet':
+                    writer = pq.ParquetWriter(out, schema)
+                else:
+                    writer = pa.ipc.new_file(out, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+            else:
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            pending.append(table)
+            pending_rows += table.num_rows
+            if pending_rows >= EXPORT_CHUNK_ROWS:
+                writer.write_table(pa.concat_tables(pending).combine_chunks())
+                pending = []
+                pending_rows = 0
+        if pending:
+            writer.write_table(pa.concat_tables(pending).combine_chunks())
+    finally:
+        if writer is not None:
+            writer.close()
+
+# Function to write DataFrame chunks to a binary file in one of the EXPORT_FORMATS. Only one
+# chunk is converted at a time, so memory is bounded by the chunk size, not the export size.
+def write_export(chunks, fmt, out):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'csv':
+        _write_csv(chunks, out)
+    elif pa is None:
+        raise ImportError(f"pyarrow is required for {EXPORT_FORMATS[fmt][0]} exports")
+    else:
+        _write_arrow(chunks, out, fmt)
+
+# Function to write an export and return its bytes. The export is written to a temporary
+# file on disk while the chunks are converted, so only the finished (compressed) file is
+# read into memory, and the file is closed and removed before returning.
+def export_bytes(chunks, fmt):
+    with tempfile.TemporaryFile(prefix='agnirva-export-') as out:
+        write_export(chunks, fmt, out)
+        out.seek(0)
+        return out.read()
+
+# Function to defer an export until it is downloaded. make_chunks() is called only then, so
+# passing the result to st.download_button costs nothing on reruns.
+def deferred_export(make_chunks, fmt):
+    def build():
+        return export_bytes(make_chunks(), fmt)
+    return build
+
+# Function to name an export file after its dataset and format
+def export_file_name(stem, fmt):
+    return f"{stem}.{EXPORT_FORMATS[fmt][1]}"
@@ -0,0 +1,110 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Server-side paging for the data views of the Agnirva apps. Rows are searched and sorted on
+# the server and only the visible page, with only the shown columns, is sent to the browser.
+
+# Rows per page offered in the views
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Searched and sorted row orders kept for reuse, keyed by dataset fingerprint
+ORDER_CACHE_ENTRIES = 32
+
+_orders = OrderedDict()
+_orders_lock = threading.Lock()
+
+# Function to find the rows where any of the columns contains the search text, ignoring case.
+# Categorical columns are searched through their categories, once per distinct value.
+def search_mask(fd, text, columns):
+    mask = np.zeros(len(fd), dtype=bool)
+    for col in columns:
+        values = fd[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            hits = values.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+            mask |= np.isin(values.cat.codes.to_numpy(), np.flatnonzero(hits))
+        else:
+            found = values.astype('string').str.contains(text, case=False, regex=False)
+            mask |= found.fillna(False).to_numpy(dtype=bool)
+    return mask
+
+# Function to list the positions of the rows matching a search, in sort order (missing values
+# last). With a fingerprint the result is kept, so paging through it doesn't search or sort
+# the dataset again.
+def row_order(fd, search='', search_columns=(), sort_column=None, ascending=True, fingerprint=None):
+    key = (fingerprint, search, tuple(search_columns), sort_column, ascending)
+    if fingerprint is not None:
+        with _orders_lock:
+            positions = _orders.get(key)
+            if positions is not None:
+                _orders.move_to_end(key)
+                return positions
+
+    positions = np.arange(len(fd))
+    if search:
+        positions = np.flatnonzero(search_mask(fd, search, search_columns))
+    if sort_column is not None:
+        values = fd[sort_column].iloc[positions].reset_index(drop=True)
+        order = values.sort_values(ascending=ascending, kind='stable', na_position='last').index
+        positions = positions[order.to_numpy()]
+
+    if fingerprint is not None:
+        with _orders_lock:
+            _orders[key] = positions
+            while len(_orders) > ORDER_CACHE_ENTRIES:
+                _orders.popitem(last=False)
+    return positions
+
+# Function to tell whether a column holds text worth searching
+def is_text_column(values):
+    return values.dtype == object or isinstance(values.dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+# Function to show a dataset one page at a time with search and sort controls. Only the given
+# columns of the visible rows are sent, renamed with labels. With show_table=False the caller
+# draws the page itself. Returns the positions of the rows on the page.
+def show_paged_rows(fd, key, columns=None, labels=None, fingerprint=None, page_sizes=PAGE_SIZES,
+                    show_table=True):
+    columns = list(columns if columns is not None else fd.columns)
+    labels = labels or {}
+    searchable = [col for col in columns if is_text_column(fd[col])]
+
+    search_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+    search = search_col.text_input(
+        "🔍 Search",
+        key=f"{key}_search",
+        placeholder="Text in " + ", ".join(str(labels.get(col, col)) for col in searchable) if searchable else "",
+        disabled=not searchable
+    ).strip()
+    sort_column = sort_col.selectbox(
+        "↕️ Sort By",
+        [None] + columns,
+        format_func=lambda col: "Original order" if col is None else str(labels.get(col, col)),
+        key=f"{key}_sort"
+    )
+    descending = order_col.checkbox("Descending", key=f"{key}_descending", disabled=sort_column is None)
+    page_size = size_col.selectbox("Rows", page_sizes, key=f"{key}_page_size")
+
+    positions = row_order(fd, search, searchable, sort_column, not descending, fingerprint)
+    pages = max(1, math.ceil(len(positions) / page_size))
+    # A narrower search can leave the remembered page past the end
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    start = (page - 1) * page_size
+    visible = positions[start:start + page_size]
+    if len(positions):
+        summary = f"Page {page} of {pages}: rows {start + 1}–{start + len(visible)} of {len(positions)}"
+    else:
+        summary = "No rows"
+    if search:
+        summary += f" matching “{search}” ({len(fd)} in total)"
+    st.caption(summary)
+
+    if show_table:
+        st.dataframe(fd.iloc[visible][columns].rename(columns=labels), hide_index=True)
+    return visible
@@ -0,0 +1,296 @@
+import email.utils
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared HTTP client for the NASA APIs used by the Agnirva apps (JPL SSD/CNEOS and api.nasa.gov).
+
+# Sustained requests per second and burst size per host. api.nasa.gov allows 1000 requests an
+# hour per key, which the X-RateLimit headers tighten further at runtime.
+HOST_RATE_LIMITS = {
+    'api.nasa.gov': (1000 / 3600, 100),
+    'ssd-api.jpl.nasa.gov': (4.0, 8),
+}
+DEFAULT_RATE_LIMIT = (5.0, 10)
+
+# Limits of API keys whose allowance differs from their host's. DEMO_KEY allows only 30
+# requests an hour per IP address, so it must not start with the burst of a real key.
+KEY_RATE_LIMITS = {
+    ('api.nasa.gov', 'DEMO_KEY'): (30 / 3600, 30),
+}
+
+# Responses worth retrying, and how long to keep trying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+MAX_RETRY_AFTER = 120.0
+MAX_QUEUE_WAIT = 60.0
+DEFAULT_TIMEOUT = (10, 60)
+
+# Seconds before a background refresh that failed is tried again
+REFRESH_RETRY_AFTER = 300.0
+
+# Query parameters that must never reach a log or another user's page
+SECRET_PARAM_PATTERN = re.compile(r'(api_key=)[^&\s\'"]+', re.IGNORECASE)
+
+logger = logging.getLogger('agnirva.nasa_http')
+
+# Raised when a request would have to wait too long for the host's rate limit. It is a
+# RequestException, so callers that already handle request failures report it the same way.
+class RateLimitExceeded(requests.exceptions.RequestException):
+    pass
+
+# Token bucket shared by every thread and session that talks to one host
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Take one token, sleeping until one is available. Raises RateLimitExceeded instead of
+    # waiting longer than max_wait seconds.
+    def acquire(self, max_wait=MAX_QUEUE_WAIT):
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            if now + delay > deadline:
+                raise RateLimitExceeded(f"Rate limit would delay this request by {delay:.0f}s")
+            time.sleep(delay)
+
+    # Hold every request back for a number of seconds, e.g. after a 429 with Retry-After
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    # Tighten the bucket to what the server says is left of its hourly allowance, spreading
+    # the remaining requests over the hour instead of spending them in a burst
+    def observe(self, remaining):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining)
+            self.rate = min(self.base_rate, max(remaining, 1) / 3600)
+
+# Function to read a Retry-After header (seconds or an HTTP date) as seconds to wait
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+# Function to find the api_key of a request, in its parameters or its URL
+def request_api_key(url, params=None):
+    if isinstance(params, dict) and params.get('api_key'):
+        return str(params['api_key'])
+    keys = parse_qs(urlsplit(url).query).get('api_key')
+    return keys[0] if keys else None
+
+# Function to mask API keys in a message, e.g. the request URL inside a requests error
+def redact(message):
+    return SECRET_PARAM_PATTERN.sub(r'\1REDACTED', str(message))
+
+# Function to describe a failed request without its URL, so the reason can be shown to any
+# user: the HTTP status and reason when the server answered, otherwise the kind of error
+def describe_error(error):
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return f"{response.status_code} {response.reason or ''}".strip()
+    if isinstance(error, RateLimitExceeded):
+        return str(error)
+    return type(error).__name__
+
+# Function to pick a jittered exponential backoff delay for a retry attempt (full jitter)
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+# Pooled, rate-limited, retrying HTTP client. get() has the same signature as
+# requests.Session.get, so it can be passed wherever a session is expected.
+class NASAHttpClient:
+    def __init__(self, pool_size=8, rate_limits=None, max_retries=MAX_RETRIES,
+                 default_timeout=DEFAULT_TIMEOUT, key_rate_limits=None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.rate_limits = {**HOST_RATE_LIMITS, **(rate_limits or {})}
+        self.key_rate_limits = {**KEY_RATE_LIMITS, **(key_rate_limits or {})}
+        self.max_retries = max_retries
+        self.default_timeout = default_timeout
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+
+    # Function to get the token bucket of a host and API key, creating it on first use. Each
+    # key has its own allowance, so users with different keys don't share one budget.
+    def bucket(self, host, api_key=None):
+        key = (host, api_key)
+        with self.buckets_lock:
+            if key not in self.buckets:
+                limit = self.key_rate_limits.get(key) or self.rate_limits.get(host, DEFAULT_RATE_LIMIT)
+                self.buckets[key] = TokenBucket(*limit)
+            return self.buckets[key]
+
+    # Function to send a GET request through the host's rate limit, retrying connection
+    # errors, 429s and 5xx responses. The last response is returned once retries run out,
+    # so callers keep using raise_for_status().
+    def get(self, url, params=None, timeout=None, **kwargs):
+        bucket = self.bucket(urlsplit(url).hostname, request_api_key(url, params))
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout or self.default_timeout,
+                                            **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            remaining = response.headers.get('X-RateLimit-Remaining', '')
+            if remaining.isdigit():
+                bucket.observe(int(remaining))
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                # The server wants us gone for longer than anyone would wait on a page
+                bucket.pause(retry_after)
+                return response
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if response.status_code == 429:
+                bucket.pause(delay)
+            response.close()
+            time.sleep(delay)
+        return response
+
+    def close(self):
+        self.session.close()
+
+# One call in progress for a SingleFlight key
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+# Coalesces concurrent identical calls: the first caller for a key runs the function and every
+# caller that arrives while it is running waits for it and shares its result or exception.
+# Nothing is kept once the call finishes, so caching stays with the caller.
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+
+    # Function to run fn(*args, **kwargs) once per key among concurrent callers
+    def do(self, key, fn, *args, **kwargs):
+        while True:
+            with self.lock:
+                flight = self.flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self.flights[key] = _Flight()
+            if leader:
+                break
+            flight.done.wait()
+            if flight.abandoned:
+                # The leader was interrupted (e.g. its Streamlit run was stopped), try again
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(*args, **kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        except BaseException:
+            flight.abandoned = True
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+# Runs cache refreshes on background threads so pages can keep serving the last good result.
+# Each key is refreshed at most once at a time, and a key whose refresh failed is left alone
+# for retry_after seconds so a failing server isn't asked again on every page load.
+class BackgroundRefresher:
+    def __init__(self, max_workers=2, retry_after=REFRESH_RETRY_AFTER):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='agnirva-refresh')
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.running = set()
+        self.failures = {}
+
+    # Function to start refreshing a key in the background. Returns False when the key is
+    # already being refreshed or failed recently.
+    def submit(self, key, fn, *args, **kwargs):
+        with self.lock:
+            failed = self.failures.get(key)
+            if key in self.running or (failed and time.time() - failed[0] < self.retry_after):
+                return False
+            self.running.add(key)
+        self.executor.submit(self._run, key, fn, args, kwargs)
+        return True
+
+    def _run(self, key, fn, args, kwargs):
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %s", key, redact(e))
+            with self.lock:
+                # The refresher is shared by every session, so keep only a reason that is safe to show
+                self.failures[key] = (time.time(), describe_error(e))
+        else:
+            with self.lock:
+                self.failures.pop(key, None)
+        finally:
+            with self.lock:
+                self.running.discard(key)
+
+    # Function to report a key's refresh state: 'refreshing', 'failed' or None, with the
+    # error message of the last failed refresh
+    def status(self, key):
+        with self.lock:
+            if key in self.running:
+                return 'refreshing', None
+            if key in self.failures:
+                return 'failed', self.failures[key][1]
+        return None, None
@@ -0,0 +1,124 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import AgnirvaNASAHttpClient
+from AgnirvaNASAHttpClient import (NASAHttpClient, RateLimitExceeded, TokenBucket, parse_retry_after,
+                                   redact, request_api_key)
+
+# Clock that only moves when a test advances it, so no test has to sleep
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(AgnirvaNASAHttpClient, 'time',
+                        SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep, time=time.time))
+    return clock
+
+def test_bucket_allows_a_burst_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=5)
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.now == 1000.0
+
+def test_bucket_waits_for_tokens_after_the_burst(clock):
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now == pytest.approx(1001.0)
+
+def test_bucket_refills_up_to_capacity_only(clock):
+    bucket = TokenBucket(rate=1.0, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    clock.now += 100
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now == 1100.0
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(max_wait=0.5)
+
+def test_bucket_raises_instead_of_waiting_too_long(clock):
+    bucket = TokenBucket(rate=0.1, capacity=1)
+    bucket.acquire()
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(max_wait=5)
+    assert clock.now == 1000.0
+
+def test_pause_holds_requests_back(clock):
+    bucket = TokenBucket(rate=10.0, capacity=10)
+    bucket.pause(30)
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(max_wait=10)
+    bucket.acquire(max_wait=60)
+    assert clock.now >= 1030.0
+
+def test_observe_spreads_the_remaining_allowance_over_the_hour(clock):
+    bucket = TokenBucket(rate=1000 / 3600, capacity=100)
+    bucket.observe(36)
+    assert bucket.tokens == 36
+    assert bucket.rate == pytest.approx(36 / 3600)
+
+def test_observe_never_raises_the_rate_above_the_base(clock):
+    bucket = TokenBucket(rate=1.0, capacity=10)
+    bucket.observe(10000)
+    assert bucket.rate == 1.0
+    assert bucket.tokens == 10
+
+def test_observe_with_nothing_left_keeps_a_trickle(clock):
+    bucket = TokenBucket(rate=1.0, capacity=10)
+    bucket.observe(0)
+    assert bucket.tokens == 0
+    assert bucket.rate == pytest.approx(1 / 3600)
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(max_wait=60)
+
+def test_each_api_key_gets_its_own_bucket():
+    client = NASAHttpClient()
+    try:
+        first = client.bucket('api.nasa.gov', 'key-one')
+        assert client.bucket('api.nasa.gov', 'key-one') is first
+        assert client.bucket('api.nasa.gov', 'key-two') is not first
+        assert (first.base_rate, first.capacity) == (1000 / 3600, 100)
+    finally:
+        client.close()
+
+def test_demo_key_gets_its_smaller_allowance():
+    client = NASAHttpClient()
+    try:
+        demo = client.bucket('api.nasa.gov', 'DEMO_KEY')
+        assert (demo.base_rate, demo.capacity) == (30 / 3600, 30)
+        jpl = client.bucket('ssd-api.jpl.nasa.gov')
+        assert (jpl.base_rate, jpl.capacity) == (4.0, 8)
+        other = client.bucket('example.org')
+        assert (other.base_rate, other.capacity) == AgnirvaNASAHttpClient.DEFAULT_RATE_LIMIT
+    finally:
+        client.close()
+
+def test_request_api_key_reads_params_then_url():
+    url = 'https://api.nasa.gov/DONKI/FLR?api_key=from-url&startDate=2024-01-01'
+    assert request_api_key(url, {'api_key': 'from-params'}) == 'from-params'
+    assert request_api_key(url) == 'from-url'
+    assert request_api_key('https://ssd-api.jpl.nasa.gov/cad.api', {'body': 'Earth'}) is None
+
+def test_redact_masks_api_keys():
+    message = "404 for url: https://api.nasa.gov/DONKI/FLR?startDate=2024-01-01&api_key=secret123&x=1"
+    assert 'secret123' not in redact(message)
+    assert 'api_key=REDACTED&x=1' in redact(message)
+
+def test_parse_retry_after_accepts_seconds_and_dates():
+    assert parse_retry_after('12') == 12.0
+    assert parse_retry_after('-3') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
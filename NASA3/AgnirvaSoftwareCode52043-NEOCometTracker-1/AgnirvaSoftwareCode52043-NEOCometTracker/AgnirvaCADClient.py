@@ -0,0 +1,454 @@
+# Requests, caching and parsing for JPL's SBDB Close-Approach Data (CAD) API. Nothing here
+# touches Streamlit, so the tracker app, the alert daemon and the benchmarks share it.
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Modules shared by the Agnirva apps live in the AgnirvaCommon folder at the top of the
+# repository. Set AGNIRVA_COMMON to use a copy somewhere else.
+AGNIRVA_COMMON = os.environ.get('AGNIRVA_COMMON', os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir, 'AgnirvaCommon')))
+if AGNIRVA_COMMON not in sys.path:
+    sys.path.append(AGNIRVA_COMMON)
+
+from AgnirvaNASAHttpClient import NASAHttpClient, SingleFlight
+
+try:
+    import orjson
+except ImportError:  # optional, faster JSON decoding
+    orjson = None
+
+# Mapping of display names to API body codes
+BODY_CODES = {
+    'Mercury': 'Merc',
+    'Venus': 'Venus',
+    'Earth': 'Earth',
+    'Mars': 'Mars',
+    'Jupiter': 'Juptr',
+    'Saturn': 'Satrn',
+    'Uranus': 'Urnus',
+    'Neptune': 'Neptn',
+    'Moon': 'Moon'
+}
+
+CAD_API_URL = 'https://ssd-api.jpl.nasa.gov/cad.api'
+
+# Upper bound on concurrent CAD requests (and pooled connections) for batch fetches
+CAD_MAX_WORKERS = 8
+
+# Connect and read timeouts for CAD requests, in seconds
+CAD_TIMEOUT = (10, 60)
+
+# Seconds a cached CAD result is served as is; older results are still served right away
+# but refreshed in the background
+CAD_REFRESH_AFTER = 1800
+
+# Row limit requested per date window during sharded ingestion
+CAD_WINDOW_LIMIT = 1000
+
+# Largest row limit asked for a window too short to be split any further
+CAD_MAX_WINDOW_LIMIT = 100000
+
+# Significant digits of the distances sent to the CAD API
+CAD_DIST_DIGITS = 10
+
+# Column types of the CAD API fields. 'des' and friends repeat a lot across rows and bodies,
+# so they are decoded as categoricals; unknown fields are kept as strings.
+CAD_FIELD_TYPES = {
+    'des': 'category',
+    'orbit_id': 'category',
+    'jd': 'float64',
+    'cd': 'datetime64[ns]',
+    'dist': 'float64',
+    'dist_min': 'float64',
+    'dist_max': 'float64',
+    'v_rel': 'float64',
+    'v_inf': 'float64',
+    't_sigma_f': 'category',
+    'h': 'float64',
+    'diameter': 'float64',
+    'diameter_sigma': 'float64',
+    'fullname': 'string',
+    'body': 'category',
+}
+
+# Distance units accepted by the CAD API, expressed in AU (the unit of the 'dist' field)
+DIST_UNITS_IN_AU = {
+    'AU': 1.0,
+    'LD': 0.00256955529,
+}
+
+# Function to format a distance in AU for the CAD API with a fixed number of significant
+# digits, so unit conversions don't send values like 0.025695552900000002
+def format_au(value):
+    return f"{float(value):.{CAD_DIST_DIGITS}g}"
+
+# Function to turn CAD request parameters into a comparable query description.
+# Relative dates ('now', '+60') are resolved so that the same query can be matched
+# against cached results later on: 'now' is rounded down to the hour and '+N' up to the
+# end of its day, so repeated default queries are covered by an earlier cached one for
+# the rest of the day. Returns None if the parameters can't be normalized.
+def normalize_cad_query(body_code='Earth', date_min='now', date_max='+60', dist_max='0.05',
+                        dist_unit='AU', limit=100, object_type='NEO'):
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    def resolve_date(value, base):
+        value = str(value).strip()
+        if value == 'now':
+            return now
+        if value.startswith('+'):
+            target = base + timedelta(days=int(value[1:]))
+            day = datetime.combine(target.date(), datetime.min.time())
+            return day if day == target else day + timedelta(days=1)
+        for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+        raise ValueError(f"Unrecognized date: {value}")
+
+    try:
+        start = resolve_date(date_min, now)
+        end = resolve_date(date_max, now)
+        dist_max_au = float(format_au(float(dist_max) * DIST_UNITS_IN_AU[dist_unit]))
+        limit = int(limit)
+    except (ValueError, KeyError):
+        return None
+
+    return {
+        'body': body_code,
+        'object_type': object_type if object_type in ('NEO', 'Comet') else 'Both',
+        'date_min': start,
+        'date_max': end,
+        'dist_max_au': dist_max_au,
+        'limit': limit,
+    }
+
+# Function to build the CAD API parameters for a normalized query
+def cad_params_for_query(query):
+    params = {
+        'body': query['body'],
+        'date-min': query['date_min'].strftime('%Y-%m-%dT%H:%M:%S'),
+        'date-max': query['date_max'].strftime('%Y-%m-%dT%H:%M:%S'),
+        'dist-max': f"{format_au(query['dist_max_au'])}AU",
+        'limit': query['limit']
+    }
+
+    if query['object_type'] == 'NEO':
+        params['neo'] = 'true'
+    elif query['object_type'] == 'Comet':
+        params['comet'] = 'true'
+
+    return params
+
+# Result cache for CAD queries. A query is answered locally whenever an earlier, broader
+# query (same body and object type, wider date window, larger distance, same or higher
+# limit) is cached, by filtering the cached rows. Entries are evicted least recently used
+# first once the cache holds more than max_entries queries or max_rows rows. Each entry
+# remembers when it was fetched so callers can decide when to refresh it.
+class CADQueryCache:
+    def __init__(self, max_entries=64, max_rows=200000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._total_rows = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query):
+        return (query['body'], query['object_type'], query['date_min'], query['date_max'],
+                query['dist_max_au'], query['limit'])
+
+    def get(self, query):
+        return self.lookup(query)[0]
+
+    # Function to answer a query from the cache, returning the data and the time the entry
+    # it came from was fetched, or (None, None)
+    def lookup(self, query):
+        with self._lock:
+            key = self._key(query)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry['data'], entry['fetched_at']
+
+            for key, entry in reversed(self._entries.items()):
+                data = self._answer_from(entry, query)
+                if data is not None:
+                    self._entries.move_to_end(key)
+                    return data, entry['fetched_at']
+        return None, None
+
+    def put(self, query, data):
+        records = data.get('data') or []
+        fields = data.get('fields') or []
+        if records and not {'cd', 'dist'}.issubset(fields):
+            return
+
+        cd_index = fields.index('cd') if records else 0
+        dist_index = fields.index('dist') if records else 0
+        entry = {
+            'query': query,
+            'data': data,
+            'cd': pd.to_datetime([row[cd_index] for row in records], format='%Y-%b-%d %H:%M').values,
+            'dist': np.array([row[dist_index] for row in records], dtype=float),
+            # CAD returns rows sorted by date, so a response that filled the limit covers
+            # the requested window only up to its last close-approach date
+            'truncated': len(records) >= query['limit'],
+            'fetched_at': time.time(),
+        }
+
+        with self._lock:
+            key = self._key(query)
+            if key in self._entries:
+                self._total_rows -= len(self._entries.pop(key)['cd'])
+            self._entries[key] = entry
+            self._total_rows += len(records)
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._total_rows > self.max_rows):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_rows -= len(evicted['cd'])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_rows = 0
+
+    @staticmethod
+    def _answer_from(entry, query):
+        cached = entry['query']
+        if (cached['body'] != query['body']
+                or cached['object_type'] != query['object_type']
+                or cached['date_min'] > query['date_min']
+                or cached['date_max'] < query['date_max']
+                or cached['dist_max_au'] < query['dist_max_au']):
+            return None
+
+        mask = ((entry['cd'] >= np.datetime64(query['date_min']))
+                & (entry['cd'] <= np.datetime64(query['date_max']))
+                & (entry['dist'] <= query['dist_max_au']))
+
+        if entry['truncated']:
+            if len(entry['cd']) == 0:
+                return None
+            last_cd = entry['cd'][-1]
+            mask &= entry['cd'] < last_cd
+            if np.datetime64(query['date_max']) >= last_cd and mask.sum() < query['limit']:
+                return None
+
+        indices = np.flatnonzero(mask)[:query['limit']]
+        records = entry['data'].get('data') or []
+        data = dict(entry['data'])
+        data['data'] = [records[i] for i in indices]
+        data['count'] = str(len(indices))
+        return data
+
+# Function to decode a JSON response body, using orjson when it's installed
+def decode_json(content):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+# Function to send one CAD request and cache its decoded response. Another session may have
+# finished the same request while this one waited, so the cache is checked again first and
+# used if it's no older than max_age seconds.
+def send_cad_request(params, session, cache=None, query=None, max_age=None):
+    if cache is not None:
+        cached, fetched_at = cache.lookup(query)
+        if cached is not None and (max_age is None or time.time() - fetched_at < max_age):
+            return cached
+    response = session.get(CAD_API_URL, params=params, timeout=CAD_TIMEOUT)
+    response.raise_for_status()
+    data = decode_json(response.content)
+    if cache is not None:
+        cache.put(query, data)
+    return data
+
+# Function to request close approach data, raising requests exceptions on failure.
+# Results are looked up in cache first, when one is given. Cached results are returned right
+# away; once they are older than CAD_REFRESH_AFTER a background refresh is started on
+# refresher, if given, and the old result is kept if it fails. Callers that send more than
+# one request should pass a shared session and single-flight group; without them a new
+# client is made for the call.
+def request_close_approaches(body_code='Earth', date_min='now', date_max='+60', dist_max='0.05',
+                             dist_unit='AU', limit=100, object_type='NEO', use_cache=True,
+                             session=None, cache=None, flights=None, refresher=None):
+    query = normalize_cad_query(body_code, date_min, date_max, dist_max, dist_unit, limit, object_type)
+    if not use_cache or query is None:
+        cache = None
+    session = session or NASAHttpClient(pool_size=CAD_MAX_WORKERS)
+    flights = flights or SingleFlight()
+
+    if cache is not None:
+        params = cad_params_for_query(query)
+        key = tuple(sorted(params.items()))
+        cached, fetched_at = cache.lookup(query)
+        if cached is not None:
+            if refresher is not None and time.time() - fetched_at >= CAD_REFRESH_AFTER:
+                refresher.submit(key, flights.do, key, send_cad_request, params, session, cache,
+                                 query, CAD_REFRESH_AFTER)
+            return cached
+    else:
+        params = {
+            'body': body_code,
+            'date-min': date_min,
+            'date-max': date_max,
+            'dist-max': f"{dist_max}{dist_unit}",
+            'limit': limit
+        }
+
+        if object_type == 'NEO':
+            params['neo'] = 'true'
+        elif object_type == 'Comet':
+            params['comet'] = 'true'
+
+    # Concurrent identical requests share one upstream call and its decoded result
+    key = tuple(sorted(params.items()))
+    return flights.do(key, send_cad_request, params, session, cache, query)
+
+# Function to split [start, end] into consecutive windows of window_days days
+def split_date_windows(start, end, window_days):
+    windows = []
+    step = timedelta(days=window_days)
+    while start < end:
+        windows.append((start, min(start + step, end)))
+        start += step
+    return windows
+
+# Function to ingest a long date range window by window, past the per-request row limit.
+# Up to max_workers windows are fetched at a time over session, answering from cache when
+# one is given; a window that fills window_limit is split in half and fetched again. A
+# window of min_window or less that still fills its limit is fetched again with ten times
+# the limit, up to max_window_limit. Each completed window is parsed and yielded as soon as
+# it arrives; a window that is still full at max_window_limit is yielded with
+# attrs['truncated'] set to (start, end, limit). Raises requests exceptions if a window
+# can't be fetched.
+def iter_close_approach_windows(body_code='Earth', date_min='now', date_max='+60', dist_max='0.05',
+                                dist_unit='AU', object_type='NEO', window_days=365,
+                                window_limit=CAD_WINDOW_LIMIT, max_workers=4,
+                                min_window=timedelta(hours=1), max_window_limit=CAD_MAX_WINDOW_LIMIT,
+                                session=None, cache=None, flights=None, refresher=None):
+    query = normalize_cad_query(body_code, date_min, date_max, dist_max, dist_unit,
+                                window_limit, object_type)
+    if query is None:
+        raise ValueError("Invalid close approach query parameters.")
+
+    # Resolved here rather than in the workers, so every window shares them
+    session = session or NASAHttpClient(pool_size=max_workers)
+    flights = flights or SingleFlight()
+
+    def fetch_window(start, end, limit):
+        return request_close_approaches(
+            body_code,
+            start.strftime('%Y-%m-%dT%H:%M:%S'),
+            end.strftime('%Y-%m-%dT%H:%M:%S'),
+            dist_max, dist_unit, limit, object_type,
+            session=session, cache=cache, flights=flights, refresher=refresher
+        )
+
+    pending = deque((start, end, window_limit) for start, end in
+                    split_date_windows(query['date_min'], query['date_max'], window_days))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            while pending and len(running) < max_workers:
+                window = pending.popleft()
+                running[executor.submit(fetch_window, *window)] = window
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, end, limit = running.pop(future)
+                data = future.result()
+                records = data.get('data') or []
+
+                if len(records) >= limit and end - start > min_window:
+                    middle = start + (end - start) / 2
+                    pending.appendleft((middle, end, window_limit))
+                    pending.appendleft((start, middle, window_limit))
+                elif len(records) >= limit and limit < max_window_limit:
+                    pending.appendleft((start, end, min(limit * 10, max_window_limit)))
+                elif records:
+                    fd = parse_cad_payload(data)
+                    if len(records) >= limit:
+                        fd.attrs['truncated'] = (start, end, limit)
+                    yield fd
+
+# Function to merge close approach frames, keeping one row per (des, cd, body)
+def merge_close_approaches(frames):
+    frames = [fd for fd in frames if not fd.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    fd = pd.concat(frames, ignore_index=True)
+    keys = [col for col in ('des', 'cd', 'body') if col in fd.columns]
+    fd = fd.drop_duplicates(subset=keys, ignore_index=True)
+
+    # Categories differ between frames, so concat falls back to plain strings
+    categorical = [col for col in fd.columns if CAD_FIELD_TYPES.get(col) == 'category']
+    return fd.astype({col: 'category' for col in categorical})
+
+# Month abbreviations of CAD dates ('2024-Jan-05 12:34') keyed by their three ASCII bytes
+CAD_MONTH_KEYS = np.array(sorted(
+    (ord(name[0]) << 16 | ord(name[1]) << 8 | ord(name[2]), number)
+    for number, name in enumerate(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                                   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], start=1)
+))
+
+# Function to decode CAD close-approach dates. The format is fixed width, so the digits are
+# read straight out of the byte buffer instead of going through strptime row by row.
+def decode_cad_dates(values):
+    raw = np.array(values, dtype='S')
+    if raw.size == 0 or raw.dtype.itemsize != 17 or (np.char.str_len(raw) != 17).any():
+        return pd.to_datetime(np.array(values, dtype=object), format='%Y-%b-%d %H:%M').values.astype('datetime64[ns]')
+
+    chars = raw.view(np.uint8).reshape(-1, 17).astype(np.int64)
+    digits = chars - ord('0')
+    month_key = chars[:, 5] << 16 | chars[:, 6] << 8 | chars[:, 7]
+    position = np.minimum(np.searchsorted(CAD_MONTH_KEYS[:, 0], month_key), len(CAD_MONTH_KEYS) - 1)
+    if (CAD_MONTH_KEYS[position, 0] != month_key).any():
+        raise ValueError("Unrecognized month in close-approach dates.")
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    months = ((year - 1970) * 12 + CAD_MONTH_KEYS[position, 1] - 1).astype('datetime64[M]')
+    return (months.astype('datetime64[ns]')
+            + (digits[:, 9] * 10 + digits[:, 10] - 1).astype('timedelta64[D]')
+            + (digits[:, 12] * 10 + digits[:, 13]).astype('timedelta64[h]')
+            + (digits[:, 15] * 10 + digits[:, 16]).astype('timedelta64[m]'))
+
+# Function to decode one column of CAD values into a typed array
+def decode_cad_column(values, dtype):
+    if dtype == 'float64':
+        column = np.array(values, dtype=object)
+        column[np.equal(column, None)] = np.nan
+        return column.astype(np.float64)
+    if dtype == 'datetime64[ns]':
+        return decode_cad_dates(values)
+    if dtype == 'category':
+        return pd.Categorical(values)
+    return pd.array(values, dtype='string')
+
+# Function to parse a CAD payload into a DataFrame with one typed column per field. The
+# row-oriented 'data' list is loaded into a single 2-D array and each column decoded in
+# one pass.
+def parse_cad_payload(data):
+    fields = data.get('fields', [])
+    records = data.get('data') or []
+
+    table = np.array(records, dtype=object)
+    if table.ndim == 2 and table.shape[1] == len(fields):
+        columns = table.T
+    else:
+        columns = [[row[i] for row in records] for i in range(len(fields))]
+
+    return pd.DataFrame({
+        name: decode_cad_column(values, CAD_FIELD_TYPES.get(name, 'string'))
+        for name, values in zip(fields, columns)
+    }, columns=fields)
@@ -0,0 +1,81 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from AgnirvaCADClient import decode_json, parse_cad_payload, orjson
+
+CAD_FIELDS = ['des', 'orbit_id', 'jd', 'cd', 'dist', 'dist_min', 'dist_max', 'v_rel',
+              'v_inf', 't_sigma_f', 'h']
+
+# The original parse_data, kept here (without the Streamlit warning) as the baseline
+def legacy_parse_data(data):
+    fields = data.get('fields', [])
+    records = data.get('data', [])
+    fd = pd.DataFrame(records, columns=fields)
+
+    fd['cd'] = pd.to_datetime(fd['cd'], format='%Y-%b-%d %H:%M')
+    fd['dist'] = pd.to_numeric(fd['dist'], errors='coerce')
+    fd['v_rel'] = pd.to_numeric(fd['v_rel'], errors='coerce')
+    fd['v_inf'] = pd.to_numeric(fd['v_inf'], errors='coerce')
+
+    return fd
+
+# Function to build a CAD-shaped JSON payload with random close approaches
+def make_payload(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.to_datetime(
+        np.sort(rng.integers(pd.Timestamp('1950-01-01').value, pd.Timestamp('2100-01-01').value, rows))
+    ).strftime('%Y-%b-%d %H:%M')
+    designations = [f"{2000 + i % 25} {chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{i % 500}"
+                    for i in rng.integers(0, rows // 4 + 1, rows)]
+    dist = rng.uniform(0.0001, 0.05, rows)
+
+    records = [
+        [des, str(1 + i % 40), f"{2433282.5 + i * 0.1:.9f}", cd, f"{d:.16f}", f"{d * 0.99:.16f}",
+         f"{d * 1.01:.16f}", f"{rng_v:.13f}", None if i % 7 == 0 else f"{rng_v * 0.98:.13f}",
+         '< 00:01', None if i % 11 == 0 else f"{18 + (i % 120) / 10:.1f}"]
+        for i, (des, cd, d, rng_v) in enumerate(zip(designations, dates, dist, rng.uniform(1, 40, rows)))
+    ]
+    payload = {
+        'signature': {'source': 'NASA/JPL SBDB Close Approach Data API', 'version': '1.5'},
+        'count': str(rows),
+        'fields': CAD_FIELDS,
+        'data': records,
+    }
+    return json.dumps(payload).encode('utf-8')
+
+# Function to time a callable, returning the best of several runs in milliseconds
+def best_of(func, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CAD response parsing.")
+    parser.add_argument('--rows', type=int, default=100000, help="Rows in the synthetic payload.")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement.")
+    args = parser.parse_args()
+
+    content = make_payload(args.rows)
+    data = json.loads(content)
+
+    legacy = legacy_parse_data(data)
+    typed = parse_cad_payload(data)
+
+    print(f"Payload: {args.rows} rows, {len(content) / 1e6:.1f} MB")
+    print(f"json.loads:           {best_of(json.loads, content, args.repeat):8.1f} ms")
+    if orjson is not None:
+        print(f"orjson.loads:         {best_of(decode_json, content, args.repeat):8.1f} ms")
+    print(f"legacy parse_data:    {best_of(legacy_parse_data, data, args.repeat):8.1f} ms, "
+          f"{legacy.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+    print(f"parse_cad_payload:    {best_of(parse_cad_payload, data, args.repeat):8.1f} ms, "
+          f"{typed.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+# Local on-disk catalog of close approaches, synced window by window from the CAD API
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from AgnirvaCADClient import CAD_FIELD_TYPES, format_au, iter_close_approach_windows
+
+# Location of the local close approach catalog
+CATALOG_PATH = os.environ.get(
+    'AGNIRVA_CAD_CATALOG',
+    os.path.join(os.path.expanduser('~'), '.agnirva', 'close_approaches.sqlite')
+)
+
+# How long synced windows reaching past their sync time are trusted before being refetched
+CATALOG_FUTURE_TTL = timedelta(hours=24)
+
+# Local on-disk catalog of close approaches (SQLite). Rows are stored per body and object
+# type and indexed on close-approach date, and a ledger records which date windows have
+# been synced completely and up to which distance. Queries only fetch the windows missing
+# from the ledger and answer everything else from disk.
+class CloseApproachCatalog:
+    COLUMNS = ['des', 'orbit_id', 'jd', 'cd', 'dist', 'dist_min', 'dist_max', 'v_rel',
+               'v_inf', 't_sigma_f', 'h']
+
+    def __init__(self, path=CATALOG_PATH, future_ttl=CATALOG_FUTURE_TTL):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.future_ttl = future_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS close_approaches (
+                    body TEXT NOT NULL,
+                    object_type TEXT NOT NULL,
+                    des TEXT NOT NULL,
+                    orbit_id TEXT,
+                    jd REAL,
+                    cd TEXT NOT NULL,
+                    dist REAL,
+                    dist_min REAL,
+                    dist_max REAL,
+                    v_rel REAL,
+                    v_inf REAL,
+                    t_sigma_f TEXT,
+                    h REAL,
+                    PRIMARY KEY (body, object_type, des, cd)
+                );
+                CREATE INDEX IF NOT EXISTS close_approaches_by_date
+                    ON close_approaches (body, object_type, cd, dist);
+                CREATE TABLE IF NOT EXISTS synced_windows (
+                    body TEXT NOT NULL,
+                    object_type TEXT NOT NULL,
+                    date_min TEXT NOT NULL,
+                    date_max TEXT NOT NULL,
+                    dist_max_au REAL NOT NULL,
+                    synced_at TEXT NOT NULL
+                );
+            """)
+
+    @staticmethod
+    def _timestamp(value):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+
+    # Windows of [start, end] not yet synced for this body, object type and distance
+    def missing_windows(self, body, object_type, start, end, dist_max_au):
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT date_min, date_max, synced_at FROM synced_windows
+                   WHERE body = ? AND object_type = ? AND dist_max_au >= ?
+                     AND date_max >= ? AND date_min <= ?
+                   ORDER BY date_min""",
+                (body, object_type, dist_max_au, self._timestamp(start), self._timestamp(end))
+            ).fetchall()
+
+        now = datetime.now()
+        covered = []
+        for lo, hi, synced_at in rows:
+            lo, hi, synced_at = (datetime.fromisoformat(v) for v in (lo, hi, synced_at))
+            # Approaches after the sync time can still change; trust them only for a while
+            if hi > synced_at and now - synced_at > self.future_ttl:
+                hi = synced_at
+            if hi > lo:
+                covered.append((lo, hi))
+
+        gaps = []
+        cursor = start
+        for lo, hi in sorted(covered):
+            if hi <= cursor:
+                continue
+            if lo > cursor:
+                gaps.append((cursor, min(lo, end)))
+            cursor = hi
+            if cursor >= end:
+                break
+        if cursor < end:
+            gaps.append((cursor, end))
+        return [(lo, hi) for lo, hi in gaps if hi > lo]
+
+    def _insert(self, body, object_type, fd):
+        if fd.empty:
+            return
+        frame = pd.DataFrame({col: fd[col] if col in fd.columns else None for col in self.COLUMNS})
+        frame['cd'] = fd['cd'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(body, object_type, *row) for row in frame.astype(object).where(frame.notna(), None)
+                .itertuples(index=False, name=None)]
+        columns = ', '.join(['body', 'object_type'] + self.COLUMNS)
+        placeholders = ', '.join('?' * (len(self.COLUMNS) + 2))
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO close_approaches ({columns}) VALUES ({placeholders})", rows
+        )
+
+    def store(self, body, object_type, fd, replace=None):
+        with self._lock, self._conn:
+            # replace=(start, end, dist_max_au) drops the approaches held for that window
+            # first, in the same transaction, so approaches whose date moved after an orbit
+            # update don't stay behind next to their new date
+            if replace is not None:
+                start, end, dist_max_au = replace
+                self._conn.execute(
+                    """DELETE FROM close_approaches
+                       WHERE body = ? AND object_type = ? AND cd BETWEEN ? AND ? AND dist <= ?""",
+                    (body, object_type, self._timestamp(start), self._timestamp(end), dist_max_au)
+                )
+            self._insert(body, object_type, fd)
+
+    def mark_synced(self, body, object_type, start, end, dist_max_au):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO synced_windows VALUES (?, ?, ?, ?, ?, ?)",
+                (body, object_type, self._timestamp(start), self._timestamp(end), dist_max_au,
+                 self._timestamp(datetime.now()))
+            )
+
+    # Close approaches held locally, with the date and distance filters run by SQLite
+    def query(self, body, object_type, start, end, dist_max_au, limit=None):
+        sql = f"""SELECT {', '.join(self.COLUMNS)} FROM close_approaches
+                  WHERE body = ? AND object_type = ? AND cd BETWEEN ? AND ? AND dist <= ?
+                  ORDER BY cd"""
+        params = [body, object_type, self._timestamp(start), self._timestamp(end), dist_max_au]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            fd = pd.read_sql_query(sql, self._conn, params=params)
+        fd['cd'] = pd.to_datetime(fd['cd'], format='%Y-%m-%d %H:%M:%S')
+        return fd.astype({col: CAD_FIELD_TYPES[col] for col in self.COLUMNS})
+
+    # Fetch the missing windows of a query from the CAD API into the catalog. Raises
+    # requests exceptions if the upstream can't be reached; windows synced before the
+    # failure are kept. Windows reaching into the future may have been synced before and
+    # expired, so they are fetched completely and then replace what the catalog holds.
+    # Keyword arguments (session, cache, ...) go to iter_close_approach_windows. Returns
+    # the (start, end, limit) of every window that was still cut off at its row limit.
+    def sync(self, body, object_type, start, end, dist_max_au, **fetch_options):
+        truncated = []
+        for lo, hi in self.missing_windows(body, object_type, start, end, dist_max_au):
+            frames = iter_close_approach_windows(
+                body, lo.strftime('%Y-%m-%dT%H:%M:%S'), hi.strftime('%Y-%m-%dT%H:%M:%S'),
+                format_au(dist_max_au), 'AU', object_type, **fetch_options)
+            if hi > datetime.now():
+                frames = list(frames)
+                truncated.extend(fd.attrs['truncated'] for fd in frames if 'truncated' in fd.attrs)
+                fd = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+                self.store(body, object_type, fd, replace=(lo, hi, dist_max_au))
+            else:
+                for fd in frames:
+                    if 'truncated' in fd.attrs:
+                        truncated.append(fd.attrs['truncated'])
+                    self.store(body, object_type, fd)
+            self.mark_synced(body, object_type, lo, hi, dist_max_au)
+        return truncated
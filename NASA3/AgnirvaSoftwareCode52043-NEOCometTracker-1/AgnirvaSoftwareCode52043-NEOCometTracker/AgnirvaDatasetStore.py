@@ -0,0 +1,129 @@
+# Close approach datasets shared between sessions, compactly typed and kept once per query,
+# and the bookkeeping behind the memory-per-session metric. Nothing here touches Streamlit.
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from AgnirvaCADClient import CAD_FIELD_TYPES
+
+# Column types of the datasets shared between sessions. Distances, velocities and sizes
+# carry fewer significant digits than float32 holds, so they are stored at half the size;
+# jd stays float64 since float32 would round Julian dates to a quarter of a day.
+CAD_COMPACT_TYPES = {
+    **CAD_FIELD_TYPES,
+    'dist': 'float32',
+    'dist_min': 'float32',
+    'dist_max': 'float32',
+    'v_rel': 'float32',
+    'v_inf': 'float32',
+    'h': 'float32',
+    'diameter': 'float32',
+    'diameter_sigma': 'float32',
+    'fullname': 'category',
+}
+
+# Memory the shared close approach datasets may use before the least recently used is dropped
+DATASET_STORE_MAX_BYTES = 256 * 1024 ** 2
+# Seconds without a rerun after which a session no longer counts as active
+SESSION_IDLE_AFTER = 900
+
+# Function to fingerprint a DataFrame's contents, so artifacts derived from it can be cached
+# across reruns without hashing the frame every time
+def frame_fingerprint(fd):
+    digest = hashlib.sha1()
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in fd.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(fd, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+# Function to convert a close approach frame to the compact column types of the shared store
+def compact_close_approaches(fd):
+    types = {col: CAD_COMPACT_TYPES[col] for col in fd.columns
+             if col in CAD_COMPACT_TYPES and str(fd[col].dtype) != CAD_COMPACT_TYPES[col]}
+    return fd.astype(types) if types else fd
+
+# Close approach datasets shared by every session. Each dataset is kept once, compactly
+# typed and keyed by its fingerprint, so sessions that ran the same query share one frame
+# and only hold its key. Datasets are dropped least recently used first once the store
+# holds more than max_bytes; a session whose dataset was dropped loads it again from its
+# query. Frames handed out are shared and must not be modified.
+class DatasetStore:
+    def __init__(self, max_bytes=DATASET_STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    # Function to add a dataset, returning the fingerprint it is shared under
+    def put(self, fd):
+        fd = compact_close_approaches(fd)
+        fingerprint = frame_fingerprint(fd)
+        size = int(fd.memory_usage(index=True, deep=True).sum())
+
+        with self._lock:
+            if fingerprint in self._entries:
+                self._entries.move_to_end(fingerprint)
+                return fingerprint
+            self._entries[fingerprint] = (fd, size)
+            self._total_bytes += size
+            # Always keep the newest dataset, even when it alone is over the limit
+            while len(self._entries) > 1 and self._total_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted
+        return fingerprint
+
+    def get(self, fingerprint):
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                return None
+            self._entries.move_to_end(fingerprint)
+            return entry[0]
+
+    # Function to report the size of each stored dataset by fingerprint
+    def sizes(self):
+        with self._lock:
+            return {fingerprint: size for fingerprint, (_, size) in self._entries.items()}
+
+# Function to estimate the memory held by a session state value, following containers
+def estimate_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+# Function to format a byte count for display
+def format_size(num_bytes):
+    for unit in ['B', 'KB', 'MB']:
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f} GB"
+
+# Sessions that reran recently, with the dataset each one references and the size of its
+# own session state, for the memory-per-session metric
+class SessionRegistry:
+    def __init__(self, idle_after=SESSION_IDLE_AFTER):
+        self.idle_after = idle_after
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id, fingerprint, state_bytes):
+        with self._lock:
+            self._sessions[session_id] = (time.time(), fingerprint, state_bytes)
+
+    # Function to list the active sessions as (fingerprint, state bytes), forgetting idle ones
+    def active(self):
+        cutoff = time.time() - self.idle_after
+        with self._lock:
+            for session_id in [sid for sid, (seen, _, _) in self._sessions.items() if seen < cutoff]:
+                del self._sessions[session_id]
+            return [(fingerprint, state_bytes) for _, fingerprint, state_bytes in self._sessions.values()]
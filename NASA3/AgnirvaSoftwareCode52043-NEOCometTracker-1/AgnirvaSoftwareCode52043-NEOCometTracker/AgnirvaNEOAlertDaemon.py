@@ -0,0 +1,159 @@
+import argparse
+import heapq
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import requests
+
+from AgnirvaCADClient import BODY_CODES, format_au, parse_cad_payload, request_close_approaches
+from AgnirvaNASAHttpClient import NASAHttpClient
+from AgnirvaNEOAlerts import AlertSubscriptionIndex, EmailOutbox, format_notification_email
+
+logger = logging.getLogger('agnirva.neo_alerts')
+
+# Defaults for watch entries in the configuration file
+WATCH_DEFAULTS = {
+    'object_type': 'NEO',
+    'days_ahead': 60,
+    'limit': 1000,
+    'interval_minutes': 60,
+}
+
+# Function to load the polled bodies and the subscriptions. The configuration file looks like:
+#   {"watches": [{"body": "Earth", "interval_minutes": 30}],
+#    "subscribers": [{"email": "ops@example.com",
+#                     "thresholds": {"Earth": {"dist_max_au": 0.01, "v_rel_min": 15}}}]}
+# A watch may also carry its own "email" and "threshold_au", which adds a subscription.
+def load_config(path):
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    subscriptions = AlertSubscriptionIndex.from_config(config.get('subscribers', []))
+    watches = []
+    for entry in config.get('watches', []):
+        if entry.get('body') not in BODY_CODES:
+            raise ValueError(f"Unknown body in watch list: {entry.get('body')}")
+        if entry.get('email'):
+            subscriptions.add(entry['email'], entry['body'], entry.get('threshold_au', 0.02))
+        watches.append({**WATCH_DEFAULTS, **entry})
+
+    unknown = set(subscriptions.bodies()) - set(BODY_CODES)
+    if unknown:
+        raise ValueError(f"Unknown bodies in subscriptions: {', '.join(sorted(unknown))}")
+    return watches, subscriptions
+
+# Alerts already sent, kept on disk so restarts don't resend them
+class AlertState:
+    def __init__(self, path):
+        self.path = path
+        self.notified = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.notified = {tuple(key) for key in json.load(f).get('notified', [])}
+
+    def save(self):
+        # Approaches that are already in the past can't alert again
+        now = datetime.now().strftime('%Y-%m-%d %H:%M')
+        self.notified = {key for key in self.notified if key[3] >= now}
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'notified': sorted(self.notified)}, f)
+        os.replace(tmp_path, self.path)
+
+# Function to poll the CAD API for one watched body and alert every subscriber with new
+# matching close approaches over session. Returns the number of alert emails queued.
+def poll_watch(watch, subscriptions, state, outbox, session):
+    body = watch['body']
+    dist_max = subscriptions.max_distance(body)
+    if dist_max is None:
+        return 0
+
+    data = request_close_approaches(
+        body_code=BODY_CODES[body],
+        date_min='now',
+        date_max=f"+{watch['days_ahead']}",
+        dist_max=format_au(dist_max),
+        dist_unit='AU',
+        limit=watch['limit'],
+        object_type=watch['object_type'],
+        use_cache=False,
+        session=session
+    )
+    if not data or not data.get('data'):
+        return 0
+
+    fd = parse_cad_payload(data)
+    fd = fd[fd['cd'] > datetime.now()].reset_index(drop=True)
+
+    sent = 0
+    for subscriber, positions in subscriptions.match(fd, body, state.notified).items():
+        new_approaches = fd.iloc[positions]
+        threshold = subscriptions.get(subscriber, body)['dist_max_au']
+        subject, message = format_notification_email(new_approaches, body, threshold)
+        if not outbox.enqueue(subscriber, subject, message):
+            logger.error("Outbox full, dropping alert for %s to %s", body, subscriber)
+            continue
+
+        state.notified.update(AlertSubscriptionIndex.alert_key(subscriber, body, row.des, row.cd)
+                              for row in new_approaches.itertuples())
+        sent += 1
+
+    if sent:
+        state.save()
+    return sent
+
+# Function to run every watch on its own cadence until interrupted (or once with run_once)
+def run(watches, subscriptions, state, outbox, run_once=False):
+    # One client for every poll, so they share its connections and rate limit
+    session = NASAHttpClient()
+    schedule = [(time.monotonic(), i) for i in range(len(watches))]
+    heapq.heapify(schedule)
+
+    while schedule:
+        due, i = heapq.heappop(schedule)
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        watch = watches[i]
+        try:
+            sent = poll_watch(watch, subscriptions, state, outbox, session)
+            if sent:
+                logger.info("Queued %d alert(s) for %s", sent, watch['body'])
+        except requests.exceptions.RequestException as e:
+            logger.warning("Could not poll CAD for %s: %s", watch['body'], e)
+        except Exception:
+            logger.exception("Polling %s failed", watch['body'])
+
+        if not run_once:
+            heapq.heappush(schedule, (due + watch['interval_minutes'] * 60, i))
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll the CAD API and email close approach alerts.")
+    parser.add_argument('--config', required=True,
+                        help="JSON file with the watched bodies and subscribers.")
+    parser.add_argument('--state', default='neo_alert_state.json',
+                        help="JSON file recording alerts already sent.")
+    parser.add_argument('--outbox', default='neo_alert_outbox.sqlite',
+                        help="SQLite file holding alert emails waiting to be delivered.")
+    parser.add_argument('--once', action='store_true',
+                        help="Poll every watch once, deliver the alerts and exit.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    watches, subscriptions = load_config(args.config)
+    outbox = EmailOutbox(args.outbox)
+    outbox.start()
+    try:
+        run(watches, subscriptions, AlertState(args.state), outbox, run_once=args.once)
+        if args.once and not outbox.flush(timeout=120):
+            logger.warning("%d alert(s) still queued in %s", outbox.pending(), args.outbox)
+    finally:
+        outbox.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+# Close approach alert emails: the subscription index that matches approaches to
+# subscribers, the message format and the persistent outbox that delivers them. Shared by
+# the tracker app and the alert daemon, without Streamlit.
+import logging
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import numpy as np
+
+# Outgoing mail server settings, overridable through environment variables
+SMTP_SETTINGS = {
+    'server': os.environ.get('AGNIRVA_SMTP_SERVER', 'smtp.example.com'),
+    'port': int(os.environ.get('AGNIRVA_SMTP_PORT', '587')),
+    'sender_email': os.environ.get('AGNIRVA_SMTP_SENDER', 'notifications@agnirva.com'),
+    'sender_password': os.environ.get('AGNIRVA_SMTP_PASSWORD', 'your_email_password'),
+    # Plain, unauthenticated connections are for local test servers only
+    'starttls': os.environ.get('AGNIRVA_SMTP_STARTTLS', '1') != '0',
+}
+
+# Location of the persistent queue of outgoing alert emails
+OUTBOX_PATH = os.environ.get(
+    'AGNIRVA_OUTBOX',
+    os.path.join(os.path.expanduser('~'), '.agnirva', 'outbox.sqlite')
+)
+
+# Function to build an alert email message
+def build_email_message(recipient, subject, body, settings=None):
+    settings = settings or SMTP_SETTINGS
+    
+    msg = MIMEMultipart()
+    msg['From'] = settings['sender_email']
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+# Function to open an SMTP connection, upgraded to TLS and logged in as configured
+def connect_smtp(settings=None):
+    settings = settings or SMTP_SETTINGS
+    server = smtplib.SMTP(settings['server'], settings['port'], timeout=30)
+    try:
+        if settings.get('starttls', True):
+            server.starttls()
+        if settings.get('sender_password'):
+            server.login(settings['sender_email'], settings['sender_password'])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+# Function to send an email through the configured SMTP server, raising on failure
+def deliver_email(recipient, subject, body, settings=None):
+    with connect_smtp(settings) as server:
+        server.send_message(build_email_message(recipient, subject, body, settings))
+
+# Persistent, bounded queue of outgoing emails delivered by a background thread. Messages
+# are kept in SQLite until sent, so they survive restarts. The thread keeps one SMTP
+# connection open and reuses it for every message it sends in a batch. Failed messages are
+# retried with jittered exponential backoff and dropped after max_attempts.
+class EmailOutbox:
+    def __init__(self, path=OUTBOX_PATH, settings=None, max_messages=1000, batch_size=20,
+                 max_attempts=6, base_delay=30.0, max_delay=3600.0, idle_timeout=60.0):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.settings = settings or SMTP_SETTINGS
+        self.max_messages = max_messages
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._smtp = None
+        self._last_used = 0.0
+        self._log = logging.getLogger('agnirva.outbox')
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL,
+                    last_error TEXT
+                )
+            """)
+
+    # Queue a message for delivery. Returns False if the outbox is full.
+    def enqueue(self, recipient, subject, body):
+        with self._lock, self._conn:
+            (queued,) = self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()
+            if queued >= self.max_messages:
+                return False
+            self._conn.execute(
+                "INSERT INTO outbox (recipient, subject, body, next_attempt) VALUES (?, ?, ?, ?)",
+                (recipient, subject, body, time.time())
+            )
+        self.start()
+        self._wakeup.set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='agnirva-outbox', daemon=True)
+                self._thread.start()
+
+    # Wait until every queued message has been sent or given up on, or timeout expires
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._wakeup.set()
+            time.sleep(0.1)
+        return True
+
+    def close(self):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._disconnect()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            with self._lock:
+                batch = self._conn.execute(
+                    """SELECT id, recipient, subject, body, attempts FROM outbox
+                       WHERE next_attempt <= ? ORDER BY next_attempt LIMIT ?""",
+                    (time.time(), self.batch_size)
+                ).fetchall()
+                next_due = self._conn.execute("SELECT MIN(next_attempt) FROM outbox").fetchone()[0]
+
+            if batch:
+                for message in batch:
+                    self._send(*message)
+                continue
+
+            if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                self._disconnect()
+            wait_for = self.idle_timeout if next_due is None else max(0.0, next_due - time.time())
+            self._wakeup.wait(min(wait_for, self.idle_timeout))
+            self._wakeup.clear()
+
+    def _send(self, message_id, recipient, subject, body, attempts):
+        try:
+            if self._smtp is None:
+                self._smtp = connect_smtp(self.settings)
+            self._smtp.send_message(build_email_message(recipient, subject, body, self.settings))
+            self._last_used = time.monotonic()
+        except (smtplib.SMTPException, OSError) as e:
+            # The connection may be unusable after an error; reconnect on the next message
+            self._disconnect()
+            self._retry_later(message_id, attempts + 1, str(e))
+            return
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+
+    def _retry_later(self, message_id, attempts, error):
+        with self._lock, self._conn:
+            if attempts >= self.max_attempts:
+                self._log.error("Giving up on alert email %s after %d attempts: %s",
+                                message_id, attempts, error)
+                self._conn.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+                return
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            self._conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, error, message_id)
+            )
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+
+# Function to build the subject and body of a close approach alert
+def format_notification_email(close_approaches, body_display, threshold):
+    subject = f"⚠️ Close Approach Alert: {len(close_approaches)} events near {body_display}"
+    
+    body = f"""Close Approach Alert for {body_display}:
+
+The following celestial objects will make close approaches within {threshold} AU:
+
+"""
+    for _, row in close_approaches.iterrows():
+        body += f"""
+- {row['des']} on {row['cd'].strftime('%Y-%m-%d %H:%M')}
+  Distance: {row['dist']} AU
+  Velocity: {row['v_rel']} km/s
+"""
+    
+    body += "\n\nThis is an automated notification from Agnirva NEO/Comet Tracker."
+    return subject, body
+
+# Largest number of (subscription, approach) pairs compared at once when matching
+MATCH_BLOCK_CELLS = 4 * 1024 ** 2
+
+# Registry of alert subscriptions. A subscriber asks, per body, for close approaches within
+# dist_max_au and at least v_rel_min km/s. The thresholds of each body are kept as arrays,
+# built once per change to the body's subscriptions, so a batch of approaches is matched
+# against every subscription with array comparisons instead of a loop over subscribers.
+class AlertSubscriptionIndex:
+    def __init__(self):
+        self._subscriptions = {}
+        self._index = {}
+
+    # Build a registry from [{'email': ..., 'thresholds': {'Earth': {'dist_max_au': ...,
+    # 'v_rel_min': ...}}}, ...]
+    @classmethod
+    def from_config(cls, subscribers):
+        index = cls()
+        for subscriber in subscribers:
+            for body, threshold in subscriber.get('thresholds', {}).items():
+                index.add(subscriber['email'], body, threshold['dist_max_au'],
+                          threshold.get('v_rel_min', 0.0))
+        return index
+
+    def add(self, subscriber, body, dist_max_au, v_rel_min=0.0):
+        self._subscriptions[(subscriber, body)] = {
+            'dist_max_au': float(dist_max_au),
+            'v_rel_min': float(v_rel_min),
+        }
+        self._index.pop(body, None)
+
+    def remove(self, subscriber, body):
+        if self._subscriptions.pop((subscriber, body), None) is not None:
+            self._index.pop(body, None)
+
+    def get(self, subscriber, body):
+        return self._subscriptions.get((subscriber, body))
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def bodies(self):
+        return sorted({body for _, body in self._subscriptions})
+
+    # Largest distance threshold for a body, i.e. how far a poll for it has to look
+    def max_distance(self, body):
+        index = self._body_index(body)
+        return float(index[0][-1]) if index else None
+
+    # Key identifying one alert, used to send each (subscriber, approach) only once
+    @staticmethod
+    def alert_key(subscriber, body, des, cd):
+        return (subscriber, body, str(des), cd.strftime('%Y-%m-%d %H:%M'))
+
+    def _body_index(self, body):
+        if body not in self._index:
+            entries = sorted((threshold['dist_max_au'], threshold['v_rel_min'], subscriber)
+                             for (subscriber, subscribed_body), threshold in self._subscriptions.items()
+                             if subscribed_body == body)
+            self._index[body] = (
+                np.array([entry[0] for entry in entries]),
+                np.array([entry[1] for entry in entries]),
+                np.array([entry[2] for entry in entries], dtype=object),
+                {entry[2]: position for position, entry in enumerate(entries)},
+            ) if entries else None
+        return self._index[body]
+
+    # Match a batch of close approaches to a body against every subscription. Returns
+    # {subscriber: [row positions in fd]}, leaving out alerts whose key is in notified.
+    def match(self, fd, body, notified=None):
+        index = self._body_index(body)
+        if index is None or fd.empty:
+            return {}
+        thresholds, v_rel_mins, subscribers, positions = index
+
+        dist = fd['dist'].to_numpy(dtype=float)
+        # An unknown velocity only satisfies subscriptions without a velocity threshold
+        v_rel = np.nan_to_num(fd['v_rel'].to_numpy(dtype=float), nan=0.0)
+        # Rows beyond the largest threshold can't match anyone
+        rows = np.flatnonzero(dist <= thresholds[-1])
+        if len(rows) == 0:
+            return {}
+        dist, v_rel = dist[rows], v_rel[rows]
+
+        # Compare blocks of subscriptions with every row at once, keeping the mask bounded
+        block = max(1, MATCH_BLOCK_CELLS // len(rows))
+        hit_subs, hit_rows = [], []
+        for first in range(0, len(thresholds), block):
+            mask = ((dist[None, :] <= thresholds[first:first + block, None])
+                    & (v_rel[None, :] >= v_rel_mins[first:first + block, None]))
+            subs, cols = np.nonzero(mask)
+            hit_subs.append(subs + first)
+            hit_rows.append(rows[cols])
+        hit_subs = np.concatenate(hit_subs)
+        hit_rows = np.concatenate(hit_rows)
+
+        if notified:
+            # Number each (subscription, row) pair, and drop the pairs already notified
+            row_keys = {}
+            for row, key in enumerate(zip(fd['des'].astype(str), fd['cd'].dt.strftime('%Y-%m-%d %H:%M'))):
+                row_keys.setdefault(key, []).append(row)
+            sent = [positions[subscriber] * len(fd) + row
+                    for subscriber, notified_body, des, cd in notified
+                    if notified_body == body and subscriber in positions
+                    for row in row_keys.get((des, cd), ())]
+            fresh = ~np.isin(hit_subs * len(fd) + hit_rows, sent)
+            hit_subs, hit_rows = hit_subs[fresh], hit_rows[fresh]
+        if len(hit_subs) == 0:
+            return {}
+
+        # np.nonzero lists the pairs by subscription, then row, so each subscriber's rows
+        # are one sorted run
+        starts = np.flatnonzero(np.r_[True, hit_subs[1:] != hit_subs[:-1]])
+        ends = np.r_[starts[1:], len(hit_subs)]
+        return {subscribers[hit_subs[start]]: hit_rows[start:end].tolist()
+                for start, end in zip(starts, ends)}
@@ -2,112 +2,643 @@ import streamlit as st
 import requests
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import time
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from sklearn.linear_model import LinearRegression
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import os
+import sys
+
+# Modules shared by the Agnirva apps live in the AgnirvaCommon folder at the top of the
+# repository. Set AGNIRVA_COMMON to use a copy somewhere else.
+AGNIRVA_COMMON = os.environ.get('AGNIRVA_COMMON', os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir, 'AgnirvaCommon')))
+if AGNIRVA_COMMON not in sys.path:
+    sys.path.append(AGNIRVA_COMMON)
+
+from AgnirvaNASAHttpClient import NASAHttpClient, SingleFlight, BackgroundRefresher
+from AgnirvaDataPager import show_paged_rows
+from AgnirvaDataExport import EXPORT_FORMATS, available_formats, deferred_export, export_file_name, frame_chunks
+from AgnirvaCADClient import (
+    BODY_CODES, CAD_MAX_WORKERS, CAD_WINDOW_LIMIT, CADQueryCache,
+    cad_params_for_query, iter_close_approach_windows, merge_close_approaches,
+    normalize_cad_query, parse_cad_payload, request_close_approaches
+)
+from AgnirvaCloseApproachCatalog import CloseApproachCatalog
+from AgnirvaNEOAlerts import AlertSubscriptionIndex, EmailOutbox, format_notification_email
+from AgnirvaDatasetStore import DatasetStore, SessionRegistry, estimate_bytes, format_size, frame_fingerprint
 import numpy as np
 from dateutil.relativedelta import relativedelta
+from concurrent.futures import ThreadPoolExecutor
+import io
+
+# Location of the local orbital element file used for predicted close approaches
+ELEMENTS_PATH = os.environ.get(
+    'AGNIRVA_ELEMENTS',
+    os.path.join(os.path.expanduser('~'), '.agnirva', 'elements.csv')
+)
 
-# Mapping of display names to API body codes
-BODY_CODES = {
-    'Mercury': 'Merc',
-    'Venus': 'Venus',
-    'Earth': 'Earth',
-    'Mars': 'Mars',
-    'Jupiter': 'Juptr',
-    'Saturn': 'Satrn',
-    'Uranus': 'Urnus',
-    'Neptune': 'Neptn',
-    'Moon': 'Moon'
+# Gaussian gravitational constant (AU^1.5/day) and constants for the orbit propagation
+GAUSS_K = 0.01720209895
+AU_KM = 149597870.7
+J2000_JD = 2451545.0
+
+# Mean orbital elements of the major planets at J2000 (ecliptic and equinox of J2000) and
+# their rates per Julian century, from JPL's "Keplerian Elements for Approximate Positions
+# of the Major Planets" (1800-2050 fit): a (AU), e, I, L, longitude of perihelion and
+# longitude of the ascending node (degrees). Earth uses the Earth-Moon barycenter, which is
+# within 5000 km of the Earth. The Moon has no entry: it strays up to 0.0026 AU from the
+# barycenter, as much as a typical lunar close approach, so it can't be predicted this way.
+PLANET_ELEMENTS = {
+    'Merc': ((0.38709927, 0.20563593, 7.00497902, 252.25032350, 77.45779628, 48.33076593),
+             (0.00000037, 0.00001906, -0.00594749, 149472.67411175, 0.16047689, -0.12534081)),
+    'Venus': ((0.72333566, 0.00677672, 3.39467605, 181.97909950, 131.60246718, 76.67984255),
+              (0.00000390, -0.00004107, -0.00078890, 58517.81538729, 0.00268329, -0.27769418)),
+    'Earth': ((1.00000261, 0.01671123, -0.00001531, 100.46457166, 102.93768193, 0.0),
+              (0.00000562, -0.00004392, -0.01294668, 35999.37244981, 0.32327364, 0.0)),
+    'Mars': ((1.52371034, 0.09339410, 1.84969142, -4.55343205, -23.94362959, 49.55953891),
+             (0.00001847, 0.00007882, -0.00813131, 19140.30268499, 0.44441088, -0.29257343)),
+    'Juptr': ((5.20288700, 0.04838624, 1.30439695, 34.39644051, 14.72847983, 100.47390909),
+              (-0.00011607, -0.00013253, -0.00183714, 3034.74612775, 0.21252668, 0.20469106)),
+    'Satrn': ((9.53667594, 0.05386179, 2.48599187, 49.95424423, 92.59887831, 113.66242448),
+              (-0.00125060, -0.00050991, 0.00193609, 1222.49362201, -0.41897216, -0.28867794)),
+    'Urnus': ((19.18916464, 0.04725744, 0.77263783, 313.23810451, 170.95427630, 74.01692503),
+              (-0.00196176, -0.00004397, -0.00242939, 428.48202785, 0.40805281, 0.04240589)),
+    'Neptn': ((30.06992276, 0.00859048, 1.77004347, -55.12002969, 44.96476227, 131.78422574),
+              (0.00026291, 0.00005105, 0.00035372, 218.45945325, -0.32241464, -0.00508664)),
 }
 
+# Point count above which the chart switches from individual markers to density bins
+PLOT_POINT_LIMIT = 5000
+
+# Derived artifacts (fitted trends, figures) kept per cache function,
+# keyed by the fingerprint of the data they were built from
+ARTIFACT_CACHE_ENTRIES = 8
+# Closest approaches still drawn as individual markers on top of the density view
+PLOT_HIGHLIGHT_POINTS = 500
+# Number of date and distance bins in the density view
+PLOT_DENSITY_BINS = (300, 120)
+
 # Notification settings (would be stored in a database in production)
-if 'notification_settings' not in st.session_state:
-    st.session_state.notification_settings = {
-        'email': '',
-        'notification_threshold': 0.02,  # in AU
-        'enabled': False,
-        'last_notified': None
-    }
+def init_notification_settings():
+    if 'notification_settings' not in st.session_state:
+        st.session_state.notification_settings = {
+            'email': '',
+            'notification_threshold': 0.02,  # in AU
+            'enabled': False,
+            'notified': set()  # alert keys already sent, see AlertSubscriptionIndex.alert_key
+        }
+    st.session_state.notification_settings.setdefault('notified', set())
 
-# Function to fetch close approach data
-def fetch_close_approaches(body_code='Earth', date_min='now', date_max='+60', dist_max='0.05', 
-                          dist_unit='AU', limit=100, object_type='NEO'):
-    url = 'https://ssd-api.jpl.nasa.gov/cad.api'
-    params = {
-        'body': body_code,
-        'date-min': date_min,
-        'date-max': date_max,
-        'dist-max': f"{dist_max}{dist_unit}",
-        'limit': limit
-    }
-    
-    if object_type == 'NEO':
-        params['neo'] = 'true'
-    elif object_type == 'Comet':
-        params['comet'] = 'true'
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return data
-    except requests.exceptions.HTTPError as http_err:
-        st.error(f"⚠️ HTTP error occurred: {http_err}")
+# Shared CAD result cache, kept across reruns and sessions
+@st.cache_resource
+def get_cad_query_cache():
+    return CADQueryCache()
+
+# Shared HTTP client so CAD requests reuse pooled keep-alive connections and every session
+# draws on the same rate limit and retry policy
+@st.cache_resource
+def get_cad_session():
+    return NASAHttpClient(pool_size=CAD_MAX_WORKERS)
+
+# Shared single-flight group so identical CAD requests from concurrent sessions wait on one
+# upstream call instead of each sending their own
+@st.cache_resource
+def get_cad_flights():
+    return SingleFlight()
+
+# Shared background refresher for cached CAD results that are getting old
+@st.cache_resource
+def get_cad_refresher():
+    return BackgroundRefresher()
+
+# Function to report a failed CAD request in the app
+def report_cad_error(err):
+    if isinstance(err, requests.exceptions.HTTPError):
+        st.error(f"⚠️ HTTP error occurred: {err}")
         try:
-            error_info = response.json()
+            error_info = err.response.json()
             st.error(f"🔍 Error details: {error_info}")
-        except ValueError:
+        except (ValueError, AttributeError):
             st.error("🔍 No additional error information provided.")
+    else:
+        st.error(f"⚠️ Error fetching data from API: {err}")
+
+# Function to describe an age in seconds for the freshness badge
+def format_age(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "just now"
+    if minutes < 60:
+        return f"{minutes} min ago"
+    hours = minutes // 60
+    if hours < 48:
+        return f"{hours} h ago"
+    return f"{hours // 24} days ago"
+
+# Function to describe how fresh the cached results of a set of CAD requests are, for the
+# badge shown with the results. Returns None when none of them is cached.
+def describe_cad_freshness(body_codes, object_types, date_min, date_max, dist_max, dist_unit, limit):
+    cache = get_cad_query_cache()
+    refresher = get_cad_refresher()
+    oldest = None
+    refreshing = False
+    error = None
+    for body in body_codes:
+        for kind in object_types:
+            query = normalize_cad_query(body, date_min, date_max, dist_max, dist_unit, limit, kind)
+            if query is None:
+                continue
+            _, fetched_at = cache.lookup(query)
+            if fetched_at is None:
+                continue
+            oldest = fetched_at if oldest is None else min(oldest, fetched_at)
+            state, message = refresher.status(tuple(sorted(cad_params_for_query(query).items())))
+            refreshing = refreshing or state == 'refreshing'
+            error = error or message
+
+    if oldest is None:
         return None
+    age = format_age(time.time() - oldest)
+    if refreshing:
+        return (f"🟡 Showing results fetched {age}. Newer data is being fetched in the background; "
+                "fetch again in a moment to see it.")
+    if error:
+        return f"🔴 Showing results fetched {age}. The last refresh failed: {error}"
+    return f"🟢 Up to date (fetched {age})."
+
+# Function to fetch close approach data
+def fetch_close_approaches(body_code='Earth', date_min='now', date_max='+60', dist_max='0.05', 
+                          dist_unit='AU', limit=100, object_type='NEO', use_cache=True):
+    try:
+        return request_close_approaches(body_code, date_min, date_max, dist_max, dist_unit,
+                                        limit, object_type, use_cache,
+                                        session=get_cad_session(), cache=get_cad_query_cache(),
+                                        flights=get_cad_flights(), refresher=get_cad_refresher())
     except requests.exceptions.RequestException as e:
-        st.error(f"⚠️ Error fetching data from API: {e}")
+        report_cad_error(e)
         return None
 
+# Function to fetch close approaches for several bodies and object types concurrently over
+# the shared session. Returns one DataFrame with a 'body' column, de-duplicated on
+# (des, cd, body).
+def fetch_close_approaches_batch(body_codes, object_types=('NEO', 'Comet'), date_min='now',
+                                 date_max='+60', dist_max='0.05', dist_unit='AU', limit=100,
+                                 max_workers=CAD_MAX_WORKERS):
+    body_names = {code: name for name, code in BODY_CODES.items()}
+    jobs = [(body, kind) for body in body_codes for kind in object_types]
+    if not jobs:
+        return pd.DataFrame()
+
+    session = get_cad_session()
+    cache = get_cad_query_cache()
+    flights = get_cad_flights()
+    refresher = get_cad_refresher()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        futures = [
+            executor.submit(request_close_approaches, body, date_min, date_max, dist_max,
+                            dist_unit, limit, kind, session=session, cache=cache,
+                            flights=flights, refresher=refresher)
+            for body, kind in jobs
+        ]
+
+    frames = []
+    for (body, kind), future in zip(jobs, futures):
+        try:
+            data = future.result()
+        except requests.exceptions.RequestException as e:
+            report_cad_error(e)
+            continue
+        if not data or not data.get('data'):
+            continue
+        fd = parse_data(data)
+        fd['body'] = body_names.get(body, body)
+        frames.append(fd)
+
+    return merge_close_approaches(frames)
+
+# Function to warn that a window of close approaches was cut off at the row limit
+def warn_truncated_window(body, kind, window):
+    start, end, limit = window
+    st.warning(f"⚠️ More than {limit} {kind} close approaches to {body} fall between "
+               f"{start:%Y-%m-%d %H:%M} and {end:%Y-%m-%d %H:%M}; only the first {limit} are shown. "
+               "Lower the maximum distance to see them all.")
+
+# Function to run a sharded ingestion in the app, reporting progress as windows arrive
+def ingest_close_approaches(body_codes, object_types, date_min, date_max, dist_max='0.05',
+                            dist_unit='AU'):
+    body_names = {code: name for name, code in BODY_CODES.items()}
+    frames = []
+    ingested = 0
+    progress = st.empty()
+    # The shared resources are resolved on the script thread and handed to the workers
+    fetch_options = {
+        'session': get_cad_session(),
+        'cache': get_cad_query_cache(),
+        'flights': get_cad_flights(),
+        'refresher': get_cad_refresher(),
+    }
+
+    for body in body_codes:
+        for kind in object_types:
+            try:
+                for fd in iter_close_approach_windows(body, date_min, date_max, dist_max,
+                                                      dist_unit, kind, **fetch_options):
+                    if 'truncated' in fd.attrs:
+                        warn_truncated_window(body_names.get(body, body), kind, fd.attrs['truncated'])
+                    fd['body'] = body_names.get(body, body)
+                    frames.append(fd)
+                    ingested += len(fd)
+                    progress.caption(f"🧩 Ingested {ingested} close approaches so far...")
+            except requests.exceptions.RequestException as e:
+                report_cad_error(e)
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+
+    progress.empty()
+    return merge_close_approaches(frames)
+
 # Function to parse the data
 def parse_data(data):
     if data is None or data.get('count', 0) == 0:
         st.warning("⚠️ No close approaches found for the given parameters.")
         return pd.DataFrame()
     
-    fields = data.get('fields', [])
-    records = data.get('data', [])
-    fd = pd.DataFrame(records, columns=fields)
-    
-    # Convert relevant columns to appropriate data types
-    fd['cd'] = pd.to_datetime(fd['cd'], format='%Y-%b-%d %H:%M')
-    fd['dist'] = pd.to_numeric(fd['dist'], errors='coerce')
-    fd['v_rel'] = pd.to_numeric(fd['v_rel'], errors='coerce')
-    fd['v_inf'] = pd.to_numeric(fd['v_inf'], errors='coerce')
-    
-    return fd
+    return parse_cad_payload(data)
+
+# Shared local catalog, opened once per process
+@st.cache_resource
+def get_close_approach_catalog():
+    return CloseApproachCatalog()
+
+# Function to load close approaches through the local catalog, syncing only the windows
+# it doesn't hold yet. Falls back to the local data if the CAD API can't be reached.
+def load_from_catalog(body_codes, object_types, date_min, date_max, dist_max='0.05',
+                      dist_unit='AU', limit=None):
+    catalog = get_close_approach_catalog()
+    body_names = {code: name for name, code in BODY_CODES.items()}
+    frames = []
+    fetch_options = {
+        'session': get_cad_session(),
+        'cache': get_cad_query_cache(),
+        'flights': get_cad_flights(),
+        'refresher': get_cad_refresher(),
+    }
+
+    for body in body_codes:
+        for kind in object_types:
+            query = normalize_cad_query(body, date_min, date_max, dist_max, dist_unit,
+                                        limit or CAD_WINDOW_LIMIT, kind)
+            if query is None:
+                st.error("⚠️ Invalid close approach query parameters.")
+                return pd.DataFrame()
+
+            try:
+                truncated = catalog.sync(body, kind, query['date_min'], query['date_max'],
+                                         query['dist_max_au'], **fetch_options)
+                for window in truncated:
+                    warn_truncated_window(body_names.get(body, body), kind, window)
+            except requests.exceptions.RequestException as e:
+                st.warning(f"⚠️ Could not sync {body} ({kind}) from the CAD API, "
+                           f"showing locally cataloged data only: {e}")
+
+            fd = catalog.query(body, kind, query['date_min'], query['date_max'],
+                               query['dist_max_au'], limit)
+            fd['body'] = body_names.get(body, body)
+            frames.append(fd)
+
+    return merge_close_approaches(frames)
+
+# Function to load close approaches for a query, through the local catalog, sharded
+# ingestion, a single CAD request or a batch of requests
+def load_close_approaches(body_codes, object_types, date_min, date_max, dist_max='0.05',
+                          dist_unit='AU', limit=100, use_catalog=False, sharded=False):
+    if use_catalog:
+        fd = load_from_catalog(
+            body_codes=body_codes,
+            object_types=object_types,
+            date_min=date_min,
+            date_max=date_max,
+            dist_max=dist_max,
+            dist_unit=dist_unit,
+            limit=None if sharded else limit
+        )
+    elif sharded:
+        fd = ingest_close_approaches(
+            body_codes=body_codes,
+            object_types=object_types,
+            date_min=date_min,
+            date_max=date_max,
+            dist_max=dist_max,
+            dist_unit=dist_unit
+        )
+    elif len(body_codes) == 1 and len(object_types) == 1:
+        data = fetch_close_approaches(
+            body_code=body_codes[0],
+            date_min=date_min,
+            date_max=date_max,
+            dist_max=dist_max,
+            dist_unit=dist_unit,
+            limit=limit,
+            object_type=object_types[0]
+        )
+        return parse_data(data)
+    else:
+        fd = fetch_close_approaches_batch(
+            body_codes=body_codes,
+            object_types=object_types,
+            date_min=date_min,
+            date_max=date_max,
+            dist_max=dist_max,
+            dist_unit=dist_unit,
+            limit=limit
+        )
 
-# Function to visualize the data using Plotly with optional trendline and prediction
-def visualize_close_approaches(fd, body, add_trendline=False, show_prediction=False):
     if fd.empty:
-        return
-    
-    # Prepare data for visualization
-    plot_data = fd.copy()
-    plot_data['date_ordinal'] = plot_data['cd'].apply(lambda x: x.toordinal())
-    
-    fig = px.scatter(
-        plot_data,
-        x='cd',
-        y='dist',
-        hover_data=['des', 'v_rel', 'v_inf'],
-        labels={
-            'cd': '📅 Date',
-            'dist': f'📏 Distance ({st.session_state.get("dist_unit", "AU")})',
-            'des': '🪐 Designation',
-            'v_rel': '⚡ Relative Velocity (km/s)',
-            'v_inf': '∞ Infinity Velocity (km/s)'
-        },
-        title=f'🔭 Close Approaches to {body}'
+        st.warning("⚠️ No close approaches found for the given parameters.")
+    return fd
+
+# Function to solve Kepler's equation M = E - e sin(E) for elliptic orbits, element-wise
+def solve_kepler(mean_anomaly, e, tol=1e-12, max_iter=50):
+    M = np.remainder(mean_anomaly + np.pi, 2 * np.pi) - np.pi
+    E = M + 0.85 * e * np.sign(np.sin(M))
+    for _ in range(max_iter):
+        delta = (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+        E = E - delta
+        if np.all(np.abs(delta) < tol):
+            break
+    return E
+
+# Function to compute heliocentric position (AU) and velocity (AU/day) from elliptic orbital
+# elements (angles in radians). Inputs broadcast against each other; outputs get a trailing
+# axis of size 3. The velocity is None unless with_velocity is set.
+def orbit_state(a, e, inc, node, peri, mean_anomaly, with_velocity=True):
+    E = solve_kepler(mean_anomaly, e)
+    cos_E, sin_E = np.cos(E), np.sin(E)
+    b = a * np.sqrt(1 - e ** 2)
+    x, y = a * (cos_E - e), b * sin_E
+
+    cos_node, sin_node = np.cos(node), np.sin(node)
+    cos_peri, sin_peri = np.cos(peri), np.sin(peri)
+    cos_inc, sin_inc = np.cos(inc), np.sin(inc)
+    P = np.stack(np.broadcast_arrays(cos_node * cos_peri - sin_node * sin_peri * cos_inc,
+                                     sin_node * cos_peri + cos_node * sin_peri * cos_inc,
+                                     sin_peri * sin_inc), axis=-1)
+    Q = np.stack(np.broadcast_arrays(-cos_node * sin_peri - sin_node * cos_peri * cos_inc,
+                                     -sin_node * sin_peri + cos_node * cos_peri * cos_inc,
+                                     cos_peri * sin_inc), axis=-1)
+
+    position = x[..., None] * P + y[..., None] * Q
+    if not with_velocity:
+        return position, None
+    n = GAUSS_K / a ** 1.5
+    r_factor = 1 - e * cos_E
+    vx, vy = -a * n * sin_E / r_factor, b * n * cos_E / r_factor
+    velocity = vx[..., None] * P + vy[..., None] * Q
+    return position, velocity
+
+# Function to compute a planet's approximate heliocentric state at the given Julian dates
+def planet_state(body_code, jd, with_velocity=True):
+    base, rate = (np.array(values) for values in PLANET_ELEMENTS[body_code])
+    centuries = (np.asarray(jd, dtype=float) - J2000_JD) / 36525.0
+    a, e, inc, mean_longitude, peri_longitude, node = (
+        base[k] + rate[k] * centuries for k in range(6)
     )
+    inc, mean_longitude, peri_longitude, node = (
+        np.radians(v) for v in (inc, mean_longitude, peri_longitude, node)
+    )
+    return orbit_state(a, e, inc, node, peri_longitude - node, mean_longitude - peri_longitude,
+                       with_velocity)
+
+# Function to load osculating orbital elements from a CSV file or buffer, using the column
+# names of JPL's SBDB query API: des (or full_name), epoch (JD), e, a or q (AU), i, om, w
+# and ma (degrees). Only elliptic orbits are kept.
+def load_orbital_elements(source):
+    elements = pd.read_csv(source)
+    if 'des' not in elements.columns and 'full_name' in elements.columns:
+        elements['des'] = elements['full_name'].astype(str).str.strip()
+    if 'a' not in elements.columns and 'q' in elements.columns:
+        elements['a'] = elements['q'] / (1 - elements['e'])
+
+    required = ['des', 'epoch', 'e', 'a', 'i', 'om', 'w', 'ma']
+    missing = [col for col in required if col not in elements.columns]
+    if missing:
+        raise ValueError(f"Orbital element file is missing columns: {', '.join(missing)}")
+
+    elements = elements[required].dropna()
+    return elements[(elements['e'] < 1) & (elements['a'] > 0)].reset_index(drop=True)
+
+# Function to predict close approaches to a body by two-body propagation of every object in
+# the element table. Distances are sampled on a time grid, a block of objects by a block of
+# grid points at a time, so memory doesn't grow with the date range; each local minimum that
+# may fall within dist_max_au is then refined by a golden-section search in the surrounding
+# grid interval. Velocities are only computed at the refined minima. Returns a DataFrame
+# shaped like parse_data output.
+def predict_close_approaches(elements, body_code, start, end, dist_max_au=0.05, step_days=1.0,
+                             chunk_size=250, grid_chunk=512, refine_iterations=40):
+    columns = ['des', 'jd', 'cd', 'dist', 'v_rel']
+    if body_code not in PLANET_ELEMENTS:
+        raise ValueError(f"Close approaches to {body_code} can't be predicted from mean planetary elements.")
+    if elements.empty:
+        return pd.DataFrame(columns=columns)
+
+    epoch = elements['epoch'].to_numpy(dtype=float)
+    a = elements['a'].to_numpy(dtype=float)
+    e = elements['e'].to_numpy(dtype=float)
+    inc, node, peri, ma = (np.radians(elements[col].to_numpy(dtype=float))
+                           for col in ('i', 'om', 'w', 'ma'))
+    n = GAUSS_K / a ** 1.5
+
+    def object_state(idx, jd, with_velocity=True):
+        mean_anomaly = ma[idx] + n[idx] * (jd - epoch[idx])
+        return orbit_state(a[idx], e[idx], inc[idx], node[idx], peri[idx], mean_anomaly,
+                           with_velocity)
+
+    def distance(idx, jd):
+        position, _ = object_state(idx, jd, with_velocity=False)
+        return np.linalg.norm(position - planet_state(body_code, jd, with_velocity=False)[0],
+                              axis=-1)
+
+    start_jd = pd.Timestamp(start).to_julian_date()
+    end_jd = pd.Timestamp(end).to_julian_date()
+    grid = np.arange(start_jd, end_jd + step_days, step_days)
+    if len(grid) < 3:
+        return pd.DataFrame(columns=columns)
+    # Relative speeds stay well below 0.05 AU/day, which bounds how much closer an
+    # approach can get between two grid points
+    screen = dist_max_au + 0.05 * step_days
+
+    candidate_objects, candidate_times = [], []
+    # Blocks of grid points overlap by two, so every interior point is tested once with
+    # both neighbours
+    for grid_first in range(0, len(grid) - 2, grid_chunk):
+        times = grid[grid_first:grid_first + grid_chunk + 2]
+        body_position = planet_state(body_code, times, with_velocity=False)[0]
+        for first in range(0, len(elements), chunk_size):
+            idx = np.arange(first, min(first + chunk_size, len(elements)))
+            mean_anomaly = ma[idx, None] + n[idx, None] * (times[None, :] - epoch[idx, None])
+            position, _ = orbit_state(a[idx, None], e[idx, None], inc[idx, None],
+                                      node[idx, None], peri[idx, None], mean_anomaly,
+                                      with_velocity=False)
+            dist = np.linalg.norm(position - body_position[None, :, :], axis=-1)
+
+            inner = dist[:, 1:-1]
+            is_minimum = (inner <= dist[:, :-2]) & (inner < dist[:, 2:]) & (inner < screen)
+            rows, cols = np.nonzero(is_minimum)
+            candidate_objects.append(idx[rows])
+            candidate_times.append(times[cols + 1])
+
+    obj = np.concatenate(candidate_objects)
+    if len(obj) == 0:
+        return pd.DataFrame(columns=columns)
+    centre = np.concatenate(candidate_times)
+
+    # Golden-section search for the minimum distance within one grid step either side
+    ratio = (np.sqrt(5) - 1) / 2
+    lo, hi = centre - step_days, centre + step_days
+    x1, x2 = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    f1, f2 = distance(obj, x1), distance(obj, x2)
+    for _ in range(refine_iterations):
+        left = f1 < f2
+        hi = np.where(left, x2, hi)
+        lo = np.where(left, lo, x1)
+        x2_new = np.where(left, x1, lo + ratio * (hi - lo))
+        x1_new = np.where(left, hi - ratio * (hi - lo), x2)
+        f_new = distance(obj, np.where(left, x1_new, x2_new))
+        f1, f2 = np.where(left, f_new, f2), np.where(left, f1, f_new)
+        x1, x2 = x1_new, x2_new
+
+    jd = (lo + hi) / 2
+    position, velocity = object_state(obj, jd)
+    planet_position, planet_velocity = planet_state(body_code, jd)
+    dist = np.linalg.norm(position - planet_position, axis=-1)
+    v_rel = np.linalg.norm(velocity - planet_velocity, axis=-1) * AU_KM / 86400.0
+
+    keep = dist <= dist_max_au
+    predicted = pd.DataFrame({
+        'des': pd.Categorical(elements['des'].to_numpy()[obj[keep]]),
+        'jd': jd[keep],
+        'cd': pd.to_datetime(jd[keep], unit='D', origin='julian').astype('datetime64[ns]'),
+        'dist': dist[keep],
+        'v_rel': v_rel[keep],
+    })
+    return predicted.sort_values('cd', ignore_index=True)
+
+# Function to load the orbital elements and propagate them for the app. Cached on the
+# element file contents and the prediction window.
+@st.cache_data(max_entries=8, show_spinner="🛰️ Propagating orbits...")
+def compute_predicted_approaches(elements_csv, body_codes, start, end, dist_max_au):
+    elements = load_orbital_elements(io.BytesIO(elements_csv))
+    body_names = {code: name for name, code in BODY_CODES.items()}
+    frames = []
+    for body in body_codes:
+        predicted = predict_close_approaches(elements, body, start, end, dist_max_au)
+        predicted['body'] = body_names.get(body, body)
+        frames.append(predicted)
+    return pd.concat(frames, ignore_index=True)
+
+# Function to convert a datetime column to proleptic Gregorian ordinals without a Python loop
+def date_ordinals(dates):
+    return dates.to_numpy(dtype='datetime64[D]').astype(np.int64) + datetime(1970, 1, 1).toordinal()
+
+# Function to count close approaches in date/distance bins for the density view. Returns the
+# bin centres and a (distance, date) count grid with empty bins as NaN.
+def bin_close_approaches(dates, distances, bins=PLOT_DENSITY_BINS):
+    timestamps = dates.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    counts, date_edges, dist_edges = np.histogram2d(timestamps, distances, bins=bins)
+    date_centres = pd.to_datetime((date_edges[:-1] + date_edges[1:]) / 2).floor('s')
+    dist_centres = (dist_edges[:-1] + dist_edges[1:]) / 2
+    return date_centres, dist_centres, np.where(counts > 0, counts, np.nan).T
+
+# Shared dataset store, kept across reruns and sessions
+@st.cache_resource
+def get_dataset_store():
+    return DatasetStore()
+
+# Function to pick the columns of the table shown above the chart, with their display names
+def close_approach_columns(fd, dist_unit):
+    labels = {
+        'body': '🌍 Body',
+        'des': '🪐 Designation',
+        'cd': '📅 Date',
+        'dist': f'📏 Distance ({dist_unit})',
+        'v_rel': '⚡ Relative Velocity (km/s)',
+        'v_inf': '∞ Infinity Velocity (km/s)'
+    }
+    return {col: label for col, label in labels.items() if col in fd.columns}
+
+# Function to fit the distance trend used for the regression prediction, once per dataset
+# and date window. Returns the model and the simplified error band half-width.
+@st.cache_resource(max_entries=ARTIFACT_CACHE_ENTRIES, show_spinner=False)
+def fit_distance_trend(fingerprint, window, _plot_data):
+    X = date_ordinals(_plot_data['cd']).reshape(-1, 1)
+    y = _plot_data['dist'].values
+    model = LinearRegression()
+    model.fit(X, y)
+    return model, _plot_data['dist'].std() / 2  # Simplified error estimation
+
+# Function to build the close approach chart. It's cached by the data fingerprints and the
+# render options, so reruns that change nothing about the chart reuse the built figure;
+# the returned figure is shared and must not be modified. Returns the figure and any
+# warnings to show.
+@st.cache_resource(max_entries=ARTIFACT_CACHE_ENTRIES, show_spinner=False)
+def build_close_approach_figure(fingerprint, body, dist_unit, window, add_trendline, show_prediction,
+                                predicted_fingerprint, _fd, _predicted=None):
+    warnings = []
+    labels = {
+        'body': '🌍 Body',
+        'cd': '📅 Date',
+        'dist': f'📏 Distance ({dist_unit})',
+        'des': '🪐 Designation',
+        'v_rel': '⚡ Relative Velocity (km/s)',
+        'v_inf': '∞ Infinity Velocity (km/s)'
+    }
+    
+    plot_data = _fd
+    if window is not None:
+        plot_data = _fd[(_fd['cd'] >= window[0]) & (_fd['cd'] <= window[1])]
+    
+    if len(plot_data) > PLOT_POINT_LIMIT:
+        plot_data = plot_data[np.isfinite(plot_data['dist'].to_numpy(dtype=float))]
+        dates, distances, counts = bin_close_approaches(plot_data['cd'], plot_data['dist'].to_numpy(dtype=float))
+        fig = go.Figure(go.Heatmap(
+            x=dates,
+            y=distances,
+            z=counts,
+            colorscale='Viridis',
+            colorbar=dict(title='Approaches'),
+            name='Density',
+            hovertemplate='%{x|%Y-%m-%d}<br>%{y:.5f}<br>%{z:.0f} approaches<extra></extra>'
+        ))
+        
+        closest = plot_data.nsmallest(PLOT_HIGHLIGHT_POINTS, 'dist')
+        fig.add_trace(go.Scattergl(
+            x=closest['cd'],
+            y=closest['dist'],
+            mode='markers',
+            name=f'{len(closest)} Closest Approaches',
+            marker=dict(color='white', size=5, line=dict(color='black', width=1)),
+            customdata=np.stack([closest['des'].astype(str), closest['v_rel']], axis=-1),
+            hovertemplate='%{customdata[0]}<br>%{x}<br>%{y:.5f}<br>%{customdata[1]:.2f} km/s<extra></extra>'
+        ))
+        fig.update_layout(
+            title=f'🔭 Close Approaches to {body} ({len(plot_data):,} approaches, binned)',
+            xaxis_title=labels['cd'],
+            yaxis_title=labels['dist']
+        )
+    else:
+        color = 'body' if 'body' in plot_data.columns and plot_data['body'].nunique() > 1 else None
+        fig = px.scatter(
+            plot_data,
+            x='cd',
+            y='dist',
+            color=color,
+            hover_data=['des', 'v_rel', 'v_inf'],
+            labels=labels,
+            title=f'🔭 Close Approaches to {body}',
+            render_mode='webgl'
+        )
     
     # Add trendline if requested
     if add_trendline:
@@ -118,18 +649,26 @@ def visualize_close_approaches(fd, body, add_trendline=False, show_prediction=Fa
                 line=dict(dash='dot', width=2)
             )
         except Exception as e:
-            st.warning(f"⚠️ Could not add trendline: {e}")
+            warnings.append(f"⚠️ Could not add trendline: {e}")
+    
+    # Add approaches predicted by orbit propagation if available
+    if show_prediction and _predicted is not None:
+        fig.add_scatter(
+            x=_predicted['cd'],
+            y=_predicted['dist'],
+            mode='markers',
+            name='Predicted Approaches (two-body)',
+            marker=dict(color='red', symbol='diamond'),
+            customdata=np.stack([_predicted['des'].astype(str), _predicted['v_rel']], axis=-1),
+            hovertemplate='%{customdata[0]}<br>%{x}<br>%{y:.5f} AU<br>%{customdata[1]:.2f} km/s'
+                          '<extra>Predicted</extra>'
+        )
     
-    # Add prediction if requested
-    if show_prediction and len(plot_data) >= 5:  # Need at least 5 points for prediction
+    # Otherwise add a regression-based prediction if requested
+    elif show_prediction and len(plot_data) >= 5:  # Need at least 5 points for prediction
         try:
-            # Prepare data for linear regression
-            X = plot_data['date_ordinal'].values.reshape(-1, 1)
-            y = plot_data['dist'].values
-            
-            # Train model
-            model = LinearRegression()
-            model.fit(X, y)
+            # Fit the trend (reused when only the trendline or other options change)
+            model, y_err = fit_distance_trend(fingerprint, window, plot_data)
             
             # Generate future dates (6 months ahead)
             last_date = plot_data['cd'].max()
@@ -150,7 +689,6 @@ def visualize_close_approaches(fd, body, add_trendline=False, show_prediction=Fa
             )
             
             # Add confidence interval (simplified)
-            y_err = (plot_data['dist'].std() / 2)  # Simplified error estimation
             fig.add_scatter(
                 x=future_dates + future_dates[::-1],  # x coordinates for the polygon
                 y=np.concatenate([predicted_distances + y_err, 
@@ -163,38 +701,65 @@ def visualize_close_approaches(fd, body, add_trendline=False, show_prediction=Fa
             )
             
         except Exception as e:
-            st.warning(f"⚠️ Could not generate prediction: {e}")
+            warnings.append(f"⚠️ Could not generate prediction: {e}")
     
     fig.update_yaxes(autorange="reversed")
+    return fig, warnings
+
+# Function to visualize the data using Plotly with optional trendline and prediction.
+# Markers are drawn with WebGL; past PLOT_POINT_LIMIT approaches the chart shows density bins
+# with the closest approaches on top, and a date window slider brings back individual points.
+def visualize_close_approaches(fd, body, add_trendline=False, show_prediction=False, predicted=None,
+                               fingerprint=None):
+    if fd.empty:
+        return
+    
+    # Large datasets get a date window to zoom into; narrower windows show more detail
+    window = None
+    if len(fd) > PLOT_POINT_LIMIT:
+        first, last = fd['cd'].min().floor('D').to_pydatetime(), fd['cd'].max().ceil('D').to_pydatetime()
+        if first < last:
+            window = st.slider(
+                "🔍 Date Window",
+                min_value=first,
+                max_value=last,
+                value=(first, last),
+                step=timedelta(days=1),
+                format="YYYY-MM-DD",
+                help=f"Individual approaches are shown once the window holds {PLOT_POINT_LIMIT:,} or fewer."
+            )
+            if window == (first, last):
+                window = None
+    
+    fig, warnings = build_close_approach_figure(
+        fingerprint or frame_fingerprint(fd),
+        body,
+        st.session_state.get("dist_unit", "AU"),
+        window,
+        add_trendline,
+        show_prediction,
+        frame_fingerprint(predicted) if predicted is not None else None,
+        fd,
+        predicted
+    )
+    for warning in warnings:
+        st.warning(warning)
     st.plotly_chart(fig, use_container_width=True)
 
-# Function to send email notifications
+# Shared outbox for the app, delivering in the background across reruns and sessions
+@st.cache_resource
+def get_email_outbox():
+    outbox = EmailOutbox()
+    outbox.start()
+    return outbox
+
+# Function to send email notifications. The message is queued and delivered in the
+# background, so a slow mail server doesn't hold up the page.
 def send_notification_email(recipient, subject, body):
-    try:
-        # Configure your email server settings here
-        smtp_server = "smtp.example.com"
-        smtp_port = 587
-        sender_email = "notifications@agnirva.com"
-        sender_password = "your_email_password"  # In production, use environment variables
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = recipient
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-        
+    if get_email_outbox().enqueue(recipient, subject, body):
         return True
-    except Exception as e:
-        st.error(f"⚠️ Failed to send notification: {e}")
-        return False
+    st.error("⚠️ Failed to send notification: the outgoing mail queue is full.")
+    return False
 
 # Function to check for close approaches that meet notification criteria
 def check_for_notifications(fd, body_display):
@@ -206,52 +771,89 @@ def check_for_notifications(fd, body_display):
     # Get current time and filter for future events
     now = datetime.now()
     future_approaches = fd[fd['cd'] > now]
+
+    # Approaches that are already in the past can't alert again
+    passed = now.strftime('%Y-%m-%d %H:%M')
+    settings['notified'] = {key for key in settings['notified'] if key[3] >= passed}
     
     if future_approaches.empty:
         return
     
-    # Find approaches closer than threshold
+    # Match approaches closer than threshold, skipping the ones already notified
     threshold = settings['notification_threshold']
-    close_approaches = future_approaches[future_approaches['dist'] <= threshold]
-    
-    if close_approaches.empty:
-        return
-    
-    # Check if we've already notified about these (simple deduplication)
-    last_notified = settings.get('last_notified')
-    if last_notified:
-        close_approaches = close_approaches[close_approaches['cd'] > last_notified]
+    email = settings['email']
+    # The session's subscriptions are indexed once and kept until the email or threshold
+    # changes; bodies are added as they show up in the results
+    cached = st.session_state.get('alert_subscriptions')
+    if cached is None or cached[0] != (email, threshold):
+        cached = ((email, threshold), AlertSubscriptionIndex())
+        st.session_state['alert_subscriptions'] = cached
+    subscriptions = cached[1]
+    if 'body' in future_approaches.columns:
+        batches = [(str(body), rows) for body, rows in future_approaches.groupby('body', observed=True)]
+    else:
+        batches = [(body_display, future_approaches)]
+
+    matched = []
+    keys = []
+    for body, rows in batches:
+        if subscriptions.get(email, body) is None:
+            subscriptions.add(email, body, threshold)
+        positions = subscriptions.match(rows, body, settings['notified']).get(email, [])
+        rows = rows.iloc[positions]
+        matched.append(rows)
+        keys.extend(AlertSubscriptionIndex.alert_key(email, body, row.des, row.cd)
+                    for row in rows.itertuples())
     
+    close_approaches = pd.concat(matched) if matched else future_approaches.iloc[0:0]
     if close_approaches.empty:
         return
     
     # Prepare notification
-    subject = f"⚠️ Close Approach Alert: {len(close_approaches)} events near {body_display}"
-    
-    body = f"""Close Approach Alert for {body_display}:
-
-The following celestial objects will make close approaches within {threshold} AU:
-
-"""
-    for _, row in close_approaches.iterrows():
-        body += f"""
-- {row['des']} on {row['cd'].strftime('%Y-%m-%d %H:%M')}
-  Distance: {row['dist']} AU
-  Velocity: {row['v_rel']} km/s
-"""
-    
-    body += "\n\nThis is an automated notification from Agnirva NEO/Comet Tracker."
+    subject, body = format_notification_email(close_approaches, body_display, threshold)
     
     # Send notification
-    if send_notification_email(settings['email'], subject, body):
-        st.session_state.notification_settings['last_notified'] = datetime.now()
-        st.success(f"📧 Notification sent to {settings['email']}")
+    if send_notification_email(email, subject, body):
+        st.session_state.notification_settings['notified'].update(keys)
+        st.success(f"📧 Notification queued for {email}")
     else:
         st.error("Failed to send notification")
 
+# Shared session registry, kept across reruns and sessions
+@st.cache_resource
+def get_session_registry():
+    return SessionRegistry()
+
+# Function to show how much memory each active session costs. Sessions pay for their own
+# state plus an equal share of the datasets they reference, compared with what they would
+# use if every session held a private copy of its dataset.
+def show_memory_usage(fingerprint):
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    state_bytes = sum(estimate_bytes(value) for value in st.session_state.to_dict().values())
+    registry = get_session_registry()
+    registry.touch(ctx.session_id, fingerprint, state_bytes)
+
+    sessions = registry.active()
+    sizes = get_dataset_store().sizes()
+    referenced = {fp for fp, _ in sessions if fp in sizes}
+    shared = sum(sizes[fp] for fp in referenced) + sum(state for _, state in sessions)
+    private = sum(sizes.get(fp, 0) + state for fp, state in sessions)
+    per_session = shared / len(sessions)
+    saved = (private - shared) / len(sessions)
+
+    with st.sidebar.expander("🧠 Memory Usage"):
+        st.metric("Memory per Session", format_size(per_session),
+                  delta=f"-{format_size(saved)} vs. private copies" if saved > 0 else None,
+                  delta_color="inverse")
+        st.caption(f"{len(sessions)} active session(s) sharing {len(referenced)} dataset(s); "
+                   f"{len(sizes)} dataset(s) stored, {format_size(sum(sizes.values()))} in total.")
+
 # Streamlit App
 def main():
     st.set_page_config(page_title="🌌 Agnirva NEO/Comet Tracker", layout="wide")
+    init_notification_settings()
     st.title("🌠 Agnirva NEO and Comet Tracker")
     st.markdown("""
     Welcome to the **NEO and Comet Tracker**! 🚀  
@@ -270,6 +872,13 @@ def main():
         help="Choose the celestial body you want to analyze close approaches to."
     )
     body_code = BODY_CODES[body_display]
+    all_bodies = st.sidebar.checkbox(
+        "🌍 Sweep All Bodies",
+        value=False,
+        help="Fetch close approaches to every body in the list at once."
+    )
+    if all_bodies:
+        body_display = "All Bodies"
     
     # Date Range Selection
     st.sidebar.subheader("Date Range")
@@ -335,6 +944,18 @@ def main():
         help="Filter results by object type: Near-Earth Objects (NEO), Comets, or Both."
     )
     
+    sharded = st.sidebar.checkbox(
+        "🧩 Sharded Ingestion (No Row Limit)",
+        value=False,
+        help="Split long date ranges into windows fetched in parallel, so results aren't capped."
+    )
+    
+    use_catalog = st.sidebar.checkbox(
+        "💾 Use Local Catalog",
+        value=False,
+        help="Keep fetched close approaches on disk and only download date ranges not synced yet."
+    )
+    
     # Number of Results
     limit = st.sidebar.number_input(
         "📈 Number of Results to Fetch",
@@ -342,6 +963,7 @@ def main():
         max_value=1000,
         value=100,
         step=1,
+        disabled=sharded,
         help="Specify how many close approach records to retrieve."
     )
     
@@ -372,83 +994,76 @@ def main():
     # Submit Button
     fetch_data = st.sidebar.button("🚀 Fetch and Visualize Data")
     
+    store = get_dataset_store()
     if fetch_data:
+        query = {
+            'body_codes': list(BODY_CODES.values()) if all_bodies else [body_code],
+            'object_types': ['NEO', 'Comet'] if object_type == 'Both' else [object_type],
+            'date_min': date_min.strftime('%Y-%m-%d'),
+            'date_max': date_max,
+            'dist_max': dist_max,
+            'dist_unit': dist_unit,
+            'limit': limit,
+        }
         with st.spinner("⏳ Fetching data..."):
-            if object_type in ['NEO', 'Comet']:
-                data = fetch_close_approaches(
-                    body_code=body_code,
-                    date_min=date_min.strftime('%Y-%m-%d'),
-                    date_max=date_max,
-                    dist_max=dist_max,
-                    dist_unit=dist_unit,
-                    limit=limit,
-                    object_type=object_type
-                )
-                fd = parse_data(data)
-            elif object_type == 'Both':
-                data_neo = fetch_close_approaches(
-                    body_code=body_code,
-                    date_min=date_min.strftime('%Y-%m-%d'),
-                    date_max=date_max,
-                    dist_max=dist_max,
-                    dist_unit=dist_unit,
-                    limit=limit,
-                    object_type='NEO'
-                )
-                data_comet = fetch_close_approaches(
-                    body_code=body_code,
-                    date_min=date_min.strftime('%Y-%m-%d'),
-                    date_max=date_max,
-                    dist_max=dist_max,
-                    dist_unit=dist_unit,
-                    limit=limit,
-                    object_type='Comet'
-                )
-                
-                fd_neo = parse_data(data_neo)
-                fd_comet = parse_data(data_comet)
-                
-                fd = pd.concat([fd_neo, fd_comet], ignore_index=True)
-                fd.drop_duplicates(inplace=True)
+            fd = load_close_approaches(**query, use_catalog=use_catalog, sharded=sharded)
+        
+        # Cached results are served at once, so tell the user how old they are
+        freshness = None
+        if not use_catalog and not sharded:
+            freshness = describe_cad_freshness(**query)
+        st.session_state['freshness'] = freshness
         
+        # The session only keeps the key of the shared dataset and the query to load it again
+        st.session_state['dataset_query'] = dict(query, use_catalog=use_catalog, sharded=sharded)
+        st.session_state['body_display'] = body_display
+        st.session_state['dist_unit'] = dist_unit
         if not fd.empty:
             st.success(f"✅ Found {len(fd)} close approaches to **{body_display}**.")
-            
-            # Store DataFrame in Session State
-            st.session_state['fd'] = fd
-            st.session_state['body_display'] = body_display
-            st.session_state['dist_unit'] = dist_unit
+            st.session_state['dataset_key'] = store.put(fd)
             
             # Check for notifications
             check_for_notifications(fd, body_display)
         else:
-            st.session_state['fd'] = pd.DataFrame()
-            st.session_state['body_display'] = body_display
-            st.session_state['dist_unit'] = dist_unit
+            st.session_state['dataset_key'] = None
+    
+    # Look up this session's dataset in the shared store, loading it again if it was dropped
+    fingerprint = st.session_state.get('dataset_key')
+    fd = store.get(fingerprint) if fingerprint else None
+    if fingerprint and fd is None:
+        with st.spinner("⏳ Reloading data..."):
+            fd = load_close_approaches(**st.session_state['dataset_query'])
+        fingerprint = st.session_state['dataset_key'] = store.put(fd) if not fd.empty else None
+        fd = store.get(fingerprint) if fingerprint else None
     
-    # Check if data is available in session state
-    if 'fd' in st.session_state and not st.session_state['fd'].empty:
-        fd = st.session_state['fd']
+    # Check if data is available
+    if fd is not None:
         body_display = st.session_state['body_display']
         dist_unit = st.session_state['dist_unit']
         
         # Display the data table
         st.subheader("📊 Close Approach Data")
-        st.dataframe(fd[['des', 'cd', 'dist', 'v_rel', 'v_inf']].rename(columns={
-            'des': '🪐 Designation',
-            'cd': '📅 Date',
-            'dist': f'📏 Distance ({dist_unit})',
-            'v_rel': '⚡ Relative Velocity (km/s)',
-            'v_inf': '∞ Infinity Velocity (km/s)'
-        }))
+        if st.session_state.get('freshness'):
+            st.caption(st.session_state['freshness'])
+        # Only the visible page is sent to the browser; search and sort run on the server
+        labels = close_approach_columns(fd, dist_unit)
+        show_paged_rows(fd, 'close_approaches', columns=list(labels), labels=labels, fingerprint=fingerprint)
         
-        # Download button for CSV
-        csv = fd.to_csv(index=False).encode('utf-8')
+        # Download button. The export is written in chunks only when it is downloaded, and
+        # downloading doesn't rerun the page.
+        export_format = st.selectbox(
+            "💾 Download Format",
+            available_formats(),
+            format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+            help="Compressed CSV opens in any spreadsheet; Parquet and Arrow IPC keep the column "
+                 "types and load fastest in pandas and other data tools."
+        )
         st.download_button(
-            label="📥 Download Data as CSV",
-            data=csv,
-            file_name='close_approaches_data.csv',
-            mime='text/csv',
+            label="📥 Download Data",
+            data=deferred_export(lambda fd=fd: frame_chunks(fd), export_format),
+            file_name=export_file_name('close_approaches_data', export_format),
+            mime=EXPORT_FORMATS[export_format][2],
+            on_click='ignore',
         )
         
         # Visualization options
@@ -461,17 +1076,63 @@ def main():
         with col2:
             show_prediction = st.checkbox("🔮 Show Predictive Analytics")
         
+        # Orbital elements for predicted approaches, from an upload or the local element file
+        predicted = None
+        if show_prediction:
+            elements_file = st.file_uploader(
+                "🛰️ Orbital Elements (CSV)",
+                type=['csv'],
+                help="Osculating elements with SBDB column names (des, epoch, e, a, i, om, w, ma). "
+                     f"Defaults to {ELEMENTS_PATH} if present."
+            )
+            elements_csv = None
+            if elements_file is not None:
+                elements_csv = elements_file.getvalue()
+            elif os.path.exists(ELEMENTS_PATH):
+                with open(ELEMENTS_PATH, 'rb') as f:
+                    elements_csv = f.read()
+            
+            if elements_csv is not None:
+                bodies = fd['body'].unique() if 'body' in fd.columns else [body_display]
+                body_codes = [BODY_CODES[str(body)] for body in bodies]
+                if 'Moon' in body_codes:
+                    st.info("ℹ️ Close approaches to the Moon are not predicted: the planetary "
+                            "elements only give the Earth-Moon barycenter, which can be as far "
+                            "from the Moon as a typical lunar close approach.")
+                body_codes = [code for code in body_codes if code in PLANET_ELEMENTS]
+                try:
+                    if body_codes:
+                        predicted = compute_predicted_approaches(
+                            elements_csv,
+                            body_codes,
+                            fd['cd'].min(),
+                            fd['cd'].max() + timedelta(days=180),
+                            float(fd['dist'].max())
+                        )
+                except ValueError as e:
+                    st.warning(f"⚠️ Could not propagate orbital elements: {e}")
+        
         # Visualization
-        visualize_close_approaches(fd, body_display, add_trendline=add_trendline, show_prediction=show_prediction)
+        visualize_close_approaches(fd, body_display, add_trendline=add_trendline,
+                                   show_prediction=show_prediction, predicted=predicted,
+                                   fingerprint=fingerprint)
         
         # Explanation of predictive analytics
-        if show_prediction:
+        if show_prediction and predicted is not None:
+            st.markdown("""
+            **About Predictive Analytics:**
+            - Red diamonds are close approaches predicted by propagating each object's orbital elements as a two-body (Sun-only) orbit
+            - Planet positions come from JPL's approximate mean planetary elements; the Earth uses the Earth-Moon barycenter, and the Moon is not predicted
+            - Planetary perturbations are ignored, so predictions drift from the real orbits over years and should not be considered authoritative
+            - For accurate predictions, NASA's specialized orbit calculation tools should be used
+            """)
+        elif show_prediction:
             st.markdown("""
             **About Predictive Analytics:**
             - The red dotted line shows predicted close approaches based on linear regression of historical data
             - The shaded area represents a simplified confidence interval (not a true statistical confidence interval)
             - Predictions are based only on the currently loaded data and should not be considered authoritative
-            - For accurate predictions, NASA's specialized orbit calculation tools should be used
+            - Upload an orbital element file above for physically predicted close approaches
             """)
     
     else:
@@ -480,6 +1141,8 @@ def main():
         else:
             st.info("🔍 Awaiting your search parameters. Use the sidebar to get started!")
     
+    show_memory_usage(fingerprint)
+    
     st.markdown("""
     ---
     **🛰️ Data Source:** JPL's SSD/CNEOS CAD API  
@@ -0,0 +1,197 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import AgnirvaCADClient
+from AgnirvaCADClient import CADQueryCache, decode_cad_dates, normalize_cad_query, parse_cad_payload
+
+FIELDS = ['des', 'orbit_id', 'jd', 'cd', 'dist', 'dist_min', 'dist_max', 'v_rel', 'v_inf',
+          't_sigma_f', 'h', 'diameter', 'fullname']
+
+# Clock used for 'now' in the normalization tests
+class FixedClock(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 3, 10, 14, 37, 21)
+
+@pytest.fixture
+def fixed_now(monkeypatch):
+    monkeypatch.setattr(AgnirvaCADClient, 'datetime', FixedClock)
+
+# Function to build a CAD row with the given designation, date and distance
+def cad_row(des, cd, dist):
+    return [des, '12', '2460000.5', cd, dist, dist, dist, '10.5', '10.4', '< 00:01', '22.1',
+            None, f"({des})"]
+
+# Function to build a CAD payload the way the API returns it
+def cad_payload(rows):
+    return {'signature': {'version': '1.5'}, 'count': str(len(rows)), 'fields': FIELDS, 'data': rows}
+
+def test_normalize_rounds_now_down_to_the_hour(fixed_now):
+    query = normalize_cad_query(date_min='now', date_max='+0')
+    assert query['date_min'] == datetime(2024, 3, 10, 14)
+    assert query['date_max'] == datetime(2024, 3, 11)
+
+def test_normalize_rounds_relative_end_up_to_the_next_midnight(fixed_now):
+    query = normalize_cad_query(date_min='now', date_max='+60')
+    assert query['date_max'] == datetime(2024, 5, 10)
+
+def test_normalize_queries_later_in_the_hour_match(monkeypatch):
+    class LaterClock(FixedClock):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2024, 3, 10, 14, 59, 59)
+
+    monkeypatch.setattr(AgnirvaCADClient, 'datetime', FixedClock)
+    first = normalize_cad_query()
+    monkeypatch.setattr(AgnirvaCADClient, 'datetime', LaterClock)
+    assert normalize_cad_query() == first
+
+def test_normalize_keeps_absolute_dates():
+    query = normalize_cad_query(date_min='2024-01-01', date_max='2024-02-01T06:30')
+    assert query['date_min'] == datetime(2024, 1, 1)
+    assert query['date_max'] == datetime(2024, 2, 1, 6, 30)
+
+def test_normalize_converts_lunar_distances_to_au():
+    query = normalize_cad_query(date_min='2024-01-01', date_max='2024-02-01', dist_max='10', dist_unit='LD')
+    assert query['dist_max_au'] == 0.0256955529
+
+def test_normalize_maps_unknown_object_types_to_both():
+    assert normalize_cad_query(date_min='2024-01-01', object_type='Both')['object_type'] == 'Both'
+    assert normalize_cad_query(date_min='2024-01-01', object_type='Comet')['object_type'] == 'Comet'
+
+@pytest.mark.parametrize('overrides', [
+    {'date_min': 'yesterday'},
+    {'date_max': '+soon'},
+    {'dist_max': 'far'},
+    {'dist_unit': 'km'},
+    {'limit': 'all'},
+])
+def test_normalize_rejects_invalid_parameters(overrides):
+    assert normalize_cad_query(**overrides) is None
+
+# Function to normalize an absolute query for the cache tests
+def query(date_min='2024-01-01', date_max='2024-12-31', dist_max='0.05', limit=100, body='Earth', object_type='NEO'):
+    return normalize_cad_query(body, date_min, date_max, dist_max, 'AU', limit, object_type)
+
+@pytest.fixture
+def cache():
+    cache = CADQueryCache()
+    cache.put(query(), cad_payload([
+        cad_row('A', '2024-Feb-01 00:00', '0.01'),
+        cad_row('B', '2024-Apr-15 12:00', '0.04'),
+        cad_row('C', '2024-Jul-20 06:30', '0.02'),
+        cad_row('D', '2024-Nov-30 23:59', '0.03'),
+    ]))
+    return cache
+
+def test_cache_answers_exact_query(cache):
+    data = cache.get(query())
+    assert [row[0] for row in data['data']] == ['A', 'B', 'C', 'D']
+
+def test_cache_answers_narrower_query_from_broader_entry(cache):
+    data = cache.get(query(date_min='2024-03-01', date_max='2024-10-01', dist_max='0.03'))
+    assert [row[0] for row in data['data']] == ['C']
+    assert data['count'] == '1'
+    assert data['fields'] == FIELDS
+
+def test_cache_applies_limit_of_narrower_query(cache):
+    data = cache.get(query(limit=2))
+    assert [row[0] for row in data['data']] == ['A', 'B']
+
+@pytest.mark.parametrize('overrides', [
+    {'body': 'Mars'},
+    {'object_type': 'Comet'},
+    {'date_min': '2023-12-01'},
+    {'date_max': '2025-01-31'},
+    {'dist_max': '0.1'},
+])
+def test_cache_misses_queries_outside_the_entry(cache, overrides):
+    assert cache.get(query(**overrides)) is None
+
+def test_cache_lookup_reports_fetch_time(cache):
+    data, fetched_at = cache.lookup(query(date_min='2024-06-01'))
+    assert [row[0] for row in data['data']] == ['C', 'D']
+    assert fetched_at is not None
+    assert cache.lookup(query(body='Venus')) == (None, None)
+
+def test_truncated_entry_only_covers_dates_before_its_last_row():
+    cache = CADQueryCache()
+    cache.put(query(limit=3), cad_payload([
+        cad_row('A', '2024-Feb-01 00:00', '0.01'),
+        cad_row('B', '2024-Apr-15 12:00', '0.04'),
+        cad_row('C', '2024-Jul-20 06:30', '0.02'),
+    ]))
+
+    data = cache.get(query(date_max='2024-06-30', limit=3))
+    assert [row[0] for row in data['data']] == ['A', 'B']
+    # Rows after the last one returned may exist, so the full window can't be answered
+    assert cache.get(query(dist_max='0.045', limit=3)) is None
+    assert cache.get(query(date_max='2024-07-20T06:30', limit=3)) is None
+
+def test_truncated_entry_answers_smaller_limit_it_fills():
+    cache = CADQueryCache()
+    cache.put(query(limit=3), cad_payload([
+        cad_row('A', '2024-Feb-01 00:00', '0.01'),
+        cad_row('B', '2024-Apr-15 12:00', '0.04'),
+        cad_row('C', '2024-Jul-20 06:30', '0.02'),
+    ]))
+    data = cache.get(query(limit=2))
+    assert [row[0] for row in data['data']] == ['A', 'B']
+
+def test_cache_evicts_least_recently_used_rows():
+    cache = CADQueryCache(max_rows=3)
+    cache.put(query(body='Earth'), cad_payload([cad_row('A', '2024-Feb-01 00:00', '0.01')] * 2))
+    cache.put(query(body='Mars'), cad_payload([cad_row('M', '2024-Feb-01 00:00', '0.01')] * 2))
+    assert cache.get(query(body='Earth')) is None
+    assert cache.get(query(body='Mars')) is not None
+
+def test_decode_cad_dates_reads_fixed_width_dates():
+    decoded = decode_cad_dates(['2024-Jan-05 12:34', '1999-Dec-31 23:59', '2100-Feb-28 00:00'])
+    expected = pd.to_datetime(['2024-01-05 12:34', '1999-12-31 23:59', '2100-02-28 00:00']).values
+    np.testing.assert_array_equal(decoded, expected)
+    assert decoded.dtype == np.dtype('datetime64[ns]')
+
+def test_decode_cad_dates_rejects_unknown_months():
+    with pytest.raises(ValueError):
+        decode_cad_dates(['2024-Foo-05 12:34'])
+
+def test_parse_cad_payload_types_columns():
+    fd = parse_cad_payload(cad_payload([
+        cad_row('A', '2024-Feb-01 00:00', '0.01'),
+        cad_row('B', '2024-Apr-15 12:00', '0.04'),
+    ]))
+    assert list(fd.columns) == FIELDS
+    assert isinstance(fd['des'].dtype, pd.CategoricalDtype)
+    assert isinstance(fd['t_sigma_f'].dtype, pd.CategoricalDtype)
+    assert fd['dist'].dtype == np.float64
+    assert fd['cd'].dtype == np.dtype('datetime64[ns]')
+    assert fd['fullname'].dtype == 'string'
+    assert fd['cd'].tolist() == [pd.Timestamp('2024-02-01'), pd.Timestamp('2024-04-15 12:00')]
+    assert fd['dist'].tolist() == [0.01, 0.04]
+
+def test_parse_cad_payload_turns_missing_values_into_nan():
+    fd = parse_cad_payload(cad_payload([cad_row('A', '2024-Feb-01 00:00', '0.01')]))
+    assert fd['diameter'].dtype == np.float64
+    assert np.isnan(fd['diameter'].iloc[0])
+
+def test_parse_cad_payload_keeps_unknown_fields_as_strings():
+    fd = parse_cad_payload({'fields': ['des', 'extra'], 'data': [['A', '1']]})
+    assert fd['extra'].dtype == 'string'
+
+@pytest.mark.parametrize('payload', [
+    {'signature': {'version': '1.5'}, 'count': '0', 'fields': FIELDS},
+    {'count': '0', 'fields': FIELDS, 'data': []},
+    {'count': '0', 'fields': FIELDS, 'data': None},
+])
+def test_parse_cad_payload_handles_empty_results(payload):
+    fd = parse_cad_payload(payload)
+    assert fd.empty
+    assert list(fd.columns) == FIELDS
+    assert fd['cd'].dtype == np.dtype('datetime64[ns]')
+    assert fd['dist'].dtype == np.float64
+
+def test_parse_cad_payload_without_fields_is_empty():
+    assert parse_cad_payload({'count': '0'}).empty
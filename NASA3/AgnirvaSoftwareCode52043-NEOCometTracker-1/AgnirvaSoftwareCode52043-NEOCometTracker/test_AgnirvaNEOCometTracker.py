@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from AgnirvaNEOCometTracker import GAUSS_K, orbit_state, solve_kepler
+
+@pytest.mark.parametrize('e', [0.0, 0.1, 0.5, 0.9, 0.99])
+def test_solve_kepler_satisfies_keplers_equation(e):
+    mean_anomaly = np.linspace(-3 * np.pi, 3 * np.pi, 721)
+    E = solve_kepler(mean_anomaly, e)
+    wrapped = np.remainder(mean_anomaly + np.pi, 2 * np.pi) - np.pi
+    np.testing.assert_allclose(E - e * np.sin(E), wrapped, atol=1e-10)
+
+def test_solve_kepler_broadcasts_eccentricities():
+    mean_anomaly = np.array([[0.3], [2.0], [-1.2]])
+    e = np.array([0.05, 0.6, 0.95])
+    E = solve_kepler(mean_anomaly, e)
+    assert E.shape == (3, 3)
+    np.testing.assert_allclose(E - e * np.sin(E), np.broadcast_to(mean_anomaly, (3, 3)), atol=1e-10)
+
+def test_circular_orbit_keeps_its_radius_and_speed():
+    mean_anomaly = np.linspace(0, 2 * np.pi, 50)
+    position, velocity = orbit_state(2.0, 0.0, 0.3, 1.1, 0.4, mean_anomaly)
+    assert position.shape == velocity.shape == (50, 3)
+    np.testing.assert_allclose(np.linalg.norm(position, axis=-1), 2.0)
+    np.testing.assert_allclose(np.linalg.norm(velocity, axis=-1), GAUSS_K / np.sqrt(2.0))
+
+def test_orbit_state_velocity_matches_position_change():
+    a, e, inc, node, peri = 1.5, 0.4, 0.2, 0.7, 1.9
+    n = GAUSS_K / a ** 1.5
+    mean_anomaly = np.array([0.1, 1.0, 2.5, -2.0])
+    step = 1e-3
+    position, velocity = orbit_state(a, e, inc, node, peri, mean_anomaly)
+    before, _ = orbit_state(a, e, inc, node, peri, mean_anomaly - n * step, with_velocity=False)
+    after, _ = orbit_state(a, e, inc, node, peri, mean_anomaly + n * step, with_velocity=False)
+    np.testing.assert_allclose((after - before) / (2 * step), velocity, rtol=1e-5)
+
+def test_orbit_state_skips_velocity_when_not_needed():
+    position, velocity = orbit_state(1.0, 0.1, 0.0, 0.0, 0.0, np.array([0.5]), with_velocity=False)
+    assert velocity is None
+    assert position.shape == (1, 3)
@@ -0,0 +1,119 @@
+import os  # Import os to create the cube's folder (Commented by Agnirva.com)
+import sqlite3  # Import sqlite3 for the on-disk cube (Commented by Agnirva.com)
+import threading  # Import threading to share the connection between worker threads (Commented by Agnirva.com)
+import time  # Import time to age open months (Commented by Agnirva.com)
+
+import pandas as pd  # Import pandas for aggregation and query results (Commented by Agnirva.com)
+
+from AgnirvaDONKIFlattener import Agnirvaflatten_events  # Import the flattener to read event attributes (Commented by Agnirva.com)
+
+# Key metric stored per event type alongside the daily count (Commented by Agnirva.com)
+AgnirvaCUBE_METRICS = {  # Flattened column summarised for each event type (Commented by Agnirva.com)
+    "CME": ("speed", "CME Speed (km/s)"),  # CME speed from the most accurate analysis (Commented by Agnirva.com)
+    "FLR": ("peakFlux", "Peak X-ray Flux (W/m²)"),  # Flare class as X-ray flux (Commented by Agnirva.com)
+    "GST": ("kpIndexMax", "Peak Kp Index"),  # Storm peak Kp (Commented by Agnirva.com)
+}
+
+# Resolutions the cube can be rolled up to, with the SQL expression giving each day's period start (Commented by Agnirva.com)
+AgnirvaCUBE_RESOLUTIONS = {"D": "Daily", "W": "Weekly", "M": "Monthly", "Y": "Yearly"}  # Resolution names (Commented by Agnirva.com)
+AgnirvaCUBE_PERIOD_SQL = {  # Period start for each resolution (Commented by Agnirva.com)
+    "D": "day",  # Days as they are (Commented by Agnirva.com)
+    "W": "date(day, 'weekday 0', '-6 days')",  # Monday of the week (Commented by Agnirva.com)
+    "M": "strftime('%Y-%m-01', day)",  # First day of the month (Commented by Agnirva.com)
+    "Y": "strftime('%Y-01-01', day)",  # First day of the year (Commented by Agnirva.com)
+}
+
+# Function to pick the trend resolution that suits a date span (Commented by Agnirva.com)
+def Agnirvacube_resolution_for_span(Agnirvaspan_days):  # Define function to choose a resolution (Commented by Agnirva.com)
+    if Agnirvaspan_days <= 120:  # Up to about four months (Commented by Agnirva.com)
+        return "D"  # Show daily values (Commented by Agnirva.com)
+    if Agnirvaspan_days <= 3 * 366:  # Up to three years (Commented by Agnirva.com)
+        return "W"  # Show weekly values (Commented by Agnirva.com)
+    if Agnirvaspan_days <= 15 * 366:  # Up to fifteen years (Commented by Agnirva.com)
+        return "M"  # Show monthly values (Commented by Agnirva.com)
+    return "Y"  # Show yearly values for longer spans (Commented by Agnirva.com)
+
+# Function to aggregate flattened events of one month per day: event count, and peak, sum and number of known values of the key metric (Commented by Agnirva.com)
+def Agnirvadaily_rollup(Agnirvaevent, Agnirvadf, Agnirvadate_field, Agnirvamonth):  # Define function to build daily rollups (Commented by Agnirva.com)
+    Agnirvadays = pd.to_datetime(Agnirvadf[Agnirvadate_field], errors="coerce").dt.strftime("%Y-%m-%d") if Agnirvadate_field in Agnirvadf.columns else pd.Series(dtype=object)  # Day of each event (Commented by Agnirva.com)
+    Agnirvametric = AgnirvaCUBE_METRICS.get(Agnirvaevent, (None,))[0]  # Metric column of this event type (Commented by Agnirva.com)
+    Agnirvavalues = Agnirvadf[Agnirvametric] if Agnirvametric in Agnirvadf.columns else pd.Series(float("nan"), index=Agnirvadf.index)  # Metric values (Commented by Agnirva.com)
+    Agnirvadaily = pd.DataFrame({"day": Agnirvadays, "value": Agnirvavalues})  # Day and metric per event (Commented by Agnirva.com)
+    Agnirvadaily = Agnirvadaily[Agnirvadaily["day"].str.startswith(Agnirvamonth, na=False)]  # Only days of this month, so refreshes never double count (Commented by Agnirva.com)
+    Agnirvadaily = Agnirvadaily.groupby("day")["value"].agg(["size", "max", "sum", "count"]).reset_index()  # Aggregate per day (Commented by Agnirva.com)
+    return Agnirvadaily.set_axis(["day", "count", "metric_max", "metric_sum", "metric_n"], axis=1)  # Return the rollup with the cube's column names (Commented by Agnirva.com)
+
+# Persistent cube of daily activity per event type, kept in step with the month shards (Commented by Agnirva.com)
+class AgnirvaActivityCube:  # Define the activity cube (Commented by Agnirva.com)
+    def __init__(self, Agnirvapath, Agnirvaopen_month_ttl=3600):  # Open or create the cube (Commented by Agnirva.com)
+        if os.path.dirname(Agnirvapath):  # If the cube lives in a folder (Commented by Agnirva.com)
+            os.makedirs(os.path.dirname(Agnirvapath), exist_ok=True)  # Create the folder if needed (Commented by Agnirva.com)
+        self.Agnirvaopen_month_ttl = Agnirvaopen_month_ttl  # Seconds before an open month is refreshed (Commented by Agnirva.com)
+        self.Agnirvalock = threading.Lock()  # Serialise access from worker threads (Commented by Agnirva.com)
+        self.Agnirvaconnection = sqlite3.connect(Agnirvapath, check_same_thread=False)  # Open the database (Commented by Agnirva.com)
+        self.Agnirvaconnection.executescript("""
+            CREATE TABLE IF NOT EXISTS daily_activity (
+                event TEXT NOT NULL,
+                day TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                metric_max REAL,
+                metric_sum REAL,
+                metric_n INTEGER NOT NULL,
+                PRIMARY KEY (event, day)
+            );
+            CREATE TABLE IF NOT EXISTS cube_months (
+                event TEXT NOT NULL,
+                month TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                closed INTEGER NOT NULL,
+                PRIMARY KEY (event, month)
+            );
+        """)  # Daily aggregates and the shard each month was built from (Commented by Agnirva.com)
+
+    # Function to list which months of an event are up to date in the cube (Commented by Agnirva.com)
+    def Agnirvafresh_months(self, Agnirvaevent, Agnirvamonths):  # Define method to find fresh months (Commented by Agnirva.com)
+        Agnirvacutoff = time.time() - self.Agnirvaopen_month_ttl  # Open months built before this are stale (Commented by Agnirva.com)
+        with self.Agnirvalock:  # Read under the lock (Commented by Agnirva.com)
+            Agnirvarows = self.Agnirvaconnection.execute(  # Query the months of this event (Commented by Agnirva.com)
+                "SELECT month FROM cube_months WHERE event = ? AND (closed = 1 OR fetched_at >= ?)",  # Closed months never change (Commented by Agnirva.com)
+                (Agnirvaevent, Agnirvacutoff)  # Query parameters (Commented by Agnirva.com)
+            ).fetchall()  # Fetch the rows (Commented by Agnirva.com)
+        return {Agnirvarow[0] for Agnirvarow in Agnirvarows} & set(Agnirvamonths)  # Return the fresh months asked about (Commented by Agnirva.com)
+
+    # Function to replace one month of an event with aggregates of its shard; skipped when already built from that shard (Commented by Agnirva.com)
+    def Agnirvaupdate_month(self, Agnirvaevent, Agnirvamonth, Agnirvashard, Agnirvadate_field):  # Define method to update a month (Commented by Agnirva.com)
+        with self.Agnirvalock:  # Check under the lock (Commented by Agnirva.com)
+            Agnirvarow = self.Agnirvaconnection.execute(  # Look up when the month was last built (Commented by Agnirva.com)
+                "SELECT fetched_at FROM cube_months WHERE event = ? AND month = ?", (Agnirvaevent, Agnirvamonth)  # Query the month (Commented by Agnirva.com)
+            ).fetchone()  # Fetch the row (Commented by Agnirva.com)
+        if Agnirvarow is not None and Agnirvarow[0] == Agnirvashard["fetched_at"]:  # Same shard as last time (Commented by Agnirva.com)
+            return  # Nothing to update (Commented by Agnirva.com)
+
+        Agnirvadaily = Agnirvadaily_rollup(Agnirvaevent, Agnirvaflatten_events(Agnirvaevent, Agnirvashard["data"]), Agnirvadate_field, Agnirvamonth)  # Aggregate the month's events per day (Commented by Agnirva.com)
+
+        with self.Agnirvalock, self.Agnirvaconnection:  # Replace the month in one transaction (Commented by Agnirva.com)
+            self.Agnirvaconnection.execute("DELETE FROM daily_activity WHERE event = ? AND day LIKE ?", (Agnirvaevent, f"{Agnirvamonth}-%"))  # Drop the old days (Commented by Agnirva.com)
+            self.Agnirvaconnection.executemany(  # Insert the new days (Commented by Agnirva.com)
+                "INSERT INTO daily_activity VALUES (?, ?, ?, ?, ?, ?)",  # One row per day (Commented by Agnirva.com)
+                [(Agnirvaevent, Agnirvaday, int(Agnirvacount), None if pd.isna(Agnirvamax) else float(Agnirvamax), float(Agnirvasum), int(Agnirvan))  # Row values (Commented by Agnirva.com)
+                 for Agnirvaday, Agnirvacount, Agnirvamax, Agnirvasum, Agnirvan in Agnirvadaily.itertuples(index=False)]  # Loop over the days (Commented by Agnirva.com)
+            )
+            self.Agnirvaconnection.execute(  # Remember which shard the month was built from (Commented by Agnirva.com)
+                "INSERT OR REPLACE INTO cube_months VALUES (?, ?, ?, ?)",  # One row per month (Commented by Agnirva.com)
+                (Agnirvaevent, Agnirvamonth, Agnirvashard["fetched_at"], int(Agnirvashard["closed"]))  # Row values (Commented by Agnirva.com)
+            )
+
+    # Function to read activity for event types and a date range, rolled up to the given resolution (Commented by Agnirva.com)
+    def Agnirvaquery(self, Agnirvaevents, Agnirvastart, Agnirvaend, Agnirvaresolution="D"):  # Define method to query the cube (Commented by Agnirva.com)
+        Agnirvaperiod = AgnirvaCUBE_PERIOD_SQL[Agnirvaresolution]  # Period expression for the resolution (Commented by Agnirva.com)
+        Agnirvaplaceholders = ", ".join("?" for _ in Agnirvaevents)  # One placeholder per event type (Commented by Agnirva.com)
+        with self.Agnirvalock:  # Read under the lock (Commented by Agnirva.com)
+            Agnirvaresult = pd.read_sql_query(  # Aggregate in SQLite (Commented by Agnirva.com)
+                f"SELECT event, {Agnirvaperiod} AS period, SUM(count) AS count, MAX(metric_max) AS metric_max, "  # Totals and peaks per period (Commented by Agnirva.com)
+                f"SUM(metric_sum) / NULLIF(SUM(metric_n), 0) AS metric_mean FROM daily_activity "  # Mean of the metric per period (Commented by Agnirva.com)
+                f"WHERE event IN ({Agnirvaplaceholders}) AND day BETWEEN ? AND ? GROUP BY event, period ORDER BY period",  # Filter and group (Commented by Agnirva.com)
+                self.Agnirvaconnection,  # Use the cube's connection (Commented by Agnirva.com)
+                params=[*Agnirvaevents, Agnirvastart.isoformat(), Agnirvaend.isoformat()]  # Query parameters (Commented by Agnirva.com)
+            )
+        Agnirvaresult["period"] = pd.to_datetime(Agnirvaresult["period"])  # Period starts as datetimes (Commented by Agnirva.com)
+        return Agnirvaresult  # Return the activity (Commented by Agnirva.com)
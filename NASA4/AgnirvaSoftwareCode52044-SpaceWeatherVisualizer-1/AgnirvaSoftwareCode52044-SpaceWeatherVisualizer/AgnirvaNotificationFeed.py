@@ -0,0 +1,107 @@
+import threading  # Import threading so sessions can share the feed (Commented by Agnirva.com)
+import time  # Import time to space out polls (Commented by Agnirva.com)
+from collections import Counter, deque  # Import containers for the ring buffer and the daily counts (Commented by Agnirva.com)
+from datetime import timedelta  # Import timedelta for the initial window (Commented by Agnirva.com)
+
+import pandas as pd  # Import pandas for the chart and table data (Commented by Agnirva.com)
+
+# Columns of the live notifications table (Commented by Agnirva.com)
+AgnirvaFEED_COLUMNS = ["messageIssueTime", "messageType", "messageID", "messageURL"]  # Fields shown for each message (Commented by Agnirva.com)
+
+# Bounded buffer of the newest DONKI notifications, shared by every session and filled by polling only for new messages (Commented by Agnirva.com)
+class AgnirvaNotificationFeed:  # Define the live notification feed (Commented by Agnirva.com)
+    def __init__(self, Agnirvacapacity=5000, Agnirvapoll_interval=60, Agnirvawindow_days=30, Agnirvamax_backoff=900):  # Create an empty feed (Commented by Agnirva.com)
+        self.Agnirvapoll_interval = Agnirvapoll_interval  # Seconds between polls, whatever the number of viewers (Commented by Agnirva.com)
+        self.Agnirvamax_backoff = Agnirvamax_backoff  # Longest wait between polls after repeated failures (Commented by Agnirva.com)
+        self.Agnirvapoll_delay = Agnirvapoll_interval  # Seconds to wait before the next poll, doubled after each failed poll (Commented by Agnirva.com)
+        self.Agnirvawindow_days = Agnirvawindow_days  # Days of messages kept, counting today (Commented by Agnirva.com)
+        self.Agnirvacapacity = Agnirvacapacity  # Most messages kept (Commented by Agnirva.com)
+        self.Agnirvabuffer = deque()  # Buffer of (sequence, message) pairs in arrival order; DONKI can back-date messages, so this is not always issue order (Commented by Agnirva.com)
+        self.Agnirvaseen = set()  # Message IDs in the buffer (Commented by Agnirva.com)
+        self.Agnirvacounts = Counter()  # Messages per (day, message type) in the buffer (Commented by Agnirva.com)
+        self.Agnirvasequence = 0  # Sequence number of the newest message (Commented by Agnirva.com)
+        self.Agnirvanewest = None  # Issue time of the newest message (Commented by Agnirva.com)
+        self.Agnirvalast_poll = 0.0  # When the feed was last polled (Commented by Agnirva.com)
+        self.Agnirvalock = threading.Lock()  # Guards the buffer and counts (Commented by Agnirva.com)
+        self.Agnirvapoll_lock = threading.Lock()  # Lets only one session poll at a time (Commented by Agnirva.com)
+
+    # Function to keep only the messages for which keep(sequence, message) is true, wherever they are in the buffer; the caller holds the lock. Returns the number dropped (Commented by Agnirva.com)
+    def Agnirvadiscard(self, Agnirvakeep):  # Define method to drop messages (Commented by Agnirva.com)
+        Agnirvakept = deque()  # Messages that stay, in arrival order (Commented by Agnirva.com)
+        for Agnirvanumber, Agnirvarecord in self.Agnirvabuffer:  # Loop over the buffer (Commented by Agnirva.com)
+            if Agnirvakeep(Agnirvanumber, Agnirvarecord):  # If the message stays (Commented by Agnirva.com)
+                Agnirvakept.append((Agnirvanumber, Agnirvarecord))  # Keep it (Commented by Agnirva.com)
+            else:  # If the message goes (Commented by Agnirva.com)
+                self.Agnirvaseen.discard(Agnirvarecord["messageID"])  # Forget its ID (Commented by Agnirva.com)
+                self.Agnirvacounts[(Agnirvarecord["messageIssueTime"][:10], Agnirvarecord.get("messageType"))] -= 1  # Remove it from the counts (Commented by Agnirva.com)
+        Agnirvadropped = len(self.Agnirvabuffer) - len(Agnirvakept)  # Number of messages dropped (Commented by Agnirva.com)
+        self.Agnirvabuffer = Agnirvakept  # Swap in the kept messages (Commented by Agnirva.com)
+        self.Agnirvacounts += Counter()  # Drop counts that reached zero (Commented by Agnirva.com)
+        return Agnirvadropped  # Return the number of messages dropped (Commented by Agnirva.com)
+
+    # Function to append messages, then evict the earliest issued ones when the buffer is over capacity (Commented by Agnirva.com)
+    def Agnirvaappend(self, Agnirvarecords):  # Define method to add messages (Commented by Agnirva.com)
+        Agnirvanew = [Agnirvarecord for Agnirvarecord in Agnirvarecords if Agnirvarecord.get("messageID") and Agnirvarecord.get("messageIssueTime") and Agnirvarecord["messageID"] not in self.Agnirvaseen]  # Messages not seen before (Commented by Agnirva.com)
+        Agnirvanew.sort(key=lambda Agnirvarecord: Agnirvarecord["messageIssueTime"])  # Oldest first (Commented by Agnirva.com)
+        with self.Agnirvalock:  # Update under the lock (Commented by Agnirva.com)
+            for Agnirvarecord in Agnirvanew:  # Loop over the new messages (Commented by Agnirva.com)
+                if Agnirvarecord["messageID"] in self.Agnirvaseen:  # Duplicated within the same poll (Commented by Agnirva.com)
+                    continue  # Skip it (Commented by Agnirva.com)
+                self.Agnirvasequence += 1  # Number the message (Commented by Agnirva.com)
+                self.Agnirvabuffer.append((self.Agnirvasequence, Agnirvarecord))  # Add it to the buffer (Commented by Agnirva.com)
+                self.Agnirvaseen.add(Agnirvarecord["messageID"])  # Remember its ID (Commented by Agnirva.com)
+                self.Agnirvacounts[(Agnirvarecord["messageIssueTime"][:10], Agnirvarecord.get("messageType"))] += 1  # Add it to the counts (Commented by Agnirva.com)
+                self.Agnirvanewest = max(self.Agnirvanewest or "", Agnirvarecord["messageIssueTime"])  # Track the newest issue time (Commented by Agnirva.com)
+            Agnirvaexcess = len(self.Agnirvabuffer) - self.Agnirvacapacity  # Messages over capacity (Commented by Agnirva.com)
+            if Agnirvaexcess > 0:  # If the buffer is over capacity (Commented by Agnirva.com)
+                Agnirvaoldest = sorted(self.Agnirvabuffer, key=lambda Agnirvaitem: (Agnirvaitem[1]["messageIssueTime"], Agnirvaitem[0]))[:Agnirvaexcess]  # Earliest issued messages, by issue time rather than arrival (Commented by Agnirva.com)
+                Agnirvaevicted = {Agnirvanumber for Agnirvanumber, _ in Agnirvaoldest}  # Their sequence numbers (Commented by Agnirva.com)
+                self.Agnirvadiscard(lambda Agnirvanumber, _: Agnirvanumber not in Agnirvaevicted)  # Evict them (Commented by Agnirva.com)
+        return len(Agnirvanew)  # Return the number of messages added (Commented by Agnirva.com)
+
+    # Function to drop the messages issued before the window, so the counts cover only its days (Commented by Agnirva.com)
+    def Agnirvatrim(self, Agnirvatoday):  # Define method to drop old messages (Commented by Agnirva.com)
+        Agnirvafirst_day = (Agnirvatoday - timedelta(days=self.Agnirvawindow_days - 1)).isoformat()  # First day kept (Commented by Agnirva.com)
+        with self.Agnirvalock:  # Update under the lock (Commented by Agnirva.com)
+            return self.Agnirvadiscard(lambda _, Agnirvarecord: Agnirvarecord["messageIssueTime"][:10] >= Agnirvafirst_day)  # Filter on the issue time, since back-dated messages can sit anywhere in the buffer (Commented by Agnirva.com)
+
+    # Function to fetch messages issued since the newest one seen; fetch(start, end) returns DONKI records. Returns the number added, or None when another poll is running or one ran recently. Failed polls are spaced out with an exponential backoff (Commented by Agnirva.com)
+    def Agnirvapoll(self, Agnirvafetch, Agnirvatoday):  # Define method to poll for new messages (Commented by Agnirva.com)
+        if not self.Agnirvapoll_lock.acquire(blocking=False):  # Another session is already polling (Commented by Agnirva.com)
+            return None  # Its results will be shared (Commented by Agnirva.com)
+        Agnirvasucceeded = None  # Whether this poll fetched the messages, None while it has not started (Commented by Agnirva.com)
+        try:  # Poll while holding the lock (Commented by Agnirva.com)
+            if time.time() - self.Agnirvalast_poll < self.Agnirvapoll_delay:  # Polled recently, or backing off after a failure (Commented by Agnirva.com)
+                return None  # Nothing to do yet (Commented by Agnirva.com)
+            Agnirvasucceeded = False  # The poll has started (Commented by Agnirva.com)
+            if self.Agnirvanewest is None:  # If the feed is empty (Commented by Agnirva.com)
+                Agnirvastart = Agnirvatoday - timedelta(days=self.Agnirvawindow_days - 1)  # Load the whole window once (Commented by Agnirva.com)
+            else:  # If the feed has messages (Commented by Agnirva.com)
+                Agnirvastart = min(pd.Timestamp(self.Agnirvanewest[:10]).date(), Agnirvatoday)  # DONKI filters by day, so ask from the newest message's day (Commented by Agnirva.com)
+            Agnirvaadded = self.Agnirvaappend(Agnirvafetch(Agnirvastart, Agnirvatoday))  # Fetch and append the new messages (Commented by Agnirva.com)
+            self.Agnirvatrim(Agnirvatoday)  # Drop messages that left the window, including back-dated ones just fetched (Commented by Agnirva.com)
+            Agnirvasucceeded = True  # The poll worked (Commented by Agnirva.com)
+            return Agnirvaadded  # Return the number of new messages (Commented by Agnirva.com)
+        finally:  # Whether the poll worked or failed (Commented by Agnirva.com)
+            if Agnirvasucceeded is not None:  # If a poll was made (Commented by Agnirva.com)
+                self.Agnirvalast_poll = time.time()  # Remember the poll time, so a failing API is not asked again by every session at once (Commented by Agnirva.com)
+                self.Agnirvapoll_delay = self.Agnirvapoll_interval if Agnirvasucceeded else min(self.Agnirvapoll_delay * 2, self.Agnirvamax_backoff)  # Back off after a failure, up to the limit (Commented by Agnirva.com)
+            self.Agnirvapoll_lock.release()  # Let the next poll run (Commented by Agnirva.com)
+
+    # Function to read the number of messages per day and type (Commented by Agnirva.com)
+    def Agnirvadaily_counts(self):  # Define method to read the counts (Commented by Agnirva.com)
+        with self.Agnirvalock:  # Read under the lock (Commented by Agnirva.com)
+            Agnirvarows = [(Agnirvaday, Agnirvatype, Agnirvacount) for (Agnirvaday, Agnirvatype), Agnirvacount in self.Agnirvacounts.items()]  # Copy the counts (Commented by Agnirva.com)
+        Agnirvaresult = pd.DataFrame(Agnirvarows, columns=["date", "messageType", "count"])  # Counts as a DataFrame (Commented by Agnirva.com)
+        Agnirvaresult["date"] = pd.to_datetime(Agnirvaresult["date"])  # Days as datetimes (Commented by Agnirva.com)
+        return Agnirvaresult.sort_values("date")  # Return the counts in date order (Commented by Agnirva.com)
+
+    # Function to read the messages newer than a sequence number, newest first, up to a limit (Commented by Agnirva.com)
+    def Agnirvamessages_since(self, Agnirvasequence=0, Agnirvalimit=None):  # Define method to read recent messages (Commented by Agnirva.com)
+        with self.Agnirvalock:  # Read under the lock (Commented by Agnirva.com)
+            Agnirvarecords = []  # Messages to return (Commented by Agnirva.com)
+            for Agnirvanumber, Agnirvarecord in reversed(self.Agnirvabuffer):  # Walk from the newest message (Commented by Agnirva.com)
+                if Agnirvanumber <= Agnirvasequence or (Agnirvalimit is not None and len(Agnirvarecords) >= Agnirvalimit):  # Reached older messages or the limit (Commented by Agnirva.com)
+                    break  # Stop walking (Commented by Agnirva.com)
+                Agnirvarecords.append({Agnirvacolumn: Agnirvarecord.get(Agnirvacolumn) for Agnirvacolumn in AgnirvaFEED_COLUMNS})  # Keep the table fields (Commented by Agnirva.com)
+            return pd.DataFrame(Agnirvarecords, columns=AgnirvaFEED_COLUMNS), self.Agnirvasequence  # Return the messages and the newest sequence number (Commented by Agnirva.com)
@@ -0,0 +1,328 @@
+import argparse  # Import argparse for the command line (Commented by Agnirva.com)
+import calendar  # Import calendar to find the length of each month (Commented by Agnirva.com)
+import hashlib  # Import hashlib to fingerprint the cached months behind a view (Commented by Agnirva.com)
+import json  # Import json to read and write cached month shards (Commented by Agnirva.com)
+import logging  # Import logging to report export progress (Commented by Agnirva.com)
+import os  # Import os for cache and export file paths (Commented by Agnirva.com)
+import sys  # Import sys to find the modules shared by the Agnirva apps (Commented by Agnirva.com)
+import threading  # Import threading to guard the shared shard memory (Commented by Agnirva.com)
+import time  # Import time to age the current month's shard (Commented by Agnirva.com)
+from collections import OrderedDict  # Import OrderedDict for the least recently used shard memory (Commented by Agnirva.com)
+from concurrent.futures import ThreadPoolExecutor, as_completed  # Import thread pool tools for concurrent API requests (Commented by Agnirva.com)
+from datetime import date, datetime, timedelta  # Import date tools for month ranges (Commented by Agnirva.com)
+
+import requests  # Import the requests library for making HTTP requests (Commented by Agnirva.com)
+
+# Modules shared by the Agnirva apps live in the AgnirvaCommon folder at the top of the repository; set AGNIRVA_COMMON to use a copy somewhere else (Commented by Agnirva.com)
+AgnirvaCOMMON_DIR = os.environ.get("AGNIRVA_COMMON", os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir, "AgnirvaCommon")))  # Folder of the shared modules (Commented by Agnirva.com)
+if AgnirvaCOMMON_DIR not in sys.path:  # If it is not importable yet (Commented by Agnirva.com)
+    sys.path.append(AgnirvaCOMMON_DIR)  # Make the shared modules importable (Commented by Agnirva.com)
+
+from AgnirvaActivityCube import AgnirvaActivityCube, Agnirvadaily_rollup  # Import the activity cube and its daily rollups (Commented by Agnirva.com)
+from AgnirvaDONKIFlattener import Agnirvaflatten_events  # Import the schema-driven flattener for DONKI payloads (Commented by Agnirva.com)
+from AgnirvaEventGraph import AgnirvaEventGraph  # Import the linked-event graph (Commented by Agnirva.com)
+from AgnirvaNASAHttpClient import BackgroundRefresher, NASAHttpClient, SingleFlight, describe_error, redact  # Import the shared rate-limited, retrying HTTP client, request coalescing and background refreshes (Commented by Agnirva.com)
+
+Agnirvalogger = logging.getLogger("agnirva.space_weather")  # Logger for the batch export (Commented by Agnirva.com)
+
+# DONKI request settings (Commented by Agnirva.com)
+AgnirvaDONKI_BASE_URL = "https://api.nasa.gov/DONKI"  # Base URL shared by all DONKI endpoints (Commented by Agnirva.com)
+AgnirvaOVERVIEW_MAX_WORKERS = 4  # Maximum number of DONKI requests in flight at once (Commented by Agnirva.com)
+AgnirvaDONKI_TIMEOUTS = {  # Read timeout in seconds per endpoint; CME and notifications responses are the largest (Commented by Agnirva.com)
+    "CME": 60,  # Timeout for CME (Commented by Agnirva.com)
+    "notifications": 60,  # Timeout for notifications (Commented by Agnirva.com)
+}
+AgnirvaDEFAULT_TIMEOUT = 30  # Read timeout in seconds for the other endpoints (Commented by Agnirva.com)
+AgnirvaCONNECT_TIMEOUT = 10  # Connection timeout in seconds for every endpoint (Commented by Agnirva.com)
+
+# Month-sharded disk cache settings (Commented by Agnirva.com)
+AgnirvaCACHE_DIR = os.environ.get("AGNIRVA_DONKI_CACHE", os.path.join(os.path.expanduser("~"), ".agnirva", "donki_cache"))  # Folder holding one JSON file per event type and month (Commented by Agnirva.com)
+AgnirvaOPEN_MONTH_TTL = 3600  # Seconds before a shard of a month that was not over yet is fetched again (Commented by Agnirva.com)
+AgnirvaCUBE_PATH = os.environ.get("AGNIRVA_ACTIVITY_CUBE", os.path.join(os.path.expanduser("~"), ".agnirva", "activity_cube.sqlite"))  # SQLite file holding daily activity per event type (Commented by Agnirva.com)
+AgnirvaGRAPH_PATH = os.environ.get("AGNIRVA_EVENT_GRAPH", os.path.join(os.path.expanduser("~"), ".agnirva", "event_graph.sqlite"))  # SQLite file holding the linked-event graph (Commented by Agnirva.com)
+AgnirvaMAX_REQUEST_DAYS = {"notifications": 30}  # Endpoints that reject date ranges longer than this many days (Commented by Agnirva.com)
+AgnirvaMONTH_FLIGHTS = SingleFlight()  # Month fetches in progress, shared by every session and thread in the process (Commented by Agnirva.com)
+AgnirvaSHARD_MEMORY_ENTRIES = 128  # Parsed month shards kept in memory and shared by every session (Commented by Agnirva.com)
+AgnirvaSHARD_MEMORY = OrderedDict()  # Parsed shards keyed by path, with the file version they were read from (Commented by Agnirva.com)
+AgnirvaSHARD_MEMORY_LOCK = threading.Lock()  # Guards the shard memory (Commented by Agnirva.com)
+AgnirvaMONTH_REFRESHER = BackgroundRefresher()  # Background refreshes of stale month shards (Commented by Agnirva.com)
+
+# Define date field mapping (Commented by Agnirva.com)
+Agnirvadate_field_mapping = {  # Mapping of event types to their date fields (Commented by Agnirva.com)
+    "CME": "startTime",  # Date field for CME (Commented by Agnirva.com)
+    "GST": "startTime",  # Date field for GST (Commented by Agnirva.com)
+    "FLR": "beginTime",  # Date field for FLR (Commented by Agnirva.com)
+    "SEP": "eventTime",  # Date field for SEP (Commented by Agnirva.com)
+    "IPS": "eventTime",  # Date field for IPS (Commented by Agnirva.com)
+    "RBE": "eventTime",  # Date field for RBE (Commented by Agnirva.com)
+    "MPC": "eventTime",  # Date field for MPC (Commented by Agnirva.com)
+    "HSS": "eventTime",  # Date field for HSS (Commented by Agnirva.com)
+    "notifications": "messageIssueTime"  # Date field for notifications (Commented by Agnirva.com)
+}
+
+# Every DONKI endpoint, in the order the app lists them (Commented by Agnirva.com)
+AgnirvaDONKI_EVENTS = ["CME", "GST", "FLR", "SEP", "IPS", "RBE", "MPC", "HSS", "notifications"]  # Endpoint codes (Commented by Agnirva.com)
+
+# Function to create an HTTP client whose connection pool fits the number of parallel requests; it rate limits and retries every request (Commented by Agnirva.com)
+def Agnirvacreate_http_session(Agnirvamax_workers=AgnirvaOVERVIEW_MAX_WORKERS):  # Define function to create a pooled client (Commented by Agnirva.com)
+    return NASAHttpClient(pool_size=Agnirvamax_workers)  # Return the client (Commented by Agnirva.com)
+
+# Function to build the query parameters for a DONKI request (Commented by Agnirva.com)
+def Agnirvabuild_donki_params(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvakey):  # Define function to build request parameters (Commented by Agnirva.com)
+    Agnirvaparms = {  # Initialize parameters for the API request (Commented by Agnirva.com)
+        "startDate": Agnirvastart.strftime("%Y-%m-%d"),  # Format start date (Commented by Agnirva.com)
+        "endDate": Agnirvaend.strftime("%Y-%m-%d"),  # Format end date (Commented by Agnirva.com)
+        "api_key": Agnirvakey  # Include the API key (Commented by Agnirva.com)
+    }
+    
+    # Additional parameters for specific events (Commented by Agnirva.com)
+    if Agnirvaevent == "CME":  # Check if the event is CME (Commented by Agnirva.com)
+        Agnirvaparms.update({  # Update parameters with CME-specific options (Commented by Agnirva.com)
+            "mostAccurateOnly": "true",  # Include only the most accurate data (Commented by Agnirva.com)
+            "completeEntryOnly": "true",  # Include only complete entries (Commented by Agnirva.com)
+            "speed": 500,  # Set speed parameter (Commented by Agnirva.com)
+            "halfAngle": 30,  # Set half-angle parameter (Commented by Agnirva.com)
+            "catalog": "ALL"  # Include all catalogs (Commented by Agnirva.com)
+        })
+    elif Agnirvaevent == "notifications":  # Check if the event is notifications (Commented by Agnirva.com)
+        Agnirvaparms.update({  # Update parameters for notifications (Commented by Agnirva.com)
+            "type": "all"  # Include all types of notifications (Commented by Agnirva.com)
+        })
+    return Agnirvaparms  # Return the request parameters (Commented by Agnirva.com)
+
+# Function to request one DONKI endpoint without touching the UI, so it can run in worker threads (Commented by Agnirva.com)
+def Agnirvarequest_donki(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvakey, Agnirvasession=None):  # Define function to request a DONKI endpoint (Commented by Agnirva.com)
+    Agnirvasession = Agnirvasession or requests  # Fall back to a one-off connection when no session is given (Commented by Agnirva.com)
+    Agnirvatimeout = (AgnirvaCONNECT_TIMEOUT, AgnirvaDONKI_TIMEOUTS.get(Agnirvaevent, AgnirvaDEFAULT_TIMEOUT))  # Connect and read timeouts for this endpoint (Commented by Agnirva.com)
+    Agnirvaresponse = Agnirvasession.get(f"{AgnirvaDONKI_BASE_URL}/{Agnirvaevent}",  # Make the API request (Commented by Agnirva.com)
+                                         params=Agnirvabuild_donki_params(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvakey),  # Query parameters (Commented by Agnirva.com)
+                                         timeout=Agnirvatimeout)  # Per-endpoint timeout (Commented by Agnirva.com)
+    Agnirvaresponse.raise_for_status()  # Raise an error for unsuccessful status codes (Commented by Agnirva.com)
+    if not Agnirvaresponse.text.strip():  # DONKI may answer an empty body when there are no events (Commented by Agnirva.com)
+        return []  # Treat an empty body as no events (Commented by Agnirva.com)
+    return Agnirvaresponse.json()  # Return the JSON response (Commented by Agnirva.com)
+
+# Function to list the calendar months covering a date range as (first day, last day) pairs (Commented by Agnirva.com)
+def Agnirvamonth_shards(Agnirvastart, Agnirvaend):  # Define function to split a range into months (Commented by Agnirva.com)
+    Agnirvashards = []  # Month ranges covering the date range (Commented by Agnirva.com)
+    Agnirvayear, Agnirvamonth = Agnirvastart.year, Agnirvastart.month  # Start with the month of the start date (Commented by Agnirva.com)
+    while (Agnirvayear, Agnirvamonth) <= (Agnirvaend.year, Agnirvaend.month):  # Loop until the month of the end date (Commented by Agnirva.com)
+        Agnirvalast_day = calendar.monthrange(Agnirvayear, Agnirvamonth)[1]  # Number of days in this month (Commented by Agnirva.com)
+        Agnirvashards.append((Agnirvastart.replace(year=Agnirvayear, month=Agnirvamonth, day=1), Agnirvastart.replace(year=Agnirvayear, month=Agnirvamonth, day=Agnirvalast_day)))  # Add the month range (Commented by Agnirva.com)
+        Agnirvayear, Agnirvamonth = (Agnirvayear + 1, 1) if Agnirvamonth == 12 else (Agnirvayear, Agnirvamonth + 1)  # Move to the next month (Commented by Agnirva.com)
+    return Agnirvashards  # Return the month ranges (Commented by Agnirva.com)
+
+# Function to request one month of an endpoint, in pieces for endpoints with a maximum range (Commented by Agnirva.com)
+def Agnirvarequest_month(Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession=None):  # Define function to request a month shard (Commented by Agnirva.com)
+    Agnirvapieces = [(Agnirvamonth_start, Agnirvamonth_end)]  # Request the whole month at once by default (Commented by Agnirva.com)
+    if Agnirvaevent in AgnirvaMAX_REQUEST_DAYS:  # Endpoints limited to 30 days are requested in half months (Commented by Agnirva.com)
+        Agnirvamiddle = Agnirvamonth_start + timedelta(days=15)  # First day of the second half (Commented by Agnirva.com)
+        Agnirvapieces = [(Agnirvamonth_start, Agnirvamiddle - timedelta(days=1)), (Agnirvamiddle, Agnirvamonth_end)]  # The two halves of the month (Commented by Agnirva.com)
+    Agnirvarecords = []  # Records of the whole month (Commented by Agnirva.com)
+    for Agnirvapiece_start, Agnirvapiece_end in Agnirvapieces:  # Loop over the pieces of the month (Commented by Agnirva.com)
+        Agnirvapayload = Agnirvarequest_donki(Agnirvaevent, Agnirvapiece_start, Agnirvapiece_end, Agnirvakey, Agnirvasession)  # Request this piece (Commented by Agnirva.com)
+        Agnirvarecords.extend(Agnirvapayload if isinstance(Agnirvapayload, list) else [])  # Keep the records of this piece (Commented by Agnirva.com)
+    return Agnirvarecords  # Return the records of the month (Commented by Agnirva.com)
+
+# Function to build the path of a month shard in the disk cache (Commented by Agnirva.com)
+def Agnirvashard_path(Agnirvaevent, Agnirvamonth_start):  # Define function to locate a shard (Commented by Agnirva.com)
+    return os.path.join(AgnirvaCACHE_DIR, Agnirvaevent, f"{Agnirvamonth_start:%Y-%m}.json")  # Shard file for this event and month (Commented by Agnirva.com)
+
+# Function to check whether a shard can be used without fetching it again (Commented by Agnirva.com)
+def Agnirvashard_is_fresh(Agnirvashard):  # Define function to check a shard's age (Commented by Agnirva.com)
+    return Agnirvashard.get("closed") or time.time() - Agnirvashard.get("fetched_at", 0) < AgnirvaOPEN_MONTH_TTL  # Closed months never change; open ones expire (Commented by Agnirva.com)
+
+# Function to read a month shard from disk, or from memory while the file is unchanged; the shard is shared and must not be modified. Returns None when it is missing, or stale unless stale shards are allowed (Commented by Agnirva.com)
+def Agnirvaread_shard(Agnirvapath, Agnirvaallow_stale=False):  # Define function to read a cached shard (Commented by Agnirva.com)
+    try:  # Attempt to read the shard file (Commented by Agnirva.com)
+        Agnirvastat = os.stat(Agnirvapath)  # Version of the file on disk (Commented by Agnirva.com)
+        Agnirvaversion = (Agnirvastat.st_ino, Agnirvastat.st_mtime_ns, Agnirvastat.st_size)  # A rewrite replaces the file, changing its inode, modification time or size (Commented by Agnirva.com)
+        with AgnirvaSHARD_MEMORY_LOCK:  # Look the shard up under the lock (Commented by Agnirva.com)
+            Agnirvaentry = AgnirvaSHARD_MEMORY.get(Agnirvapath)  # Shard parsed earlier, if any (Commented by Agnirva.com)
+            if Agnirvaentry is not None and Agnirvaentry[0] == Agnirvaversion:  # If it was parsed from this version of the file (Commented by Agnirva.com)
+                AgnirvaSHARD_MEMORY.move_to_end(Agnirvapath)  # Mark it as recently used (Commented by Agnirva.com)
+        if Agnirvaentry is not None and Agnirvaentry[0] == Agnirvaversion:  # Every session shares the parsed shard instead of parsing its own copy (Commented by Agnirva.com)
+            Agnirvashard = Agnirvaentry[1]  # Use the shared shard (Commented by Agnirva.com)
+        else:  # If the file is new or was rewritten (Commented by Agnirva.com)
+            with open(Agnirvapath, encoding="utf-8") as Agnirvafile:  # Open the shard file (Commented by Agnirva.com)
+                Agnirvashard = json.load(Agnirvafile)  # Load the shard (Commented by Agnirva.com)
+            with AgnirvaSHARD_MEMORY_LOCK:  # Remember it under the lock (Commented by Agnirva.com)
+                AgnirvaSHARD_MEMORY[Agnirvapath] = (Agnirvaversion, Agnirvashard)  # Keep it with the file version (Commented by Agnirva.com)
+                AgnirvaSHARD_MEMORY.move_to_end(Agnirvapath)  # Mark it as recently used (Commented by Agnirva.com)
+                while len(AgnirvaSHARD_MEMORY) > AgnirvaSHARD_MEMORY_ENTRIES:  # If too many shards are kept (Commented by Agnirva.com)
+                    AgnirvaSHARD_MEMORY.popitem(last=False)  # Drop the least recently used (Commented by Agnirva.com)
+    except (OSError, ValueError):  # If the shard is missing or unreadable (Commented by Agnirva.com)
+        return None  # Treat it as missing (Commented by Agnirva.com)
+    if Agnirvaallow_stale or Agnirvashard_is_fresh(Agnirvashard):  # If the shard may be used (Commented by Agnirva.com)
+        return Agnirvashard  # Return the cached shard (Commented by Agnirva.com)
+    return None  # The open month's shard is stale (Commented by Agnirva.com)
+
+# Function to write a month shard to disk atomically (Commented by Agnirva.com)
+def Agnirvawrite_shard(Agnirvapath, Agnirvarecords, Agnirvaclosed):  # Define function to store a shard (Commented by Agnirva.com)
+    os.makedirs(os.path.dirname(Agnirvapath), exist_ok=True)  # Create the cache folder if needed (Commented by Agnirva.com)
+    Agnirvatmp_path = f"{Agnirvapath}.{os.getpid()}.tmp"  # Temporary file next to the shard (Commented by Agnirva.com)
+    Agnirvashard = {"fetched_at": time.time(), "closed": Agnirvaclosed, "data": Agnirvarecords}  # The shard with its fetch time (Commented by Agnirva.com)
+    with open(Agnirvatmp_path, "w", encoding="utf-8") as Agnirvafile:  # Open the temporary file (Commented by Agnirva.com)
+        json.dump(Agnirvashard, Agnirvafile)  # Write the shard (Commented by Agnirva.com)
+    os.replace(Agnirvatmp_path, Agnirvapath)  # Replace the shard in one step so readers never see a partial file (Commented by Agnirva.com)
+    return Agnirvashard  # Return the stored shard (Commented by Agnirva.com)
+
+# Function to fetch and store one month shard; a load that finished while this one waited has already stored it, so the disk is checked again first (Commented by Agnirva.com)
+def Agnirvafetch_shard(Agnirvapath, Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession=None):  # Define function to fetch a month shard (Commented by Agnirva.com)
+    Agnirvashard = Agnirvaread_shard(Agnirvapath)  # Check the disk cache again (Commented by Agnirva.com)
+    if Agnirvashard is not None:  # If another load stored it meanwhile (Commented by Agnirva.com)
+        return Agnirvashard  # Return the stored shard (Commented by Agnirva.com)
+    Agnirvaclosed = Agnirvamonth_end < datetime.utcnow().date()  # A month that is over can never change (Commented by Agnirva.com)
+    Agnirvarecords = Agnirvarequest_month(Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession)  # Fetch the month (Commented by Agnirva.com)
+    return Agnirvawrite_shard(Agnirvapath, Agnirvarecords, Agnirvaclosed)  # Store and return the month (Commented by Agnirva.com)
+
+# Function to load one month shard of an endpoint from the disk cache, fetching it when needed; the given indexes are kept in step. With stale_ok, a stale shard is returned at once and refreshed in the background, keeping it if the refresh fails (Commented by Agnirva.com)
+def Agnirvaload_month(Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession=None, Agnirvaindexes=(), Agnirvastale_ok=False):  # Define function to load a month shard (Commented by Agnirva.com)
+    Agnirvapath = Agnirvashard_path(Agnirvaevent, Agnirvamonth_start)  # Shard file for this event and month (Commented by Agnirva.com)
+    Agnirvashard = Agnirvaread_shard(Agnirvapath, Agnirvastale_ok)  # Try the disk cache first (Commented by Agnirva.com)
+    if Agnirvashard is None:  # If the shard must be fetched (Commented by Agnirva.com)
+        Agnirvashard = AgnirvaMONTH_FLIGHTS.do(Agnirvapath, Agnirvafetch_shard, Agnirvapath, Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession)  # Concurrent loads of the same month share one fetch (Commented by Agnirva.com)
+    elif not Agnirvashard_is_fresh(Agnirvashard):  # If a stale shard is being served (Commented by Agnirva.com)
+        AgnirvaMONTH_REFRESHER.submit(Agnirvapath, Agnirvaload_month, Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession, Agnirvaindexes)  # Fetch it again on a worker thread, once (Commented by Agnirva.com)
+    for Agnirvaindex in Agnirvaindexes:  # Loop over the indexes that follow the shards (Commented by Agnirva.com)
+        Agnirvaindex.Agnirvaupdate_month(Agnirvaevent, f"{Agnirvamonth_start:%Y-%m}", Agnirvashard, Agnirvadate_field_mapping[Agnirvaevent])  # Rebuild the month if the shard is new (Commented by Agnirva.com)
+    return Agnirvashard["data"]  # Return the records of the month (Commented by Agnirva.com)
+
+# Function to assemble a date range of an endpoint from month shards; only months not yet cached are fetched (Commented by Agnirva.com)
+def Agnirvaload_event_range(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvakey, Agnirvasession=None, Agnirvamax_workers=AgnirvaOVERVIEW_MAX_WORKERS, Agnirvaindexes=(), Agnirvastale_ok=False):  # Define function to load a date range (Commented by Agnirva.com)
+    Agnirvashards = Agnirvamonth_shards(Agnirvastart, Agnirvaend)  # Months covering the range (Commented by Agnirva.com)
+    with ThreadPoolExecutor(max_workers=Agnirvamax_workers) as Agnirvaexecutor:  # Load the months with bounded parallelism (Commented by Agnirva.com)
+        Agnirvamonths = list(Agnirvaexecutor.map(lambda Agnirvashard: Agnirvaload_month(Agnirvaevent, *Agnirvashard, Agnirvakey, Agnirvasession, Agnirvaindexes, Agnirvastale_ok), Agnirvashards))  # Records per month, in order (Commented by Agnirva.com)
+    
+    return [Agnirvarecord for Agnirvarecords in Agnirvamonths for Agnirvarecord in Agnirvarecords_in_range(Agnirvaevent, Agnirvarecords, Agnirvastart, Agnirvaend)]  # Keep the records of every month inside the requested range (Commented by Agnirva.com)
+
+# Function to keep the records of a month that fall inside a date range, since the edge months reach past it (Commented by Agnirva.com)
+def Agnirvarecords_in_range(Agnirvaevent, Agnirvarecords, Agnirvastart, Agnirvaend):  # Define function to trim records to a range (Commented by Agnirva.com)
+    Agnirvadate_field = Agnirvadate_field_mapping.get(Agnirvaevent)  # Date field used to trim the edge months (Commented by Agnirva.com)
+    Agnirvafirst, Agnirvalast = Agnirvastart.isoformat(), Agnirvaend.isoformat()  # Range bounds as ISO dates (Commented by Agnirva.com)
+    return [  # Keep the records inside the requested range (Commented by Agnirva.com)
+        Agnirvarecord for Agnirvarecord in Agnirvarecords  # Loop over the records of the month (Commented by Agnirva.com)
+        if not Agnirvarecord.get(Agnirvadate_field) or Agnirvafirst <= Agnirvarecord[Agnirvadate_field][:10] <= Agnirvalast  # DONKI timestamps start with the ISO date (Commented by Agnirva.com)
+    ]
+
+# Function to yield the flattened events of a date range one month at a time, so an export of many years never holds more than a month in memory; stale months are used as they are and refreshed in the background (Commented by Agnirva.com)
+def Agnirvaiter_event_frames(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvakey, Agnirvasession=None):  # Define function to stream the events of a range (Commented by Agnirva.com)
+    for Agnirvamonth_start, Agnirvamonth_end in Agnirvamonth_shards(Agnirvastart, Agnirvaend):  # Loop over the months in order (Commented by Agnirva.com)
+        Agnirvarecords = Agnirvaload_month(Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession, Agnirvastale_ok=True)  # Records of the month, from the disk cache when possible (Commented by Agnirva.com)
+        yield Agnirvaflatten_events(Agnirvaevent, Agnirvarecords_in_range(Agnirvaevent, Agnirvarecords, Agnirvastart, Agnirvaend))  # Typed columns of the month's events in the range (Commented by Agnirva.com)
+
+# Function to bring the indexes up to date for the given endpoints, fetching only months they lack, with bounded parallelism; returns an error message per failed endpoint (Commented by Agnirva.com)
+def Agnirvarefresh_indexes(Agnirvastart, Agnirvaend, Agnirvakey, Agnirvaevents, Agnirvasession, Agnirvaindexes, Agnirvamax_workers=AgnirvaOVERVIEW_MAX_WORKERS, Agnirvastale_ok=False):  # Define function to refresh the indexes (Commented by Agnirva.com)
+    Agnirvashards = Agnirvamonth_shards(Agnirvastart, Agnirvaend)  # Months covering the range (Commented by Agnirva.com)
+    Agnirvaerrors = {}  # Error message per endpoint (Commented by Agnirva.com)
+    with ThreadPoolExecutor(max_workers=Agnirvamax_workers) as Agnirvaexecutor:  # Bound the number of parallel requests (Commented by Agnirva.com)
+        Agnirvafutures = {}  # Map each running month load to its endpoint (Commented by Agnirva.com)
+        for Agnirvaevent in Agnirvaevents:  # Loop over the endpoints (Commented by Agnirva.com)
+            Agnirvamonths = [f"{Agnirvamonth_start:%Y-%m}" for Agnirvamonth_start, _ in Agnirvashards]  # Months of the range (Commented by Agnirva.com)
+            Agnirvafresh = set.intersection(*(Agnirvaindex.Agnirvafresh_months(Agnirvaevent, Agnirvamonths) for Agnirvaindex in Agnirvaindexes))  # Months every index already holds (Commented by Agnirva.com)
+            for Agnirvamonth_start, Agnirvamonth_end in Agnirvashards:  # Loop over the months (Commented by Agnirva.com)
+                if f"{Agnirvamonth_start:%Y-%m}" not in Agnirvafresh:  # Only months missing from an index (Commented by Agnirva.com)
+                    Agnirvafutures[Agnirvaexecutor.submit(Agnirvaload_month, Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession, Agnirvaindexes, Agnirvastale_ok)] = Agnirvaevent  # Load the month shard into the indexes (Commented by Agnirva.com)
+        for Agnirvafuture in as_completed(Agnirvafutures):  # Collect month loads as they finish (Commented by Agnirva.com)
+            try:  # Read the load result (Commented by Agnirva.com)
+                Agnirvafuture.result()  # Raise any request error (Commented by Agnirva.com)
+            except requests.exceptions.RequestException as Agnirvaerror:  # If the request failed or timed out (Commented by Agnirva.com)
+                Agnirvaerrors[Agnirvafutures[Agnirvafuture]] = describe_error(Agnirvaerror)  # Record the error for this endpoint, without the request URL and its API key (Commented by Agnirva.com)
+    return Agnirvaerrors  # Return the endpoints that could not be brought up to date (Commented by Agnirva.com)
+
+# Function to summarise how fresh the cached months of a range are: the oldest download of a month that may still change (None when all are final or missing), and whether a background refresh is running or failed with its error (Commented by Agnirva.com)
+def Agnirvarange_freshness(Agnirvaevents, Agnirvastart, Agnirvaend):  # Define function to summarise shard freshness (Commented by Agnirva.com)
+    Agnirvaoldest, Agnirvarefreshing, Agnirvaerror = None, False, None  # Nothing seen yet (Commented by Agnirva.com)
+    for Agnirvaevent in Agnirvaevents:  # Loop over the endpoints (Commented by Agnirva.com)
+        for Agnirvamonth_start, Agnirvamonth_end in Agnirvamonth_shards(Agnirvastart, Agnirvaend):  # Loop over the months (Commented by Agnirva.com)
+            Agnirvapath = Agnirvashard_path(Agnirvaevent, Agnirvamonth_start)  # Shard file of the month (Commented by Agnirva.com)
+            Agnirvastate, Agnirvamessage = AgnirvaMONTH_REFRESHER.status(Agnirvapath)  # Background refresh state of the month (Commented by Agnirva.com)
+            Agnirvarefreshing = Agnirvarefreshing or Agnirvastate == "refreshing"  # Any month still refreshing (Commented by Agnirva.com)
+            Agnirvaerror = Agnirvaerror or Agnirvamessage  # First failed refresh (Commented by Agnirva.com)
+            try:  # The file time is when the shard was downloaded (Commented by Agnirva.com)
+                Agnirvafetched_at = os.path.getmtime(Agnirvapath)  # Download time of the shard (Commented by Agnirva.com)
+            except OSError:  # If the month is not cached (Commented by Agnirva.com)
+                continue  # Nothing to report for it (Commented by Agnirva.com)
+            if datetime.utcfromtimestamp(Agnirvafetched_at).date() > Agnirvamonth_end:  # Downloaded after the month ended, so it is final (Commented by Agnirva.com)
+                continue  # It never gets old (Commented by Agnirva.com)
+            Agnirvaoldest = Agnirvafetched_at if Agnirvaoldest is None else min(Agnirvaoldest, Agnirvafetched_at)  # Keep the oldest download (Commented by Agnirva.com)
+    return Agnirvaoldest, Agnirvarefreshing, Agnirvaerror  # Return the freshness summary (Commented by Agnirva.com)
+
+# Function to fingerprint the cached months behind a range by their file versions; it changes whenever one of them is downloaded again, so artifacts built from the range can be cached by it (Commented by Agnirva.com)
+def Agnirvarange_fingerprint(Agnirvaevents, Agnirvastart, Agnirvaend):  # Define function to fingerprint a range (Commented by Agnirva.com)
+    Agnirvadigest = hashlib.sha1(f"{Agnirvastart}:{Agnirvaend}".encode())  # Start from the range itself (Commented by Agnirva.com)
+    for Agnirvaevent in Agnirvaevents:  # Loop over the endpoints (Commented by Agnirva.com)
+        for Agnirvamonth_start, _ in Agnirvamonth_shards(Agnirvastart, Agnirvaend):  # Loop over the months (Commented by Agnirva.com)
+            Agnirvapath = Agnirvashard_path(Agnirvaevent, Agnirvamonth_start)  # Shard file of the month (Commented by Agnirva.com)
+            try:  # Read the file version (Commented by Agnirva.com)
+                Agnirvastat = os.stat(Agnirvapath)  # Modification time and size of the shard (Commented by Agnirva.com)
+                Agnirvadigest.update(f"{Agnirvapath}:{Agnirvastat.st_mtime_ns}:{Agnirvastat.st_size};".encode())  # Add the version of the shard (Commented by Agnirva.com)
+            except OSError:  # If the month is not cached yet (Commented by Agnirva.com)
+                Agnirvadigest.update(f"{Agnirvapath}:missing;".encode())  # Record that it is missing (Commented by Agnirva.com)
+    return Agnirvadigest.hexdigest()  # Return the fingerprint (Commented by Agnirva.com)
+
+# Function to write one event type and month as Parquet partitions: the flattened events and their daily rollup. Returns the number of events written (Commented by Agnirva.com)
+def Agnirvaexport_month(Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvaout_dir, Agnirvasession=None, Agnirvaindexes=(), Agnirvaoverwrite=False):  # Define function to export a month (Commented by Agnirva.com)
+    Agnirvamonth = f"{Agnirvamonth_start:%Y-%m}"  # Month label of the partition (Commented by Agnirva.com)
+    Agnirvaevents_path = os.path.join(Agnirvaout_dir, "events", f"event={Agnirvaevent}", f"month={Agnirvamonth}", "part-0.parquet")  # Partition of the flattened events (Commented by Agnirva.com)
+    Agnirvadaily_path = os.path.join(Agnirvaout_dir, "daily", f"event={Agnirvaevent}", f"month={Agnirvamonth}", "part-0.parquet")  # Partition of the daily rollup (Commented by Agnirva.com)
+    Agnirvamonth_over = datetime.combine(Agnirvamonth_end + timedelta(days=1), datetime.min.time()).timestamp()  # When the month ended (Commented by Agnirva.com)
+    if not Agnirvaoverwrite and all(os.path.exists(Agnirvapath) and os.path.getmtime(Agnirvapath) > Agnirvamonth_over for Agnirvapath in (Agnirvaevents_path, Agnirvadaily_path)):  # Written after the month was over, so it cannot change (Commented by Agnirva.com)
+        return None  # Skip the month (Commented by Agnirva.com)
+
+    Agnirvarecords = Agnirvaload_month(Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvasession, Agnirvaindexes)  # Records of the month, from the disk cache when possible (Commented by Agnirva.com)
+    Agnirvadf = Agnirvaflatten_events(Agnirvaevent, Agnirvarecords)  # Typed columns of the month's events (Commented by Agnirva.com)
+    Agnirvadate_field = Agnirvadate_field_mapping[Agnirvaevent]  # Date field of this event type (Commented by Agnirva.com)
+    if Agnirvadate_field in Agnirvadf.columns:  # If the events carry their date (Commented by Agnirva.com)
+        Agnirvadf = Agnirvadf[Agnirvadf[Agnirvadate_field].dt.strftime("%Y-%m") == Agnirvamonth]  # Keep only events of this month (Commented by Agnirva.com)
+    Agnirvadf = Agnirvadf.astype({Agnirvacolumn: "string" for Agnirvacolumn in Agnirvadf.select_dtypes("category").columns})  # Store categories as strings so every month has the same schema, even when a column is empty (Commented by Agnirva.com)
+    for Agnirvapath, Agnirvatable in ((Agnirvaevents_path, Agnirvadf), (Agnirvadaily_path, Agnirvadaily_rollup(Agnirvaevent, Agnirvadf, Agnirvadate_field, Agnirvamonth))):  # Loop over both partitions (Commented by Agnirva.com)
+        os.makedirs(os.path.dirname(Agnirvapath), exist_ok=True)  # Create the partition folder (Commented by Agnirva.com)
+        Agnirvatmp_path = f"{Agnirvapath}.{os.getpid()}.tmp"  # Temporary file next to the partition (Commented by Agnirva.com)
+        Agnirvatable.reset_index(drop=True).to_parquet(Agnirvatmp_path, index=False)  # Write the partition (Commented by Agnirva.com)
+        os.replace(Agnirvatmp_path, Agnirvapath)  # Replace it in one step so readers never see a partial file (Commented by Agnirva.com)
+    return len(Agnirvadf)  # Return the number of events written (Commented by Agnirva.com)
+
+# Function to export a date range month by month, so memory stays bounded by one month of every event type (Commented by Agnirva.com)
+def Agnirvaexport_history(Agnirvastart, Agnirvaend, Agnirvakey, Agnirvaout_dir, Agnirvaevents=AgnirvaDONKI_EVENTS, Agnirvaindexes=(), Agnirvaoverwrite=False, Agnirvamax_workers=AgnirvaOVERVIEW_MAX_WORKERS):  # Define function to export history (Commented by Agnirva.com)
+    Agnirvasession = Agnirvacreate_http_session(Agnirvamax_workers)  # Pooled session for the whole export (Commented by Agnirva.com)
+    Agnirvafailed = []  # (event, month) pairs that could not be exported (Commented by Agnirva.com)
+    with ThreadPoolExecutor(max_workers=Agnirvamax_workers) as Agnirvaexecutor:  # Export the event types of a month in parallel (Commented by Agnirva.com)
+        for Agnirvamonth_start, Agnirvamonth_end in Agnirvamonth_shards(Agnirvastart, Agnirvaend):  # Loop over the months in order (Commented by Agnirva.com)
+            Agnirvafutures = {Agnirvaexecutor.submit(Agnirvaexport_month, Agnirvaevent, Agnirvamonth_start, Agnirvamonth_end, Agnirvakey, Agnirvaout_dir, Agnirvasession, Agnirvaindexes, Agnirvaoverwrite): Agnirvaevent for Agnirvaevent in Agnirvaevents}  # Start every event type of the month (Commented by Agnirva.com)
+            for Agnirvafuture in as_completed(Agnirvafutures):  # Collect them as they finish (Commented by Agnirva.com)
+                Agnirvaevent = Agnirvafutures[Agnirvafuture]  # Event type of this export (Commented by Agnirva.com)
+                try:  # Read the export result (Commented by Agnirva.com)
+                    Agnirvacount = Agnirvafuture.result()  # Number of events written, or None when skipped (Commented by Agnirva.com)
+                except requests.exceptions.RequestException as Agnirvaerror:  # If the request failed or timed out (Commented by Agnirva.com)
+                    Agnirvalogger.warning("Could not export %s %s: %s", Agnirvaevent, f"{Agnirvamonth_start:%Y-%m}", redact(Agnirvaerror))  # Report the failure and carry on (Commented by Agnirva.com)
+                    Agnirvafailed.append((Agnirvaevent, f"{Agnirvamonth_start:%Y-%m}"))  # Remember it (Commented by Agnirva.com)
+                    continue  # Move on to the next event type (Commented by Agnirva.com)
+                if Agnirvacount is not None:  # If the month was written (Commented by Agnirva.com)
+                    Agnirvalogger.info("Exported %s %s: %d events", Agnirvaevent, f"{Agnirvamonth_start:%Y-%m}", Agnirvacount)  # Report progress (Commented by Agnirva.com)
+    return Agnirvafailed  # Return the months that failed (Commented by Agnirva.com)
+
+# Command line entry point for the nightly export (Commented by Agnirva.com)
+def main():  # Define the command line entry point (Commented by Agnirva.com)
+    Agnirvaparser = argparse.ArgumentParser(description="Export DONKI space weather history to partitioned Parquet with daily rollups.")  # Describe the command (Commented by Agnirva.com)
+    Agnirvaparser.add_argument("--start", type=date.fromisoformat, default=date(2010, 1, 1), help="First day to export (YYYY-MM-DD).")  # Start date option (Commented by Agnirva.com)
+    Agnirvaparser.add_argument("--end", type=date.fromisoformat, default=datetime.utcnow().date(), help="Last day to export (YYYY-MM-DD), today by default.")  # End date option (Commented by Agnirva.com)
+    Agnirvaparser.add_argument("--out", default="space_weather_export", help="Folder receiving events/ and daily/ Parquet partitions.")  # Output folder option (Commented by Agnirva.com)
+    Agnirvaparser.add_argument("--events", nargs="+", choices=AgnirvaDONKI_EVENTS, default=AgnirvaDONKI_EVENTS, help="Event types to export, all by default.")  # Event types option (Commented by Agnirva.com)
+    Agnirvaparser.add_argument("--api-key", default=os.environ.get("NASA_API_KEY"), help="NASA API key, or set NASA_API_KEY.")  # API key option (Commented by Agnirva.com)
+    Agnirvaparser.add_argument("--update-indexes", action="store_true", help="Also update the app's activity cube and event graph.")  # Index update option (Commented by Agnirva.com)
+    Agnirvaparser.add_argument("--overwrite", action="store_true", help="Rewrite partitions of months that are already exported.")  # Overwrite option (Commented by Agnirva.com)
+    Agnirvaparser.add_argument("--workers", type=int, default=AgnirvaOVERVIEW_MAX_WORKERS, help="DONKI requests in flight at once.")  # Parallelism option (Commented by Agnirva.com)
+    Agnirvaargs = Agnirvaparser.parse_args()  # Parse the command line (Commented by Agnirva.com)
+    if not Agnirvaargs.api_key:  # If no API key was given (Commented by Agnirva.com)
+        Agnirvaparser.error("a NASA API key is required (--api-key or NASA_API_KEY)")  # Stop with a usage error (Commented by Agnirva.com)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")  # Log progress to the console (Commented by Agnirva.com)
+    Agnirvaindexes = (AgnirvaActivityCube(AgnirvaCUBE_PATH, AgnirvaOPEN_MONTH_TTL), AgnirvaEventGraph(AgnirvaGRAPH_PATH, AgnirvaOPEN_MONTH_TTL)) if Agnirvaargs.update_indexes else ()  # Indexes kept in step, if asked (Commented by Agnirva.com)
+    Agnirvafailed = Agnirvaexport_history(Agnirvaargs.start, Agnirvaargs.end, Agnirvaargs.api_key, Agnirvaargs.out, Agnirvaargs.events, Agnirvaindexes, Agnirvaargs.overwrite, Agnirvaargs.workers)  # Run the export (Commented by Agnirva.com)
+    if Agnirvafailed:  # If some months failed (Commented by Agnirva.com)
+        Agnirvalogger.error("%d month(s) could not be exported; run again to retry them", len(Agnirvafailed))  # Report them (Commented by Agnirva.com)
+        raise SystemExit(1)  # Exit with an error for the scheduler (Commented by Agnirva.com)
+
+if __name__ == "__main__":  # Run the export when executed as a script (Commented by Agnirva.com)
+    main()  # Start the command line (Commented by Agnirva.com)
@@ -3,6 +3,34 @@ import requests  # Import the requests library for making HTTP requests (Comment
 import pandas as pd  # Import pandas for data manipulation and analysis (Commented by Agnirva.com)
 from datetime import datetime, timedelta  # Import datetime and timedelta for handling dates and times (Commented by Agnirva.com)
 import plotly.express as px  # Import Plotly Express for data visualization (Commented by Agnirva.com)
+import os  # Import os to locate the modules shared by the Agnirva apps (Commented by Agnirva.com)
+import sys  # Import sys to make the shared modules importable (Commented by Agnirva.com)
+
+# Modules shared by the Agnirva apps live in the AgnirvaCommon folder at the top of the repository; set AGNIRVA_COMMON to use a copy somewhere else (Commented by Agnirva.com)
+AgnirvaCOMMON_DIR = os.environ.get("AGNIRVA_COMMON", os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir, "AgnirvaCommon")))  # Folder of the shared modules (Commented by Agnirva.com)
+if AgnirvaCOMMON_DIR not in sys.path:  # If it is not importable yet (Commented by Agnirva.com)
+    sys.path.append(AgnirvaCOMMON_DIR)  # Make the shared modules importable (Commented by Agnirva.com)
+
+from AgnirvaSpaceWeatherCore import (  # Import the DONKI fetch, cache and index pipeline (Commented by Agnirva.com)
+    AgnirvaCUBE_PATH, AgnirvaGRAPH_PATH, AgnirvaMAX_REQUEST_DAYS, AgnirvaOPEN_MONTH_TTL, AgnirvaOVERVIEW_MAX_WORKERS,  # Settings shared with the batch export (Commented by Agnirva.com)
+    Agnirvacreate_http_session, Agnirvadate_field_mapping, Agnirvaiter_event_frames, Agnirvaload_event_range, Agnirvarange_fingerprint, Agnirvarange_freshness, Agnirvarefresh_indexes, Agnirvarequest_donki,  # Fetch, cache and index functions (Commented by Agnirva.com)
+)
+from AgnirvaDataPager import show_paged_rows  # Import the server-side paged data views (Commented by Agnirva.com)
+from AgnirvaNASAHttpClient import describe_error  # Import the redacted error description safe to show to any user (Commented by Agnirva.com)
+from AgnirvaDataExport import EXPORT_FORMATS, available_formats, deferred_export, export_file_name  # Import the chunked Parquet, Arrow and compressed CSV exports (Commented by Agnirva.com)
+from AgnirvaDONKIFlattener import Agnirvaflatten_events  # Import the schema-driven flattener for DONKI payloads (Commented by Agnirva.com)
+from AgnirvaActivityCube import AgnirvaActivityCube, AgnirvaCUBE_METRICS, AgnirvaCUBE_RESOLUTIONS, Agnirvacube_resolution_for_span  # Import the persistent activity cube (Commented by Agnirva.com)
+from AgnirvaEventGraph import AgnirvaEventGraph, AgnirvaGRAPH_EVENTS  # Import the linked-event graph (Commented by Agnirva.com)
+from AgnirvaNotificationFeed import AgnirvaNotificationFeed  # Import the shared live notification buffer (Commented by Agnirva.com)
+from AgnirvaDONKIFlattener import AgnirvaKP_RESOLUTIONS, AgnirvaKP_STORM_LEVEL, Agnirvaextract_kp, Agnirvakp_rollups, Agnirvakp_resolution_for_span  # Import the Kp pipeline (Commented by Agnirva.com)
+
+# Settings of the linked event and live views (Commented by Agnirva.com)
+AgnirvaLINK_FOLLOW_DAYS = 7  # Days loaded past the range so effects of late events are found (Commented by Agnirva.com)
+AgnirvaLIVE_POLL_SECONDS = 60  # Seconds between live notification polls (Commented by Agnirva.com)
+AgnirvaLIVE_CAPACITY = 5000  # Notifications kept in the live buffer (Commented by Agnirva.com)
+AgnirvaLIVE_TABLE_ROWS = 50  # Newest notifications listed in live mode (Commented by Agnirva.com)
+AgnirvaJSON_PAGE_SIZES = [10, 25, 50]  # Records per page in the raw JSON view (Commented by Agnirva.com)
+AgnirvaARTIFACT_CACHE_ENTRIES = 32  # Frames and figures kept per cache function, keyed by the fingerprint of the months they were built from (Commented by Agnirva.com)
 
 # Define event descriptions for glossary and explanations (Commented by Agnirva.com)
 Agnirvaevent_descriptions = {  # Initialize a dictionary to store event descriptions (Commented by Agnirva.com)
@@ -95,8 +123,18 @@ Agnirvaend_date = st.sidebar.date_input("End Date:", Agnirvadefault_end_date)  #
 if Agnirvastart_date > Agnirvaend_date:  # Check if start date is after end date (Commented by Agnirva.com)
     st.sidebar.error("Error: End date must fall after start date.")  # Show error message if dates are invalid (Commented by Agnirva.com)
 
+# Resolution of the event count trends (Commented by Agnirva.com)
+Agnirvatrend_resolution = st.sidebar.selectbox(  # Dropdown for the trend resolution (Commented by Agnirva.com)
+    "Trend Resolution:",  # Label for the dropdown (Commented by Agnirva.com)
+    ["Auto"] + list(AgnirvaCUBE_RESOLUTIONS),  # Automatic or a fixed resolution (Commented by Agnirva.com)
+    format_func=lambda r: AgnirvaCUBE_RESOLUTIONS.get(r, r)  # Show the resolution names (Commented by Agnirva.com)
+)
+
 # 4. Fetch data button (Commented by Agnirva.com)
 Agnirvafetch_button = st.sidebar.button("Fetch Data")  # Button to fetch data from API (Commented by Agnirva.com)
+Agnirvaoverview_button = st.sidebar.button("Fetch All Events (Overview)")  # Button to fetch every event type at once (Commented by Agnirva.com)
+Agnirvalinks_button = st.sidebar.button("Analyse Linked Events")  # Button to correlate linked events (Commented by Agnirva.com)
+Agnirvalive_mode = st.sidebar.toggle("Live Notifications", help=f"Check DONKI for new notifications every {AgnirvaLIVE_POLL_SECONDS} seconds.")  # Toggle for the live notification feed (Commented by Agnirva.com)
 
 # 5. Event Information expandable section (Commented by Agnirva.com)
 st.sidebar.markdown("### Event Information")  # Add a markdown header for event information (Commented by Agnirva.com)
@@ -116,74 +154,302 @@ with st.sidebar.expander("❓ How to Use This App"):  # Expander for help instru
     1. **Enter API Key**: Provide your NASA API Key.
     2. **Select Event Type**: Choose the space weather event you're interested in.
     3. **Set Date Range**: Specify the start and end dates for the data visualization.
-    4. **Fetch Data**: Click the "Fetch Data" button to retrieve and visualize the data.
-    5. **View Details**: Expand the raw JSON data or raw data sections to inspect the data.
+    4. **Fetch Data**: Click the "Fetch Data" button to retrieve and visualize the data, "Fetch All Events (Overview)" to see every event type on one timeline, or "Analyse Linked Events" to follow events to the events they caused.
+    5. **View Details**: Expand the raw JSON data or raw data sections to inspect the data, and pick an event under "Inspect Full Record" to see everything DONKI reports about it.
     6. **Explore**: Interact with the plots to learn more about specific events.
+    7. **Live Notifications**: Turn on "Live Notifications" to keep the latest DONKI notifications on screen, updated automatically.
     """)  # End of help instructions (Commented by Agnirva.com)
 
+# Function to create one HTTP client whose connection pool and rate limits are shared across reruns, sessions and threads (Commented by Agnirva.com)
+@st.cache_resource  # Keep a single session for the whole app (Commented by Agnirva.com)
+def Agnirvaget_http_session():  # Define function returning the shared session (Commented by Agnirva.com)
+    return Agnirvacreate_http_session(AgnirvaOVERVIEW_MAX_WORKERS)  # Return the shared session (Commented by Agnirva.com)
+
+# Function to open the activity cube once for the whole app (Commented by Agnirva.com)
+@st.cache_resource  # Keep a single cube connection (Commented by Agnirva.com)
+def Agnirvaget_activity_cube():  # Define function returning the shared cube (Commented by Agnirva.com)
+    return AgnirvaActivityCube(AgnirvaCUBE_PATH, AgnirvaOPEN_MONTH_TTL)  # Open the cube (Commented by Agnirva.com)
+
+# Function to open the linked-event graph once for the whole app (Commented by Agnirva.com)
+@st.cache_resource  # Keep a single graph in memory (Commented by Agnirva.com)
+def Agnirvaget_event_graph():  # Define function returning the shared graph (Commented by Agnirva.com)
+    return AgnirvaEventGraph(AgnirvaGRAPH_PATH, AgnirvaOPEN_MONTH_TTL)  # Open the graph (Commented by Agnirva.com)
+
+# Function to create the live notification feed shared by every session (Commented by Agnirva.com)
+@st.cache_resource  # Keep a single feed for the whole app (Commented by Agnirva.com)
+def Agnirvaget_notification_feed():  # Define function returning the shared feed (Commented by Agnirva.com)
+    return AgnirvaNotificationFeed(AgnirvaLIVE_CAPACITY, AgnirvaLIVE_POLL_SECONDS, AgnirvaMAX_REQUEST_DAYS["notifications"])  # Create the feed (Commented by Agnirva.com)
+
+# Function to list the indexes that are kept in step with the month shards (Commented by Agnirva.com)
+def Agnirvaget_indexes():  # Define function returning the shard indexes (Commented by Agnirva.com)
+    return (Agnirvaget_activity_cube(), Agnirvaget_event_graph())  # The activity cube and the event graph (Commented by Agnirva.com)
+
 # Function to fetch data from DONKI API (Commented by Agnirva.com)
-@st.cache_data(ttl=3600)  # Cache the function to avoid redundant API calls (Commented by Agnirva.com)
 def Agnirvafetch_space_weather(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvakey):  # Define function to fetch space weather data (Commented by Agnirva.com)
-    Agnirvabase_url = f"https://api.nasa.gov/DONKI/{Agnirvaevent}"  # Construct the base URL for the API endpoint (Commented by Agnirva.com)
-    Agnirvaparms = {  # Initialize parameters for the API request (Commented by Agnirva.com)
-        "startDate": Agnirvastart.strftime("%Y-%m-%d"),  # Format start date (Commented by Agnirva.com)
-        "endDate": Agnirvaend.strftime("%Y-%m-%d"),  # Format end date (Commented by Agnirva.com)
-        "api_key": Agnirvakey  # Include the API key (Commented by Agnirva.com)
-    }
-    
-    # Additional parameters for specific events (Commented by Agnirva.com)
-    if Agnirvaevent == "CME":  # Check if the event is CME (Commented by Agnirva.com)
-        Agnirvaparms.update({  # Update parameters with CME-specific options (Commented by Agnirva.com)
-            "mostAccurateOnly": "true",  # Include only the most accurate data (Commented by Agnirva.com)
-            "completeEntryOnly": "true",  # Include only complete entries (Commented by Agnirva.com)
-            "speed": 500,  # Set speed parameter (Commented by Agnirva.com)
-            "halfAngle": 30,  # Set half-angle parameter (Commented by Agnirva.com)
-            "catalog": "ALL"  # Include all catalogs (Commented by Agnirva.com)
-        })
-    elif Agnirvaevent == "notifications":  # Check if the event is notifications (Commented by Agnirva.com)
-        Agnirvaparms.update({  # Update parameters for notifications (Commented by Agnirva.com)
-            "type": "all"  # Include all types of notifications (Commented by Agnirva.com)
-        })
-    
-    Agnirvaresponse = requests.get(Agnirvabase_url, params=Agnirvaparms)  # Make the API request (Commented by Agnirva.com)
-    
-    if Agnirvaresponse.status_code == 200:  # Check if the request was successful (Commented by Agnirva.com)
-        return Agnirvaresponse.json()  # Return the JSON response (Commented by Agnirva.com)
-    else:  # If the request failed (Commented by Agnirva.com)
-        st.error(f"Error fetching data: {Agnirvaresponse.status_code} - {Agnirvaresponse.text}")  # Display error message (Commented by Agnirva.com)
-        return None  # Return None if there's an error (Commented by Agnirva.com)
-
-# Proceed if Fetch Data button is clicked (Commented by Agnirva.com)
+    try:  # Attempt to load the range from month shards on the shared session (Commented by Agnirva.com)
+        return Agnirvaload_event_range(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvakey, Agnirvaget_http_session(), Agnirvaindexes=Agnirvaget_indexes(), Agnirvastale_ok=True)  # Return the records of the range, serving stale months while they refresh (Commented by Agnirva.com)
+    except requests.exceptions.RequestException as Agnirvaerror:  # If the request failed, the connection failed or it timed out (Commented by Agnirva.com)
+        st.error(f"Error fetching data: {describe_error(Agnirvaerror)}")  # Display the reason, not the request URL with the API key (Commented by Agnirva.com)
+    return None  # Return None if there's an error (Commented by Agnirva.com)
+
+# Function to precompute the Kp rollups of a GST query once; the records are not hashed, the fingerprint of their months identifies them (Commented by Agnirva.com)
+@st.cache_data(max_entries=16, show_spinner=False)  # Reruns reuse the rollups until one of the months is downloaded again (Commented by Agnirva.com)
+def Agnirvacompute_kp_rollups(Agnirvafingerprint, Agnirvastart, Agnirvaend, _Agnirvarecords):  # Define function to cache the Kp rollups (Commented by Agnirva.com)
+    return Agnirvakp_rollups(*Agnirvaextract_kp(_Agnirvarecords))  # Extract the readings and roll them up (Commented by Agnirva.com)
+
+# Function to flatten the records of a query once per version of its months, with a date column when the event type has a known date field; the frame is kept compactly typed, since it is shared by every session, and must not be modified (Commented by Agnirva.com)
+@st.cache_resource(max_entries=AgnirvaARTIFACT_CACHE_ENTRIES, show_spinner=False)  # Reruns reuse the frame until one of the months is downloaded again (Commented by Agnirva.com)
+def Agnirvaevent_frame(Agnirvafingerprint, Agnirvaevent, _Agnirvarecords):  # Define function to cache the flattened events (Commented by Agnirva.com)
+    Agnirvadf = Agnirvaflatten_events(Agnirvaevent, _Agnirvarecords)  # Extract the needed fields into typed columns (Commented by Agnirva.com)
+    Agnirvadf = Agnirvadf.astype({Agnirvacolumn: "float32" for Agnirvacolumn in Agnirvadf.select_dtypes("float64").columns})  # Speeds, angles, Kp and fluxes need far less than float64 precision (Commented by Agnirva.com)
+    Agnirvadate_field = Agnirvadate_field_mapping.get(Agnirvaevent)  # Date field of this event type (Commented by Agnirva.com)
+    if Agnirvadate_field in Agnirvadf.columns:  # If the events carry their date (Commented by Agnirva.com)
+        Agnirvadf['date'] = pd.to_datetime(Agnirvadf[Agnirvadate_field], errors='coerce').dt.normalize()  # Convert the date field to datetime and keep the day as datetime64 rather than date objects (Commented by Agnirva.com)
+    return Agnirvadf  # Return the flattened events (Commented by Agnirva.com)
+
+# Function to bring the activity cube and event graph up to date for the given endpoints (all by default), fetching only months they lack (Commented by Agnirva.com)
+def Agnirvafetch_all_events(Agnirvastart, Agnirvaend, Agnirvakey, Agnirvaevents=None):  # Define function to fetch all event types (Commented by Agnirva.com)
+    return Agnirvarefresh_indexes(Agnirvastart, Agnirvaend, Agnirvakey, Agnirvaevents or list(Agnirvaevent_types.values()),  # Refresh the requested endpoints (Commented by Agnirva.com)
+                                  Agnirvaget_http_session(), Agnirvaget_indexes(), Agnirvastale_ok=True)  # Resolve the shared session and indexes on the script thread; stale months refresh in the background (Commented by Agnirva.com)
+
+# Function to describe an age in seconds for the freshness badge (Commented by Agnirva.com)
+def Agnirvaformat_age(Agnirvaseconds):  # Define function to describe an age (Commented by Agnirva.com)
+    Agnirvaminutes = int(Agnirvaseconds // 60)  # Age in whole minutes (Commented by Agnirva.com)
+    if Agnirvaminutes < 1:  # Less than a minute old (Commented by Agnirva.com)
+        return "just now"  # Describe it as new (Commented by Agnirva.com)
+    if Agnirvaminutes < 60:  # Less than an hour old (Commented by Agnirva.com)
+        return f"{Agnirvaminutes} min ago"  # Describe it in minutes (Commented by Agnirva.com)
+    if Agnirvaminutes < 48 * 60:  # Less than two days old (Commented by Agnirva.com)
+        return f"{Agnirvaminutes // 60} h ago"  # Describe it in hours (Commented by Agnirva.com)
+    return f"{Agnirvaminutes // (24 * 60)} days ago"  # Describe it in days (Commented by Agnirva.com)
+
+# Function to show how fresh the cached data behind a view is; nothing is shown when every month is final (Commented by Agnirva.com)
+def Agnirvashow_freshness(Agnirvaevents, Agnirvastart, Agnirvaend):  # Define function to show the freshness badge (Commented by Agnirva.com)
+    Agnirvaoldest, Agnirvarefreshing, Agnirvaerror = Agnirvarange_freshness(Agnirvaevents, Agnirvastart, Agnirvaend)  # Oldest download that may change, and the refresh state (Commented by Agnirva.com)
+    if Agnirvaoldest is None:  # If the data can no longer change (Commented by Agnirva.com)
+        return  # No badge needed (Commented by Agnirva.com)
+    Agnirvaage = Agnirvaformat_age(datetime.now().timestamp() - Agnirvaoldest)  # Age of the oldest download (Commented by Agnirva.com)
+    if Agnirvarefreshing:  # If newer data is being downloaded (Commented by Agnirva.com)
+        st.caption(f"🟡 Showing data downloaded {Agnirvaage}. Newer data is being downloaded in the background and is shown the next time the page updates.")  # Stale badge (Commented by Agnirva.com)
+    elif Agnirvaerror:  # If the last refresh failed (Commented by Agnirva.com)
+        st.caption(f"🔴 Showing data downloaded {Agnirvaage}. The last update failed: {Agnirvaerror}")  # Failed refresh badge (Commented by Agnirva.com)
+    else:  # If the data is current (Commented by Agnirva.com)
+        st.caption(f"🟢 Up to date (downloaded {Agnirvaage}).")  # Fresh badge (Commented by Agnirva.com)
+
+# Function to read the activity timeline of every endpoint from the cube (Commented by Agnirva.com)
+def Agnirvabuild_activity_timeline(Agnirvastart, Agnirvaend, Agnirvaresolution):  # Define function to build the combined timeline (Commented by Agnirva.com)
+    Agnirvaevent_names = {Agnirvacode: Agnirvaname for Agnirvaname, Agnirvacode in Agnirvaevent_types.items()}  # Display names by endpoint (Commented by Agnirva.com)
+    Agnirvatimeline = Agnirvaget_activity_cube().Agnirvaquery(list(Agnirvaevent_names), Agnirvastart, Agnirvaend, Agnirvaresolution)  # Counts per period and endpoint (Commented by Agnirva.com)
+    Agnirvatimeline["event"] = Agnirvatimeline["event"].map(Agnirvaevent_names)  # Label the counts with the event names (Commented by Agnirva.com)
+    return Agnirvatimeline.rename(columns={"period": "date"})  # Return the timeline (Commented by Agnirva.com)
+
+# Function to read the event counts of one endpoint from the cube, with its key metric named for the hover (Commented by Agnirva.com)
+def Agnirvaactivity_trend(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvaresolution):  # Define function to build one endpoint's trend (Commented by Agnirva.com)
+    Agnirvatrend = Agnirvaget_activity_cube().Agnirvaquery([Agnirvaevent], Agnirvastart, Agnirvaend, Agnirvaresolution)  # Counts per period (Commented by Agnirva.com)
+    Agnirvatrend = Agnirvatrend.drop(columns="event").rename(columns={"period": "date"})  # Dates as the x axis (Commented by Agnirva.com)
+    if Agnirvaevent not in AgnirvaCUBE_METRICS:  # If the event type has no key metric (Commented by Agnirva.com)
+        return Agnirvatrend.drop(columns=["metric_max", "metric_mean"]), []  # Return the counts alone (Commented by Agnirva.com)
+    Agnirvalabel = AgnirvaCUBE_METRICS[Agnirvaevent][1]  # Display name of the metric (Commented by Agnirva.com)
+    Agnirvatrend = Agnirvatrend.rename(columns={"metric_max": f"Max {Agnirvalabel}", "metric_mean": f"Mean {Agnirvalabel}"})  # Name the metric columns (Commented by Agnirva.com)
+    return Agnirvatrend, [f"Max {Agnirvalabel}", f"Mean {Agnirvalabel}"]  # Return the trend and its hover columns (Commented by Agnirva.com)
+
+# Function to build the trend chart of one endpoint from the cube, once per version of its months and chart options; the figure is shared and must not be modified (Commented by Agnirva.com)
+@st.cache_resource(max_entries=AgnirvaARTIFACT_CACHE_ENTRIES, show_spinner=False)  # Reruns reuse the figure until the months or options change (Commented by Agnirva.com)
+def Agnirvatrend_figure(Agnirvafingerprint, Agnirvaevent, Agnirvaevent_display, Agnirvastart, Agnirvaend, Agnirvaresolution, Agnirvay_label):  # Define function to build a trend chart (Commented by Agnirva.com)
+    Agnirvadf_grouped, Agnirvahover = Agnirvaactivity_trend(Agnirvaevent, Agnirvastart, Agnirvaend, Agnirvaresolution)  # Count events per period from the activity cube (Commented by Agnirva.com)
+    if Agnirvaevent == "CME":  # CMEs are drawn as a trend line (Commented by Agnirva.com)
+        return px.line(Agnirvadf_grouped, x='date', y='count', title=f"{AgnirvaCUBE_RESOLUTIONS[Agnirvaresolution]} Trend of {Agnirvaevent_display} Over Time",  # Create a line plot for CME trend (Commented by Agnirva.com)
+                       labels={"date": "Date", "count": Agnirvay_label},  # Set axis labels (Commented by Agnirva.com)
+                       hover_data=Agnirvahover,  # Show CME speeds in the hover (Commented by Agnirva.com)
+                       markers=True, template="plotly_dark")  # Add markers and set theme (Commented by Agnirva.com)
+    return px.bar(Agnirvadf_grouped, x='date', y='count', title=f"{AgnirvaCUBE_RESOLUTIONS[Agnirvaresolution]} Number of {Agnirvaevent_display} Over Time",  # Create a bar chart for event counts (Commented by Agnirva.com)
+                  labels={"date": "Date", "count": Agnirvay_label},  # Set axis labels (Commented by Agnirva.com)
+                  hover_data=Agnirvahover,  # Show the key metric in the hover (Commented by Agnirva.com)
+                  template="plotly_dark")  # Set the plot theme (Commented by Agnirva.com)
+
+# Function to build the Kp chart at one resolution, once per version of the months; the figure is shared and must not be modified (Commented by Agnirva.com)
+@st.cache_resource(max_entries=AgnirvaARTIFACT_CACHE_ENTRIES, show_spinner=False)  # Reruns reuse the figure until the months or resolution change (Commented by Agnirva.com)
+def Agnirvakp_figure(Agnirvafingerprint, Agnirvaevent_display, Agnirvaresolution, Agnirvay_label, _Agnirvadf_grouped):  # Define function to build the Kp chart (Commented by Agnirva.com)
+    Agnirvafig = px.line(_Agnirvadf_grouped, x='period', y=['mean', 'max'], title=f"{AgnirvaKP_RESOLUTIONS[Agnirvaresolution]} Kp Index of {Agnirvaevent_display} Over Time",  # Create a line plot for mean and peak Kp Index (Commented by Agnirva.com)
+                         labels={"period": "Date", "value": Agnirvay_label, "variable": "Kp"},  # Set axis labels (Commented by Agnirva.com)
+                         hover_data=['storm_readings', 'readings'],  # Show storm-level readings in the hover (Commented by Agnirva.com)
+                         markers=len(_Agnirvadf_grouped) <= 500, template="plotly_dark", render_mode='webgl')  # Add markers for short series and set theme (Commented by Agnirva.com)
+    Agnirvafig.add_hline(y=AgnirvaKP_STORM_LEVEL, line_dash="dot", annotation_text="Storm level (Kp 5)")  # Mark the storm threshold (Commented by Agnirva.com)
+    return Agnirvafig  # Return the chart (Commented by Agnirva.com)
+
+# Function to build the overview chart and totals, once per version of the months and resolution; returns (None, None) when there are no events (Commented by Agnirva.com)
+@st.cache_resource(max_entries=AgnirvaARTIFACT_CACHE_ENTRIES, show_spinner=False)  # Reruns reuse the chart until the months or resolution change (Commented by Agnirva.com)
+def Agnirvaoverview_artifacts(Agnirvafingerprint, Agnirvastart, Agnirvaend, Agnirvaresolution):  # Define function to build the overview (Commented by Agnirva.com)
+    Agnirvatimeline = Agnirvabuild_activity_timeline(Agnirvastart, Agnirvaend, Agnirvaresolution)  # Count events per period across endpoints (Commented by Agnirva.com)
+    if Agnirvatimeline.empty:  # If no events were found (Commented by Agnirva.com)
+        return None, None  # Nothing to draw (Commented by Agnirva.com)
+    Agnirvafig = px.bar(Agnirvatimeline, x='date', y='count', color='event', title=f"{AgnirvaCUBE_RESOLUTIONS[Agnirvaresolution]} Space Weather Activity by Event Type",  # Create a stacked bar chart of all events (Commented by Agnirva.com)
+                        labels={"date": "Date", "count": "Number of Events", "event": "Event Type"},  # Set axis labels (Commented by Agnirva.com)
+                        template="plotly_dark")  # Set the plot theme (Commented by Agnirva.com)
+    Agnirvasummary = Agnirvatimeline.groupby('event')['count'].sum().reset_index(name='Total Events')  # Total events per event type (Commented by Agnirva.com)
+    return Agnirvafig, Agnirvasummary.rename(columns={'event': 'Event Type'})  # Return the chart and the totals (Commented by Agnirva.com)
+
+# Function to follow the links between two event types, once per version of the months and query (Commented by Agnirva.com)
+@st.cache_resource(max_entries=AgnirvaARTIFACT_CACHE_ENTRIES, show_spinner=False)  # Reruns reuse the pairs until the months or query change (Commented by Agnirva.com)
+def Agnirvacached_linked_pairs(Agnirvafingerprint, Agnirvasource, Agnirvatarget, Agnirvastart, Agnirvaend, Agnirvamax_hops):  # Define function to cache the linked pairs (Commented by Agnirva.com)
+    return Agnirvaget_event_graph().Agnirvalinked_pairs(Agnirvasource, Agnirvatarget, Agnirvastart, Agnirvaend, Agnirvamax_hops)  # Follow the links from each source event (Commented by Agnirva.com)
+
+# Function to choose the trend resolution from the sidebar setting and the date span (Commented by Agnirva.com)
+def Agnirvachoose_trend_resolution(Agnirvastart, Agnirvaend):  # Define function to resolve the trend resolution (Commented by Agnirva.com)
+    if Agnirvatrend_resolution != "Auto":  # A fixed resolution was chosen (Commented by Agnirva.com)
+        return Agnirvatrend_resolution  # Use it (Commented by Agnirva.com)
+    return Agnirvacube_resolution_for_span((Agnirvaend - Agnirvastart).days + 1)  # Pick one from the span (Commented by Agnirva.com)
+
+# Function to remember which view a button asked for, replacing the previous one, so it stays on screen while exploring it (Commented by Agnirva.com)
+def Agnirvashow_view(Agnirvaview, Agnirvaquery):  # Define function to switch views (Commented by Agnirva.com)
+    for Agnirvaother in ("Agnirvaquery", "Agnirvaoverview_query", "Agnirvalinks_query"):  # Loop over the views (Commented by Agnirva.com)
+        st.session_state.pop(Agnirvaother, None)  # Forget the previous view (Commented by Agnirva.com)
+    st.session_state[Agnirvaview] = Agnirvaquery  # Store the query of the new view (Commented by Agnirva.com)
+
 if Agnirvafetch_button:  # Check if the fetch data button was clicked (Commented by Agnirva.com)
+    Agnirvashow_view("Agnirvaquery", (Agnirvaapi_endpoint, Agnirvaselected_event_display, Agnirvastart_date, Agnirvaend_date))  # Show the single-event results (Commented by Agnirva.com)
+if Agnirvaoverview_button:  # Check if the overview button was clicked (Commented by Agnirva.com)
+    Agnirvashow_view("Agnirvaoverview_query", (Agnirvastart_date, Agnirvaend_date))  # Show the overview (Commented by Agnirva.com)
+if Agnirvalinks_button:  # Check if the linked events button was clicked (Commented by Agnirva.com)
+    Agnirvashow_view("Agnirvalinks_query", (Agnirvastart_date, Agnirvaend_date))  # Show the linked event analysis (Commented by Agnirva.com)
+
+# Live notifications, refreshed on their own without rerunning the rest of the page (Commented by Agnirva.com)
+@st.fragment(run_every=AgnirvaLIVE_POLL_SECONDS)  # Rerun only this section on a timer (Commented by Agnirva.com)
+def Agnirvashow_live_notifications(Agnirvakey):  # Define function to show the live feed (Commented by Agnirva.com)
+    Agnirvafeed = Agnirvaget_notification_feed()  # Shared feed (Commented by Agnirva.com)
+    Agnirvasession = Agnirvaget_http_session()  # Shared HTTP session (Commented by Agnirva.com)
+    if Agnirvafeed.Agnirvanewest is None:  # If the feed is empty, start from the disk cache (Commented by Agnirva.com)
+        Agnirvafetch = lambda Agnirvastart, Agnirvaend: Agnirvaload_event_range("notifications", Agnirvastart, Agnirvaend, Agnirvakey, Agnirvasession, Agnirvaindexes=Agnirvaget_indexes(), Agnirvastale_ok=True)  # Fill the window from the month shards (Commented by Agnirva.com)
+    else:  # If the feed has messages (Commented by Agnirva.com)
+        Agnirvafetch = lambda Agnirvastart, Agnirvaend: Agnirvarequest_donki("notifications", Agnirvastart, Agnirvaend, Agnirvakey, Agnirvasession)  # Ask only for the newest days (Commented by Agnirva.com)
+    try:  # Attempt to poll (Commented by Agnirva.com)
+        Agnirvafeed.Agnirvapoll(Agnirvafetch, datetime.utcnow().date())  # Fetch new messages unless a poll ran recently (Commented by Agnirva.com)
+    except requests.exceptions.RequestException as Agnirvaerror:  # If the request failed or timed out (Commented by Agnirva.com)
+        st.warning(f"Could not check for new notifications: {describe_error(Agnirvaerror)}")  # Warn and keep showing the buffer, without the request URL and its API key (Commented by Agnirva.com)
+    Agnirvamessages, Agnirvasequence = Agnirvafeed.Agnirvamessages_since(0, AgnirvaLIVE_TABLE_ROWS)  # Newest messages in the buffer (Commented by Agnirva.com)
+    Agnirvaseen_sequence = st.session_state.get("Agnirvalive_sequence", Agnirvasequence)  # Newest message this session has shown (Commented by Agnirva.com)
+    st.session_state["Agnirvalive_sequence"] = Agnirvasequence  # Remember it for the next refresh (Commented by Agnirva.com)
+    st.subheader("Live Notifications")  # Add a subheader for the live feed (Commented by Agnirva.com)
+    st.caption(f"Checked every {AgnirvaLIVE_POLL_SECONDS} seconds. Newest message issued {Agnirvafeed.Agnirvanewest or 'n/a'}.")  # Show how fresh the feed is (Commented by Agnirva.com)
+    if Agnirvasequence > Agnirvaseen_sequence:  # If messages arrived since the last refresh (Commented by Agnirva.com)
+        st.success(f"{Agnirvasequence - Agnirvaseen_sequence} new notification(s) since the last update.")  # Announce them (Commented by Agnirva.com)
+    Agnirvacounts = Agnirvafeed.Agnirvadaily_counts()  # Messages per day and type, kept up to date by the feed (Commented by Agnirva.com)
+    if Agnirvacounts.empty:  # If no messages were found (Commented by Agnirva.com)
+        st.write("No notifications in the last 30 days.")  # Inform the user (Commented by Agnirva.com)
+        return  # Nothing more to show (Commented by Agnirva.com)
+    Agnirvafig = px.bar(Agnirvacounts, x='date', y='count', color='messageType', title="Notifications per Day",  # Create a stacked bar chart of the messages (Commented by Agnirva.com)
+                        labels={"date": "Date", "count": "Number of Notifications", "messageType": "Message Type"},  # Set axis labels (Commented by Agnirva.com)
+                        template="plotly_dark")  # Set the plot theme (Commented by Agnirva.com)
+    st.plotly_chart(Agnirvafig, use_container_width=True)  # Display the plotly chart (Commented by Agnirva.com)
+    st.dataframe(Agnirvamessages, hide_index=True, column_config={"messageURL": st.column_config.LinkColumn("Message")})  # Display the newest messages (Commented by Agnirva.com)
+
+# Show the live feed above the other views when it is switched on (Commented by Agnirva.com)
+if Agnirvalive_mode:  # Check if live mode is on (Commented by Agnirva.com)
+    if not Agnirvaapi_key:  # Check if the API key is provided (Commented by Agnirva.com)
+        st.error("Please enter your NASA API Key to proceed.")  # Prompt user to enter API key (Commented by Agnirva.com)
+    else:  # If API key is provided (Commented by Agnirva.com)
+        Agnirvashow_live_notifications(Agnirvaapi_key)  # Show the live feed (Commented by Agnirva.com)
+
+# Proceed if the overview has been requested (Commented by Agnirva.com)
+if "Agnirvaoverview_query" in st.session_state:  # Check if the overview is active (Commented by Agnirva.com)
+    Agnirvaoverview_start, Agnirvaoverview_end = st.session_state["Agnirvaoverview_query"]  # Use the remembered range (Commented by Agnirva.com)
+    if not Agnirvaapi_key:  # Check if the API key is provided (Commented by Agnirva.com)
+        st.error("Please enter your NASA API Key to proceed.")  # Prompt user to enter API key (Commented by Agnirva.com)
+    else:  # If API key is provided (Commented by Agnirva.com)
+        with st.spinner("Fetching all event types..."):  # Show a spinner while fetching data (Commented by Agnirva.com)
+            for Agnirvaevent, Agnirvamessage in Agnirvafetch_all_events(Agnirvaoverview_start, Agnirvaoverview_end, Agnirvaapi_key).items():  # Loop over the failed endpoints (Commented by Agnirva.com)
+                st.warning(f"Could not fetch {Agnirvaevent}: {Agnirvamessage}")  # Warn about each failed endpoint (Commented by Agnirva.com)
+        Agnirvafingerprint = Agnirvarange_fingerprint(list(Agnirvaevent_types.values()), Agnirvaoverview_start, Agnirvaoverview_end)  # Version of the months just loaded, so new data gets new artifacts on its first render (Commented by Agnirva.com)
+        
+        Agnirvaresolution = Agnirvachoose_trend_resolution(Agnirvaoverview_start, Agnirvaoverview_end)  # Resolution of the timeline (Commented by Agnirva.com)
+        Agnirvafig, Agnirvasummary = Agnirvaoverview_artifacts(Agnirvafingerprint, Agnirvaoverview_start, Agnirvaoverview_end, Agnirvaresolution)  # Chart and totals of every endpoint (Commented by Agnirva.com)
+        st.subheader(f"Space Weather Activity from {Agnirvaoverview_start} to {Agnirvaoverview_end}")  # Add a subheader with the date range (Commented by Agnirva.com)
+        Agnirvashow_freshness(list(Agnirvaevent_types.values()), Agnirvaoverview_start, Agnirvaoverview_end)  # Show how fresh the data is (Commented by Agnirva.com)
+        if Agnirvafig is None:  # If no events were found (Commented by Agnirva.com)
+            st.write("No data available for the selected parameters.")  # Inform the user that no data is available (Commented by Agnirva.com)
+        else:  # If events were found (Commented by Agnirva.com)
+            st.plotly_chart(Agnirvafig, use_container_width=True)  # Display the plotly chart (Commented by Agnirva.com)
+            st.dataframe(Agnirvasummary, hide_index=True)  # Display the totals (Commented by Agnirva.com)
+
+# Proceed if the linked event analysis has been requested (Commented by Agnirva.com)
+if "Agnirvalinks_query" in st.session_state:  # Check if the linked event analysis is active (Commented by Agnirva.com)
+    Agnirvalinks_start, Agnirvalinks_end = st.session_state["Agnirvalinks_query"]  # Use the remembered range (Commented by Agnirva.com)
+    if not Agnirvaapi_key:  # Check if the API key is provided (Commented by Agnirva.com)
+        st.error("Please enter your NASA API Key to proceed.")  # Prompt user to enter API key (Commented by Agnirva.com)
+    else:  # If API key is provided (Commented by Agnirva.com)
+        Agnirvafollow_end = min(Agnirvalinks_end + timedelta(days=AgnirvaLINK_FOLLOW_DAYS), datetime.utcnow().date())  # Also load the days after the range, where effects arrive (Commented by Agnirva.com)
+        with st.spinner("Fetching linked events..."):  # Show a spinner while fetching data (Commented by Agnirva.com)
+            for Agnirvaevent, Agnirvamessage in Agnirvafetch_all_events(Agnirvalinks_start, Agnirvafollow_end, Agnirvaapi_key, AgnirvaGRAPH_EVENTS).items():  # Loop over the failed endpoints (Commented by Agnirva.com)
+                st.warning(f"Could not fetch {Agnirvaevent}: {Agnirvamessage}")  # Warn about each failed endpoint (Commented by Agnirva.com)
+        Agnirvafingerprint = Agnirvarange_fingerprint(AgnirvaGRAPH_EVENTS, Agnirvalinks_start, Agnirvafollow_end)  # Version of the months just loaded (Commented by Agnirva.com)
+        
+        st.subheader(f"Linked Events from {Agnirvalinks_start} to {Agnirvalinks_end}")  # Add a subheader with the date range (Commented by Agnirva.com)
+        Agnirvashow_freshness(AgnirvaGRAPH_EVENTS, Agnirvalinks_start, Agnirvafollow_end)  # Show how fresh the data is (Commented by Agnirva.com)
+        Agnirvaevent_names = {Agnirvacode: Agnirvaname for Agnirvaname, Agnirvacode in Agnirvaevent_types.items()}  # Display names by endpoint (Commented by Agnirva.com)
+        Agnirvasource_col, Agnirvatarget_col, Agnirvahops_col = st.columns(3)  # Place the query controls side by side (Commented by Agnirva.com)
+        Agnirvasource = Agnirvasource_col.selectbox("Source Event:", AgnirvaGRAPH_EVENTS, index=AgnirvaGRAPH_EVENTS.index("CME"), format_func=Agnirvaevent_names.get)  # Dropdown for the causing event type (Commented by Agnirva.com)
+        Agnirvatarget = Agnirvatarget_col.selectbox("Linked Event:", AgnirvaGRAPH_EVENTS, index=AgnirvaGRAPH_EVENTS.index("GST"), format_func=Agnirvaevent_names.get)  # Dropdown for the resulting event type (Commented by Agnirva.com)
+        Agnirvamax_hops = Agnirvahops_col.slider("Maximum Links Between Them:", 1, 3, 2)  # Allow paths such as CME → IPS → GST (Commented by Agnirva.com)
+        
+        Agnirvapairs = Agnirvacached_linked_pairs(Agnirvafingerprint, Agnirvasource, Agnirvatarget, Agnirvalinks_start, Agnirvalinks_end, Agnirvamax_hops)  # Follow the links from each source event (Commented by Agnirva.com)
+        Agnirvaminimum = None  # Minimum metric of the linked events, if filtered (Commented by Agnirva.com)
+        if Agnirvatarget in AgnirvaCUBE_METRICS:  # If the linked events have a key metric (Commented by Agnirva.com)
+            Agnirvametric_label = AgnirvaCUBE_METRICS[Agnirvatarget][1]  # Display name of the metric (Commented by Agnirva.com)
+            Agnirvametric_values = Agnirvapairs["target_metric"].dropna()  # Known metric values (Commented by Agnirva.com)
+            if not Agnirvametric_values.empty and Agnirvametric_values.min() < Agnirvametric_values.max():  # If there is a range to filter on (Commented by Agnirva.com)
+                Agnirvaminimum = st.slider(f"Minimum {Agnirvametric_label}:", float(Agnirvametric_values.min()), float(Agnirvametric_values.max()),  # Slider to keep only strong linked events (Commented by Agnirva.com)
+                                           min(7.0, float(Agnirvametric_values.max())) if Agnirvatarget == "GST" else float(Agnirvametric_values.min()))  # Default to Kp 7 for storms (Commented by Agnirva.com)
+                Agnirvapairs = Agnirvapairs[Agnirvapairs["target_metric"] >= Agnirvaminimum]  # Keep the strong linked events (Commented by Agnirva.com)
+        
+        if Agnirvapairs.empty:  # If no linked events were found (Commented by Agnirva.com)
+            st.write("No linked events found for the selected parameters.")  # Inform the user that nothing was found (Commented by Agnirva.com)
+        else:  # If linked events were found (Commented by Agnirva.com)
+            Agnirvalags = Agnirvapairs["lag_hours"].dropna()  # Time from each source to its linked event (Commented by Agnirva.com)
+            Agnirvacount_col, Agnirvamean_col, Agnirvamedian_col = st.columns(3)  # Place the summary side by side (Commented by Agnirva.com)
+            Agnirvacount_col.metric(f"{Agnirvasource} events with linked {Agnirvatarget}", Agnirvapairs["source"].nunique())  # Number of source events with a link (Commented by Agnirva.com)
+            Agnirvamean_col.metric("Mean lag (hours)", f"{Agnirvalags.mean():.1f}" if not Agnirvalags.empty else "n/a")  # Mean time to the linked event (Commented by Agnirva.com)
+            Agnirvamedian_col.metric("Median lag (hours)", f"{Agnirvalags.median():.1f}" if not Agnirvalags.empty else "n/a")  # Median time to the linked event (Commented by Agnirva.com)
+            
+            if not Agnirvalags.empty:  # If the lags are known (Commented by Agnirva.com)
+                Agnirvafig = px.histogram(Agnirvapairs.dropna(subset=["lag_hours"]), x="lag_hours", nbins=40, title=f"Time from {Agnirvaevent_names[Agnirvasource]} to {Agnirvaevent_names[Agnirvatarget]}",  # Create a histogram of the lags (Commented by Agnirva.com)
+                                          labels={"lag_hours": "Lag (hours)"},  # Set axis labels (Commented by Agnirva.com)
+                                          template="plotly_dark")  # Set the plot theme (Commented by Agnirva.com)
+                st.plotly_chart(Agnirvafig, use_container_width=True)  # Display the plotly chart (Commented by Agnirva.com)
+            
+            Agnirvapair_columns = {"source": f"{Agnirvasource} ID", "source_time": f"{Agnirvasource} Time", "target": f"{Agnirvatarget} ID", "target_time": f"{Agnirvatarget} Time", "lag_hours": "Lag (hours)", "hops": "Links"}  # Table column names (Commented by Agnirva.com)
+            if Agnirvasource in AgnirvaCUBE_METRICS:  # If the source events have a key metric (Commented by Agnirva.com)
+                Agnirvapair_columns["source_metric"] = AgnirvaCUBE_METRICS[Agnirvasource][1]  # Name the source metric (Commented by Agnirva.com)
+            if Agnirvatarget in AgnirvaCUBE_METRICS:  # If the linked events have a key metric (Commented by Agnirva.com)
+                Agnirvapair_columns["target_metric"] = AgnirvaCUBE_METRICS[Agnirvatarget][1]  # Name the target metric (Commented by Agnirva.com)
+            show_paged_rows(Agnirvapairs, "Agnirvalinked_pairs", columns=list(Agnirvapair_columns), labels=Agnirvapair_columns,  # Display one page of the linked pairs, searched and sorted on the server (Commented by Agnirva.com)
+                            fingerprint=f"{Agnirvafingerprint}:{Agnirvasource}:{Agnirvatarget}:{Agnirvalinks_start}:{Agnirvalinks_end}:{Agnirvamax_hops}:{Agnirvaminimum}")  # Version of the pairs shown (Commented by Agnirva.com)
+
+# Proceed if data has been requested (Commented by Agnirva.com)
+if "Agnirvaquery" in st.session_state:  # Check if a query is active (Commented by Agnirva.com)
+    Agnirvaapi_endpoint, Agnirvaselected_event_display, Agnirvastart_date, Agnirvaend_date = st.session_state["Agnirvaquery"]  # Use the remembered query (Commented by Agnirva.com)
     if not Agnirvaapi_key:  # Check if the API key is provided (Commented by Agnirva.com)
         st.error("Please enter your NASA API Key to proceed.")  # Prompt user to enter API key (Commented by Agnirva.com)
     else:  # If API key is provided (Commented by Agnirva.com)
         with st.spinner("Fetching data..."):  # Show a spinner while fetching data (Commented by Agnirva.com)
             Agnirvadata = Agnirvafetch_space_weather(Agnirvaapi_endpoint, Agnirvastart_date, Agnirvaend_date, Agnirvaapi_key)  # Fetch the data (Commented by Agnirva.com)
+        Agnirvafingerprint = Agnirvarange_fingerprint([Agnirvaapi_endpoint], Agnirvastart_date, Agnirvaend_date)  # Version of the months just fetched, so the tables, figures and export match them (Commented by Agnirva.com)
         
         if Agnirvadata:  # If data was fetched successfully (Commented by Agnirva.com)
             st.success("Data fetched successfully!")  # Display success message (Commented by Agnirva.com)
+            Agnirvashow_freshness([Agnirvaapi_endpoint], Agnirvastart_date, Agnirvaend_date)  # Show how fresh the data is (Commented by Agnirva.com)
             
-            # Show raw JSON data for debugging (Commented by Agnirva.com)
-            with st.expander("Show Raw JSON Data for Debugging"):  # Expander to show raw JSON data (Commented by Agnirva.com)
-                st.json(Agnirvadata)  # Display the raw JSON data (Commented by Agnirva.com)
+            # Show raw JSON data for debugging, one page of records at a time; nothing is built while the expander is closed (Commented by Agnirva.com)
+            with st.expander("Show Raw JSON Data for Debugging", key="Agnirvaraw_json_open", on_change="rerun") as Agnirvaraw_json:  # Expander to show raw JSON data; opening it reruns the page (Commented by Agnirva.com)
+                if Agnirvaraw_json.open and isinstance(Agnirvadata, list):  # If the records are shown and can be paged (Commented by Agnirva.com)
+                    Agnirvapage = show_paged_rows(Agnirvaevent_frame(Agnirvafingerprint, Agnirvaapi_endpoint, Agnirvadata), "Agnirvaraw_json", fingerprint=f"{Agnirvaapi_endpoint}:{Agnirvafingerprint}",  # Search and sort on the flattened columns, whose rows follow the records (Commented by Agnirva.com)
+                                                 page_sizes=AgnirvaJSON_PAGE_SIZES, show_table=False)  # Records are long, so pages are short (Commented by Agnirva.com)
+                    st.json([Agnirvadata[Agnirvaposition] for Agnirvaposition in Agnirvapage])  # Display only the records of the page (Commented by Agnirva.com)
+                elif Agnirvaraw_json.open:  # If the payload is not a list of records (Commented by Agnirva.com)
+                    st.json(Agnirvadata)  # Display the raw JSON data (Commented by Agnirva.com)
             
             # Process data based on event type (Commented by Agnirva.com)
             if isinstance(Agnirvadata, list):  # Check if the data is a list (Commented by Agnirva.com)
-                Agnirvadf = pd.json_normalize(Agnirvadata)  # Normalize JSON data into a DataFrame (Commented by Agnirva.com)
-                
-                # Define date field mapping (Commented by Agnirva.com)
-                Agnirvadate_field_mapping = {  # Mapping of event types to their date fields (Commented by Agnirva.com)
-                    "CME": "startTime",  # Date field for CME (Commented by Agnirva.com)
-                    "GST": "startTime",  # Date field for GST (Commented by Agnirva.com)
-                    "FLR": "beginTime",  # Date field for FLR (Commented by Agnirva.com)
-                    "SEP": "eventTime",  # Date field for SEP (Commented by Agnirva.com)
-                    "IPS": "eventTime",  # Date field for IPS (Commented by Agnirva.com)
-                    "RBE": "eventTime",  # Date field for RBE (Commented by Agnirva.com)
-                    "MPC": "eventTime",  # Date field for MPC (Commented by Agnirva.com)
-                    "HSS": "eventTime",  # Date field for HSS (Commented by Agnirva.com)
-                    "notifications": "messageIssueTime"  # Date field for notifications (Commented by Agnirva.com)
-                }
+                Agnirvadf = Agnirvaevent_frame(Agnirvafingerprint, Agnirvaapi_endpoint, Agnirvadata)  # Typed columns of the events, flattened once per version of the months (Commented by Agnirva.com)
                 
                 # Define y_label mapping (Commented by Agnirva.com)
                 Agnirvay_label_mapping = {  # Mapping of event types to their y-axis labels (Commented by Agnirva.com)
@@ -201,18 +467,14 @@ if Agnirvafetch_button:  # Check if the fetch data button was clicked (Commented
                 # Define y_label (Commented by Agnirva.com)
                 Agnirvay_label = Agnirvay_label_mapping.get(Agnirvaapi_endpoint, "Count")  # Get the y-axis label based on event type (Commented by Agnirva.com)
                 
-                # Get the correct date field (Commented by Agnirva.com)
-                Agnirvadate_field = Agnirvadate_field_mapping.get(Agnirvaapi_endpoint, None)  # Get the date field for the selected event (Commented by Agnirva.com)
-                
-                if Agnirvadate_field and Agnirvadate_field in Agnirvadf.columns:  # Check if the date field exists in the DataFrame (Commented by Agnirva.com)
-                    Agnirvadf['date'] = pd.to_datetime(Agnirvadf[Agnirvadate_field], errors='coerce').dt.date  # Convert the date field to datetime and extract the date (Commented by Agnirva.com)
-                else:  # If the specific date field is not found (Commented by Agnirva.com)
+                if 'date' not in Agnirvadf.columns:  # If the event type's date field is not found (Commented by Agnirva.com)
+                    Agnirvadf = Agnirvadf.copy()  # Work on a copy, the cached frame is shared (Commented by Agnirva.com)
                     # Attempt to find a date field dynamically (Commented by Agnirva.com)
                     Agnirvapossible_keys = [col for col in Agnirvadf.columns if 'date' in col.lower() or 'time' in col.lower()]  # Search for columns containing 'date' or 'time' (Commented by Agnirva.com)
                     if Agnirvapossible_keys:  # If any possible date fields are found (Commented by Agnirva.com)
                         Agnirvadate_field = Agnirvapossible_keys[0]  # Use the first possible date field (Commented by Agnirva.com)
                         st.warning(f"Using '{Agnirvadate_field}' as the date field.")  # Warn the user about the chosen date field (Commented by Agnirva.com)
-                        Agnirvadf['date'] = pd.to_datetime(Agnirvadf[Agnirvadate_field], errors='coerce').dt.date  # Convert to datetime and extract the date (Commented by Agnirva.com)
+                        Agnirvadf['date'] = pd.to_datetime(Agnirvadf[Agnirvadate_field], errors='coerce').dt.normalize()  # Convert to datetime and keep the day (Commented by Agnirva.com)
                     else:  # If no date fields are found (Commented by Agnirva.com)
                         st.error("No suitable date field found in the data.")  # Show error message (Commented by Agnirva.com)
                         Agnirvadf['date'] = pd.NaT  # Assign Not-a-Time if no date field is found (Commented by Agnirva.com)
@@ -220,26 +482,20 @@ if Agnirvafetch_button:  # Check if the fetch data button was clicked (Commented
                 # Handle different event types (Commented by Agnirva.com)
                 if Agnirvaapi_endpoint == "CME":  # If the event is CME (Commented by Agnirva.com)
                     # For CME, plot the number of CMEs per day (Commented by Agnirva.com)
-                    Agnirvadf_grouped = Agnirvadf.groupby('date').size().reset_index(name='count')  # Group data by date and count CMEs (Commented by Agnirva.com)
+                    Agnirvaresolution = Agnirvachoose_trend_resolution(Agnirvastart_date, Agnirvaend_date)  # Resolution of the trend (Commented by Agnirva.com)
                     
                     # Plotting with Plotly for interactivity (Commented by Agnirva.com)
                     st.markdown("### Selected Event Information")  # Add a markdown header (Commented by Agnirva.com)
                     st.write(Agnirvaevent_descriptions.get(Agnirvaapi_endpoint, "No description available."))  # Display event description (Commented by Agnirva.com)
                     
                     st.subheader(f"{Agnirvaselected_event_display} from {Agnirvastart_date} to {Agnirvaend_date}")  # Add a subheader with event and date range (Commented by Agnirva.com)
-                    Agnirvafig = px.line(Agnirvadf_grouped, x='date', y='count', title=f"Trend of {Agnirvaselected_event_display} Over Time",  # Create a line plot for CME trend (Commented by Agnirva.com)
-                                        labels={"date": "Date", "count": Agnirvay_label},  # Set axis labels (Commented by Agnirva.com)
-                                        markers=True, template="plotly_dark")  # Add markers and set theme (Commented by Agnirva.com)
+                    Agnirvafig = Agnirvatrend_figure(Agnirvafingerprint, Agnirvaapi_endpoint, Agnirvaselected_event_display, Agnirvastart_date, Agnirvaend_date, Agnirvaresolution, Agnirvay_label)  # CMEs per period from the activity cube (Commented by Agnirva.com)
                     st.plotly_chart(Agnirvafig, use_container_width=True)  # Display the plotly chart (Commented by Agnirva.com)
                 
                 elif Agnirvaapi_endpoint == "GST":  # If the event is GST (Commented by Agnirva.com)
-                    # For GST, plot the average Kp Index per day (Commented by Agnirva.com)
-                    if 'allKpIndex' in Agnirvadf.columns:  # Check if 'allKpIndex' column exists (Commented by Agnirva.com)
-                        Agnirvakp_df = Agnirvadf.explode('allKpIndex')  # Explode the 'allKpIndex' list into separate rows (Commented by Agnirva.com)
-                        Agnirvakp_df = pd.json_normalize(Agnirvakp_df['allKpIndex'])  # Normalize the exploded JSON data (Commented by Agnirva.com)
-                        Agnirvakp_df['date'] = pd.to_datetime(Agnirvakp_df['observedTime'], errors='coerce').dt.date  # Convert 'observedTime' to date (Commented by Agnirva.com)
-                        Agnirvadf_grouped = Agnirvakp_df.groupby('date').agg({'kpIndex': 'mean'}).reset_index()  # Calculate average Kp Index per day (Commented by Agnirva.com)
-                        
+                    # For GST, plot the Kp Index at a resolution that suits the date range (Commented by Agnirva.com)
+                    Agnirvarollups = Agnirvacompute_kp_rollups(Agnirvafingerprint, Agnirvastart_date, Agnirvaend_date, Agnirvadata)  # Precomputed 3-hourly to monthly rollups (Commented by Agnirva.com)
+                    if not Agnirvarollups["3H"].empty:  # Check if any Kp readings exist (Commented by Agnirva.com)
                         # Plotting with Plotly for interactivity (Commented by Agnirva.com)
                         st.markdown("### Selected Event Information")  # Add a markdown header (Commented by Agnirva.com)
                         st.write(Agnirvaevent_descriptions.get(Agnirvaapi_endpoint, "No description available."))  # Display event description (Commented by Agnirva.com)
@@ -248,44 +504,71 @@ if Agnirvafetch_button:  # Check if the fetch data button was clicked (Commented
                         # if Agnirvaapi_endpoint in Agnirvaevent_images:
                         #     st.image(Agnirvaevent_images[Agnirvaapi_endpoint], use_container_width=True)
                         
+                        Agnirvaauto_resolution = Agnirvakp_resolution_for_span((Agnirvaend_date - Agnirvastart_date).days + 1)  # Resolution suited to the displayed span (Commented by Agnirva.com)
+                        Agnirvaresolution = st.selectbox(  # Dropdown to override the Kp resolution (Commented by Agnirva.com)
+                            "Kp Resolution:",  # Label for the dropdown (Commented by Agnirva.com)
+                            list(AgnirvaKP_RESOLUTIONS),  # Available resolutions (Commented by Agnirva.com)
+                            index=list(AgnirvaKP_RESOLUTIONS).index(Agnirvaauto_resolution),  # Default to the automatic choice (Commented by Agnirva.com)
+                            format_func=lambda r: AgnirvaKP_RESOLUTIONS[r]  # Show the resolution names (Commented by Agnirva.com)
+                        )
+                        Agnirvadf_grouped = Agnirvarollups[Agnirvaresolution]  # Rollup at the chosen resolution (Commented by Agnirva.com)
+                        
                         st.subheader(f"{Agnirvaselected_event_display} Kp Index from {Agnirvastart_date} to {Agnirvaend_date}")  # Add a subheader with event and date range (Commented by Agnirva.com)
-                        Agnirvafig = px.line(Agnirvadf_grouped, x='date', y='kpIndex', title=f"Average Kp Index of {Agnirvaselected_event_display} Over Time",  # Create a line plot for average Kp Index (Commented by Agnirva.com)
-                                          labels={"date": "Date", "kpIndex": Agnirvay_label},  # Set axis labels (Commented by Agnirva.com)
-                                          markers=True, template="plotly_dark")  # Add markers and set theme (Commented by Agnirva.com)
+                        Agnirvafig = Agnirvakp_figure(Agnirvafingerprint, Agnirvaselected_event_display, Agnirvaresolution, Agnirvay_label, Agnirvadf_grouped)  # Mean and peak Kp Index, with the storm level marked (Commented by Agnirva.com)
                         st.plotly_chart(Agnirvafig, use_container_width=True)  # Display the plotly chart (Commented by Agnirva.com)
                     else:  # If 'allKpIndex' data is not available (Commented by Agnirva.com)
                         st.error("No 'allKpIndex' data available to plot.")  # Show error message (Commented by Agnirva.com)
                 
                 elif Agnirvaapi_endpoint == "notifications":  # If the event is notifications (Commented by Agnirva.com)
                     # For Notifications, plot the number of notifications per day (Commented by Agnirva.com)
-                    Agnirvadf_grouped = Agnirvadf.groupby('date').size().reset_index(name='count')  # Group data by date and count notifications (Commented by Agnirva.com)
+                    Agnirvaresolution = Agnirvachoose_trend_resolution(Agnirvastart_date, Agnirvaend_date)  # Resolution of the trend (Commented by Agnirva.com)
                     
                     # Plotting with Plotly for interactivity (Commented by Agnirva.com)
                     st.markdown("### Selected Event Information")  # Add a markdown header (Commented by Agnirva.com)
                     st.write(Agnirvaevent_descriptions.get(Agnirvaapi_endpoint, "No description available."))  # Display event description (Commented by Agnirva.com)
                     
                     st.subheader(f"{Agnirvaselected_event_display} from {Agnirvastart_date} to {Agnirvaend_date}")  # Add a subheader with event and date range (Commented by Agnirva.com)
-                    Agnirvafig = px.bar(Agnirvadf_grouped, x='date', y='count', title=f"Number of {Agnirvaselected_event_display} Over Time",  # Create a bar chart for notifications (Commented by Agnirva.com)
-                                     labels={"date": "Date", "count": Agnirvay_label},  # Set axis labels (Commented by Agnirva.com)
-                                     template="plotly_dark")  # Set the plot theme (Commented by Agnirva.com)
+                    Agnirvafig = Agnirvatrend_figure(Agnirvafingerprint, Agnirvaapi_endpoint, Agnirvaselected_event_display, Agnirvastart_date, Agnirvaend_date, Agnirvaresolution, Agnirvay_label)  # Notifications per period from the activity cube (Commented by Agnirva.com)
                     st.plotly_chart(Agnirvafig, use_container_width=True)  # Display the plotly chart (Commented by Agnirva.com)
                 
                 else:  # For other event types (Commented by Agnirva.com)
                     # For other event types, plot the count per day (Commented by Agnirva.com)
-                    Agnirvadf_grouped = Agnirvadf.groupby('date').size().reset_index(name='count')  # Group data by date and count events (Commented by Agnirva.com)
+                    Agnirvaresolution = Agnirvachoose_trend_resolution(Agnirvastart_date, Agnirvaend_date)  # Resolution of the trend (Commented by Agnirva.com)
                     
                     # Plotting with Plotly for interactivity (Commented by Agnirva.com)
                     st.markdown("### Selected Event Information")  # Add a markdown header (Commented by Agnirva.com)
                     st.write(Agnirvaevent_descriptions.get(Agnirvaapi_endpoint, "No description available."))  # Display event description (Commented by Agnirva.com)
                     
                     st.subheader(f"{Agnirvaselected_event_display} from {Agnirvastart_date} to {Agnirvaend_date}")  # Add a subheader with event and date range (Commented by Agnirva.com)
-                    Agnirvafig = px.bar(Agnirvadf_grouped, x='date', y='count', title=f"Number of {Agnirvaselected_event_display} Over Time",  # Create a bar chart for event counts (Commented by Agnirva.com)
-                                     labels={"date": "Date", "count": Agnirvay_label},  # Set axis labels (Commented by Agnirva.com)
-                                     template="plotly_dark")  # Set the plot theme (Commented by Agnirva.com)
+                    Agnirvafig = Agnirvatrend_figure(Agnirvafingerprint, Agnirvaapi_endpoint, Agnirvaselected_event_display, Agnirvastart_date, Agnirvaend_date, Agnirvaresolution, Agnirvay_label)  # Events per period from the activity cube (Commented by Agnirva.com)
                     st.plotly_chart(Agnirvafig, use_container_width=True)  # Display the plotly chart (Commented by Agnirva.com)
                     
                 # Show raw data (Commented by Agnirva.com)
-                with st.expander("Show Raw Data"):  # Expander to show the raw DataFrame (Commented by Agnirva.com)
-                    st.write(Agnirvadf)  # Display the raw DataFrame (Commented by Agnirva.com)
+                with st.expander("Show Raw Data", key="Agnirvaraw_data_open", on_change="rerun") as Agnirvaraw_data:  # Expander to show the raw DataFrame; opening it reruns the page (Commented by Agnirva.com)
+                    if Agnirvaraw_data.open:  # Nothing is built while the expander is closed (Commented by Agnirva.com)
+                        Agnirvapage = show_paged_rows(Agnirvadf, "Agnirvaraw_data", fingerprint=f"{Agnirvaapi_endpoint}:{Agnirvafingerprint}")  # Display one page of the events, searched and sorted on the server (Commented by Agnirva.com)
+                        Agnirvarecord_index = st.selectbox(  # Dropdown to drill into one full nested record (Commented by Agnirva.com)
+                            "Inspect Full Record:",  # Label for the dropdown (Commented by Agnirva.com)
+                            [None] + Agnirvapage.tolist(),  # Events of the page; no record selected by default (Commented by Agnirva.com)
+                            format_func=lambda i: "Select an event..." if i is None else str(Agnirvadf.iloc[i, 0])  # Show each event by its ID (Commented by Agnirva.com)
+                        )
+                        if Agnirvarecord_index is not None:  # Only render the record that was asked for (Commented by Agnirva.com)
+                            st.json(Agnirvadata[Agnirvarecord_index])  # Display the full nested record (Commented by Agnirva.com)
+                
+                # Download the events; the export is written month by month, only when it is downloaded, and downloading doesn't rerun the page (Commented by Agnirva.com)
+                Agnirvaexport_format = st.selectbox(  # Dropdown to choose the download format (Commented by Agnirva.com)
+                    "Download Format:",  # Label for the dropdown (Commented by Agnirva.com)
+                    available_formats(),  # Formats this installation can write (Commented by Agnirva.com)
+                    format_func=lambda Agnirvafmt: EXPORT_FORMATS[Agnirvafmt][0],  # Show each format by name (Commented by Agnirva.com)
+                    help="Compressed CSV opens in any spreadsheet; Parquet and Arrow IPC keep the column types and load fastest in pandas and other data tools."  # Explain the formats (Commented by Agnirva.com)
+                )
+                Agnirvaexport_session = Agnirvaget_http_session()  # Resolve the shared session on the script thread (Commented by Agnirva.com)
+                st.download_button(  # Button that builds the export when clicked (Commented by Agnirva.com)
+                    label="Download Events",  # Button label (Commented by Agnirva.com)
+                    data=deferred_export(lambda Agnirvaexport_args=(Agnirvaapi_endpoint, Agnirvastart_date, Agnirvaend_date, Agnirvaapi_key, Agnirvaexport_session): Agnirvaiter_event_frames(*Agnirvaexport_args), Agnirvaexport_format),  # Stream the months of the query into the export (Commented by Agnirva.com)
+                    file_name=export_file_name(f"{Agnirvaapi_endpoint}_{Agnirvastart_date}_{Agnirvaend_date}", Agnirvaexport_format),  # File named after the query (Commented by Agnirva.com)
+                    mime=EXPORT_FORMATS[Agnirvaexport_format][2],  # MIME type of the format (Commented by Agnirva.com)
+                    on_click="ignore",  # Keep the page as it is (Commented by Agnirva.com)
+                )
             else:  # If no data is available (Commented by Agnirva.com)
                 st.write("No data available for the selected parameters.")  # Inform the user that no data is available (Commented by Agnirva.com)